@@ -0,0 +1,93 @@
+#!/bin/python3
+# Benchmark of path per segment vs merged polygon vs VIA cell GDS output.
+# Shape count, file size and a KLayout DRC proxy (merge, width and space check of every layer).
+
+import argparse
+import contextlib
+import os
+import sys
+import tempfile
+import time
+
+import gdspy
+import pya
+
+from inductor_generator import InductorGenerator, InductorShapeType, METAL_THICKNESS, CELL_NAME
+
+
+DRC_MIN_WIDTH = 0.3				# um met3/met4 min width of Sky130
+DRC_MIN_SPACE = 0.3				# um met3/met4 min space of Sky130
+BENCHMARK_N_LIST = (2, 4, 8, 16)
+BENCHMARK_REPEAT = 5
+
+
+def countShapes(gds_file_name):
+	cell = gdspy.GdsLibrary(infile=gds_file_name).cells[CELL_NAME]
+	return sum(len(polygons) for polygons in cell.get_polygons(by_spec=True).values())
+
+def runDrcProxy(gds_file_name, repeat=BENCHMARK_REPEAT):
+	# sec of the fastest run
+	best = None
+	for i in range(repeat):
+		start = time.perf_counter()
+		layout = pya.Layout()
+		layout.read(gds_file_name)
+		cell = layout.cell(CELL_NAME)
+		violations = 0
+		for layer_index in layout.layer_indexes():
+			region = pya.Region(cell.begin_shapes_rec(layer_index))
+			region.merge()
+			violations = violations + region.width_check(int(DRC_MIN_WIDTH / layout.dbu)).count()
+			violations = violations + region.space_check(int(DRC_MIN_SPACE / layout.dbu)).count()
+		elapsed = time.perf_counter() - start
+		if best is None or elapsed < best:
+			best = elapsed
+	return (best, violations)
+
+def benchmarkDesign(shapeType, R, S, W, N, out_dir, repeat=BENCHMARK_REPEAT):
+	generator = InductorGenerator(shapeType, R, S, W, N, METAL_THICKNESS, 20.0, 2.0, out_dir)
+	row_List = []
+	for mode in ("path", "merged", "via"):
+		with open(os.devnull, 'w') as devnull:
+			with contextlib.redirect_stdout(devnull):
+				start = time.perf_counter()
+				gds_file_name = generator.generateInductor4gds(merge=(mode == "merged"), via_cell=(mode == "via"))
+				write_time = time.perf_counter() - start
+		drc_time, violations = runDrcProxy(gds_file_name, repeat)
+		row_List.append({
+			"shape": shapeType.name,
+			"N": N,
+			"mode": mode,
+			"shapes": countShapes(gds_file_name),
+			"bytes": os.path.getsize(gds_file_name),
+			"write": write_time,
+			"drc": drc_time,
+			"violations": violations,
+		})
+	return row_List
+
+
+
+def main(argv=None):
+	parser = argparse.ArgumentParser(description="Path per segment vs merged polygon vs VIA cell GDS benchmark")
+	parser.add_argument("--shape", default="spiral,symmetry", help="spiral,symmetry")
+	parser.add_argument("--N", default=",".join(str(N) for N in BENCHMARK_N_LIST), help="number of rolls")
+	parser.add_argument("--R", type=float, default=20.0, help="inner R")
+	parser.add_argument("--S", type=float, default=2.0, help="wire to wire space")
+	parser.add_argument("--W", type=float, default=2.0, help="wire width")
+	parser.add_argument("--repeat", type=int, default=BENCHMARK_REPEAT, help="DRC proxy runs (fastest is reported)")
+	args = parser.parse_args(argv)
+
+	print("%-9s %3s %-7s %7s %9s %9s %9s %5s" % ("shape", "N", "mode", "shapes", "bytes", "write ms", "drc ms", "viol"))
+	with tempfile.TemporaryDirectory(prefix="gds_merge_") as out_dir:
+		for shape in args.shape.split(","):
+			for N in [int(N) for N in args.N.split(",")]:
+				for row in benchmarkDesign(InductorShapeType[shape], args.R, args.S, args.W, N, out_dir, args.repeat):
+					print("%-9s %3d %-7s %7d %9d %9.3f %9.3f %5d" % (row["shape"], row["N"], row["mode"], row["shapes"],
+						row["bytes"], row["write"] * 1e3, row["drc"] * 1e3, row["violations"]))
+	return 0
+
+
+
+if __name__ == '__main__':
+	sys.exit(main())
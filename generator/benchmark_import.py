@@ -0,0 +1,82 @@
+#!/bin/python3
+# Startup benchmark of Inductor Generator : cold process wall time and loaded backends of every output mode.
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+
+GENERATOR_DIR = os.path.dirname(os.path.abspath(__file__))
+IMPORT_REPEAT = 5
+IMPORT_WATCH = ("numpy", "gdspy", "gds_stream", "pya", "klayout", "uuid", "random", "scipy")
+
+# mode : statements after "import inductor_generator as ig" with a generator g in out_dir
+IMPORT_MODES = {
+	"import": "",
+	"henry": "g.generateInductor4henry()",
+	"gds": "g.generateInductor4gds()",
+	"gds-stream": "g.generateInductor4gds(stream=True)",
+	"both": "g.generateInductor4henry(); g.generateInductor4gds()",
+}
+IMPORT_SCRIPT = """
+import contextlib, io, sys
+import inductor_generator as ig
+%(run)s
+print(",".join(m for m in %(watch)r if m in sys.modules))
+"""
+IMPORT_RUN_SCRIPT = """
+g = ig.InductorGenerator(ig.InductorShapeType.symmetry, 20.0, 2.0, 2.0, 4, ig.METAL_THICKNESS, 20.0, 2.0, %(out_dir)r)
+with contextlib.redirect_stdout(io.StringIO()):
+	%(run)s
+"""
+
+
+def runMode(mode, out_dir, repeat=IMPORT_REPEAT):
+	# (median sec, [sec], loaded modules)
+	run = ""
+	if IMPORT_MODES[mode]:
+		run = IMPORT_RUN_SCRIPT % {"run": IMPORT_MODES[mode], "out_dir": out_dir}
+	script = IMPORT_SCRIPT % {"run": run, "watch": IMPORT_WATCH}
+	elapsed_List = []
+	loaded = ""
+	for i in range(repeat):
+		start = time.perf_counter()
+		result = subprocess.run([sys.executable, "-c", script], cwd=GENERATOR_DIR, check=True, capture_output=True, text=True)
+		elapsed_List.append(time.perf_counter() - start)
+		loaded = result.stdout.strip()
+	return (statistics.median(elapsed_List), elapsed_List, loaded)
+
+def runBaseline(repeat=IMPORT_REPEAT):
+	# Bare interpreter start
+	elapsed_List = []
+	for i in range(repeat):
+		start = time.perf_counter()
+		subprocess.run([sys.executable, "-c", "pass"], check=True)
+		elapsed_List.append(time.perf_counter() - start)
+	return statistics.median(elapsed_List)
+
+
+
+def main(argv=None):
+	parser = argparse.ArgumentParser(description="Startup benchmark of Inductor Generator")
+	parser.add_argument("--modes", default=",".join(IMPORT_MODES), help=",".join(IMPORT_MODES))
+	parser.add_argument("--repeat", type=int, default=IMPORT_REPEAT, help="processes per mode (median is reported)")
+	args = parser.parse_args(argv)
+
+	baseline = runBaseline(args.repeat)
+	print("%-11s %9s %9s  %s" % ("mode", "wall ms", "+ms", "loaded"))
+	print("%-11s %9.1f %9.1f" % ("python", baseline * 1e3, 0.0))
+	with tempfile.TemporaryDirectory(prefix="inductor_import_") as out_dir:
+		for mode in args.modes.split(","):
+			median, elapsed_List, loaded = runMode(mode, out_dir, args.repeat)
+			print("%-11s %9.1f %9.1f  %s" % (mode, median * 1e3, (median - baseline) * 1e3, loaded))
+	return 0
+
+
+
+if __name__ == '__main__':
+	sys.exit(main())
@@ -0,0 +1,106 @@
+#!/bin/python3
+# Memory benchmark of Inductor Generator : bytes per candidate of the parameter representations held by sweeps and the optimizer.
+# row : normalizeSweepParams dict, params : InductorParams, params_ID : params with the ID derived,
+# params_geometry : params with the line / center position lists, records : createParamsRecords
+
+import argparse
+import json
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+from inductor_generator import InductorParams, InductorShapeType, METAL_THICKNESS, SHAPE_SIDES, createParamsRecords, getParamsRow
+from inductor_sweep import normalizeSweepParams
+
+
+MEMORY_COUNT = 20000
+MEMORY_SHAPE = "spiral"
+MEMORY_REPRESENTATIONS = ("row", "params", "params_ID", "params_geometry", "records")
+
+
+def createCandidateGrid(count):
+	# count candidates over R, S, W, N : (R, S, W, N) arrays
+	index = np.arange(count)
+	R = 10.0 + (index % 46) * 2.0
+	S = 1.0 + (index // 46) % 4
+	W = 1.0 + (index // 184) % 8
+	N = 2 + (index // 1472) % 7
+	return (R, S, W, N)
+
+def createRepresentation(representation, shapeType, R, S, W, N):
+	if representation == "records":
+		return createParamsRecords(shapeType, R, S, W, N, METAL_THICKNESS)
+	if representation == "row":
+		return [normalizeSweepParams({"shape": shapeType.name, "R": R_i, "S": S_i, "W": W_i, "N": N_i})
+			for R_i, S_i, W_i, N_i in zip(R.tolist(), S.tolist(), W.tolist(), N.tolist())]
+	sides = SHAPE_SIDES[shapeType]
+	params_List = [InductorParams(R_i, S_i, W_i, N_i, METAL_THICKNESS, 20.0, 2.0, sides) for R_i, S_i, W_i, N_i in zip(R.tolist(), S.tolist(), W.tolist(), N.tolist())]
+	for params in params_List:
+		if representation == "params_ID":
+			params.ID
+		elif representation == "params_geometry":
+			params.createLineInductorPositonList()
+			params.calCenterPositonList()
+	return params_List
+
+def measureRepresentation(representation, shapeType, count=MEMORY_COUNT):
+	# {"bytes", "sec"} per candidate : traced memory still held by the population after it is built
+	R, S, W, N = createCandidateGrid(count)
+	tracemalloc.start()
+	try:
+		start_current = tracemalloc.get_traced_memory()[0]
+		start = time.perf_counter()
+		population = createRepresentation(representation, shapeType, R, S, W, N)
+		elapsed = time.perf_counter() - start
+		current, peak = tracemalloc.get_traced_memory()
+	finally:
+		tracemalloc.stop()
+	assert len(population) == count
+	return {
+		"representation": representation,
+		"count": count,
+		"bytes": (current - start_current) / count,
+		"peak": (peak - start_current) / count,
+		"sec": elapsed / count,
+	}
+
+def checkRecords(shapeType, count=64):
+	# Records and InductorParams derive the same sizes and IDs
+	records = createRepresentation("records", shapeType, *createCandidateGrid(count))
+	for record in records:
+		params = InductorParams.fromRecord(record)
+		if (params.L, params.A, params.GuardRing_L) != (record["L"], record["A"], record["GuardRing_L"]):
+			raise ValueError("Record sizes differ from InductorParams : %r" % (getParamsRow(record),))
+		if params.ID != InductorParams.fromRecord(record).ID:
+			raise ValueError("InductorParams ID is not deterministic")
+	return True
+
+
+
+def main(argv=None):
+	parser = argparse.ArgumentParser(description="Memory per candidate of the parameter representations of Inductor Generator")
+	parser.add_argument("--count", type=int, default=MEMORY_COUNT, help="candidates per representation")
+	parser.add_argument("--shape", default=MEMORY_SHAPE, choices=[shapeType.name for shapeType in InductorShapeType], help="inductor shape")
+	parser.add_argument("--representations", default=",".join(MEMORY_REPRESENTATIONS), help=",".join(MEMORY_REPRESENTATIONS))
+	parser.add_argument("--output", default=None, help="write the results as JSON")
+	args = parser.parse_args(argv)
+
+	shapeType = InductorShapeType[args.shape]
+	checkRecords(shapeType)
+	row_List = [measureRepresentation(representation, shapeType, args.count) for representation in args.representations.split(",")]
+
+	print("%-16s %8s %12s %12s %10s" % ("representation", "count", "bytes/cand", "peak/cand", "us/cand"))
+	for row in row_List:
+		print("%-16s %8d %12.1f %12.1f %10.3f" % (row["representation"], row["count"], row["bytes"], row["peak"], row["sec"] * 1e6))
+
+	if args.output is not None:
+		with open(args.output, 'w') as f:
+			json.dump({"shape": args.shape, "results": row_List}, f, indent=1)
+	return 0
+
+
+
+if __name__ == '__main__':
+	sys.exit(main())
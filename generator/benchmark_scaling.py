@@ -0,0 +1,175 @@
+#!/bin/python3
+# Scaling benchmark of Inductor Generator : geometry, netlist, FastHenry text, GDS write and stand-in solver
+# across turn count, wire width, FastHenry mesh and segment subdivision. Results go to a JSON baseline, later runs are compared against it.
+
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+
+from inductor_generator import InductorGenerator, InductorShapeType, METAL_THICKNESS
+from inductor_profile import StageProfiler
+from fasthenry_runner import FastHenryRunner, StandInSolver
+from inductor_args import parseMesh
+
+
+SCALING_SHAPES = ("spiral", "symmetry")
+SCALING_N_LIST = (1, 2, 4, 8, 16, 32, 64)
+SCALING_W_LIST = (1.0, 2.0, 4.0)
+SCALING_MESH_LIST = ("5x5", "adaptive")		# FastHenry filaments per segment
+SCALING_MAX_LENGTH_LIST = (None, 10.0, 2.5)	# um, max_length of the segment subdivision, None : drawn segments
+SCALING_FREQ = (2.0e9, 3.0e9)			# Hz, LC-Oscillator band : skin depth of the adaptive mesh
+SCALING_R = 20.0
+SCALING_S = 2.0
+SCALING_REPEAT = 3
+SCALING_THRESHOLD = 0.25			# Regression : slower / bigger than the baseline by this ratio
+SCALING_VERSION = 1
+
+# Reported stages : geometry is the position model, netlist the HenryNetlist built from it
+SCALING_STAGES = ("geometry", "netlist", "henry_format", "solver", "gds_build", "write")
+
+
+def parseMaxLength(value):
+	# "none" : no subdivision
+	if value.lower() == "none":
+		return None
+	return float(value)
+
+def runDesign(shapeType, N, W, mesh, out_dir, memory=False, max_length=None):
+	# One design through every backend -> (StageProfiler, generator, output files)
+	profiler = StageProfiler(memory=memory)
+	runner = FastHenryRunner(workers=1, solver=StandInSolver())
+	output_files = {}
+	with profiler:
+		with profiler.stage("total"):
+			generator = InductorGenerator(shapeType, SCALING_R, SCALING_S, W, N, METAL_THICKNESS, 20.0, 2.0, out_dir, profiler)
+			with profiler.stage("geometry"):
+				if shapeType == InductorShapeType.spiral or shapeType == InductorShapeType.symmetry:
+					generator.parameters.createLineInductorPositonList()
+					generator.parameters.calCenterPositonList()
+				else:
+					generator.parameters.createPolygonInductorPositonArray()
+			try:
+				output_files["henry"] = generator.generateInductor4henry(runner=runner, freq=SCALING_FREQ, mesh=parseMesh(mesh), max_length=max_length)["inp"]
+			except ValueError:
+				# N=1 : no conductor path between the Taps, the .inp is written but not solved
+				henry_options = generator.getHenryOptions(SCALING_FREQ, parseMesh(mesh), max_length)
+				output_files["henry"] = generator.getFileName(".inp", generator.getHenryFileName(henry_options))
+			output_files["gds"] = generator.generateInductor4gds()
+	return (profiler, generator, output_files)
+
+def benchmarkDesign(shapeType, N, W, mesh, out_dir, repeat=SCALING_REPEAT, max_length=None):
+	# Fastest of the timed runs, peak memory of one extra tracemalloc run
+	# segments : written to the .inp after the subdivision, netlist_segments : drawn in the HenryNetlist
+	stage_Dict = {}
+	for i in range(repeat):
+		profiler, generator, output_files = runDesign(shapeType, N, W, mesh, out_dir, max_length=max_length)
+		for stage, total in profiler.getTotals().items():
+			if stage not in stage_Dict or total["wall"] < stage_Dict[stage]:
+				stage_Dict[stage] = total["wall"]
+	profiler, generator, output_files = runDesign(shapeType, N, W, mesh, out_dir, memory=True, max_length=max_length)
+	netlist = generator.henry_netlist
+	henry_format = [record for record in profiler.stage_List if record["stage"] == "henry_format"][0]
+	total = stage_Dict["total"]
+	return {
+		"shape": shapeType.name,
+		"N": N,
+		"W": W,
+		"mesh": mesh,
+		"max_length": max_length,
+		"nodes": len(netlist.node_ids),
+		"netlist_segments": len(netlist.seg_H),
+		"segments": henry_format["segments"],
+		"filaments": henry_format["filaments"],
+		"stages": dict((stage, stage_Dict.get(stage, 0.0)) for stage in SCALING_STAGES),
+		"total": total,
+		"designs_per_sec": 1.0 / total if total > 0.0 else 0.0,
+		"segments_per_sec": henry_format["segments"] / total if total > 0.0 else 0.0,
+		"peak": profiler.getTotals()["total"]["peak"],
+		"bytes": dict((output, os.path.getsize(file_name)) for output, file_name in output_files.items()),
+	}
+
+def runScaling(shape_List=SCALING_SHAPES, N_List=SCALING_N_LIST, W_List=SCALING_W_LIST, mesh_List=SCALING_MESH_LIST, repeat=SCALING_REPEAT,
+		max_length_List=SCALING_MAX_LENGTH_LIST):
+	row_List = []
+	with tempfile.TemporaryDirectory(prefix="inductor_scaling_") as out_dir:
+		for shape in shape_List:
+			for N in N_List:
+				for W in W_List:
+					for mesh in mesh_List:
+						for max_length in max_length_List:
+							row_List.append(benchmarkDesign(InductorShapeType[shape], N, W, mesh, out_dir, repeat, max_length))
+	return {
+		"version": SCALING_VERSION,
+		"python": platform.python_version(),
+		"platform": platform.platform(),
+		"time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+		"config": {"R": SCALING_R, "S": SCALING_S, "freq": SCALING_FREQ, "repeat": repeat},
+		"results": row_List,
+	}
+
+def getRowKey(row):
+	return (row["shape"], row["N"], row["W"], row.get("mesh"), row.get("max_length"))
+
+def compareBaseline(baseline, current, threshold=SCALING_THRESHOLD):
+	# [(shape, N, W, mesh, max_length, metric, baseline, current)] of every metric worse than the baseline by threshold
+	baseline_Dict = dict((getRowKey(row), row) for row in baseline["results"])
+	regression_List = []
+	for row in current["results"]:
+		base = baseline_Dict.get(getRowKey(row))
+		if base is None:
+			continue
+		metric_List = [("total", base["total"], row["total"]), ("peak", base["peak"], row["peak"])]
+		metric_List = metric_List + [("bytes." + output, base["bytes"][output], row["bytes"][output]) for output in row["bytes"] if output in base["bytes"]]
+		for metric, base_value, value in metric_List:
+			if base_value > 0 and value > base_value * (1.0 + threshold):
+				regression_List.append(getRowKey(row) + (metric, base_value, value))
+	return regression_List
+
+
+
+def main(argv=None):
+	parser = argparse.ArgumentParser(description="Scaling benchmark of Inductor Generator with turn count, wire width, FastHenry mesh and segment subdivision")
+	parser.add_argument("--shape", default=",".join(SCALING_SHAPES), help=",".join(shapeType.name for shapeType in InductorShapeType))
+	parser.add_argument("--N", default=",".join(str(N) for N in SCALING_N_LIST), help="number of rolls")
+	parser.add_argument("--W", default=",".join(str(W) for W in SCALING_W_LIST), help="um, wire widths")
+	parser.add_argument("--mesh", default=",".join(SCALING_MESH_LIST), help="FastHenry filaments : NHxNW / adaptive")
+	parser.add_argument("--max-length", default=",".join("none" if value is None else str(value) for value in SCALING_MAX_LENGTH_LIST),
+		help="um, segment subdivision lengths (none : drawn segments)")
+	parser.add_argument("--repeat", type=int, default=SCALING_REPEAT, help="timed runs per design (fastest is reported)")
+	parser.add_argument("--output", default=None, help="write the results as a JSON baseline")
+	parser.add_argument("--baseline", default=None, help="JSON baseline to compare against")
+	parser.add_argument("--threshold", type=float, default=SCALING_THRESHOLD, help="relative regression of time / memory / size")
+	args = parser.parse_args(argv)
+
+	current = runScaling(args.shape.split(","), [int(N) for N in args.N.split(",")], [float(W) for W in args.W.split(",")],
+		args.mesh.split(","), args.repeat, [parseMaxLength(value) for value in args.max_length.split(",")])
+
+	print("%-9s %3s %5s %-8s %6s %6s %7s %9s %9s %9s %9s %9s %9s %10s %9s %9s" % ("shape", "N", "W", "mesh", "split", "segs", "fils", "geom ms", "netl ms",
+		"text ms", "solve ms", "gds ms", "total ms", "segs/sec", "peak KiB", "gds B"))
+	for row in current["results"]:
+		stages = row["stages"]
+		print("%-9s %3d %5.2f %-8s %6s %6d %7d %9.3f %9.3f %9.3f %9.3f %9.3f %9.3f %10.0f %9.1f %9d" % (row["shape"], row["N"], row["W"], row["mesh"],
+			"-" if row["max_length"] is None else "%g" % row["max_length"], row["segments"], row["filaments"], stages["geometry"] * 1e3, stages["netlist"] * 1e3, stages["henry_format"] * 1e3, stages["solver"] * 1e3,
+			stages["gds_build"] * 1e3, row["total"] * 1e3, row["segments_per_sec"], row["peak"] / 1024.0, row["bytes"]["gds"]))
+
+	if args.output is not None:
+		with open(args.output, 'w') as f:
+			json.dump(current, f, indent=1)
+	if args.baseline is not None:
+		with open(args.baseline) as f:
+			baseline = json.load(f)
+		regression_List = compareBaseline(baseline, current, args.threshold)
+		for shape, N, W, mesh, max_length, metric, base_value, value in regression_List:
+			print("regression: %s N=%d W=%g mesh=%s max_length=%s %s %g -> %g" % (shape, N, W, mesh, max_length, metric, base_value, value), file=sys.stderr)
+		if len(regression_List) > 0:
+			return 1
+	return 0
+
+
+
+if __name__ == '__main__':
+	sys.exit(main())
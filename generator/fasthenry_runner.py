@@ -0,0 +1,237 @@
+#!/bin/python3
+# FastHenry Runner for Inductor Generator.
+# Runs fasthenry on generated .inp files and parses Zc.mat into R, L, Q.
+
+import concurrent.futures
+import os
+import re
+import shutil
+import subprocess
+import tempfile
+
+import numpy as np
+
+from inductor_generator import MU_0
+
+
+FASTHENRY_BINARY = "fasthenry"
+FASTHENRY_ZC_MAT = "Zc.mat"
+
+ZC_FREQ_RE = re.compile(r"Impedance matrix for frequency\s*=\s*(\S+)\s+(\d+)\s*x\s*(\d+)")
+ZC_VALUE_RE = re.compile(r"([-+]?\d*\.?\d+(?:[eE][-+]?\d+)?)\s*([-+])\s*(\d*\.?\d+(?:[eE][-+]?\d+)?)\s*j")
+INP_UNITS = {"km": 1e3, "m": 1.0, "cm": 1e-2, "mm": 1e-3, "um": 1e-6, "in": 2.54e-2, "mils": 2.54e-5}
+
+
+def parseZcMat(stream):
+	# Zc.mat stream -> (freq[F], Z[F, P, P] complex)
+	freq_List = []
+	Z_List = []
+	values = []
+	size = 0
+	for line in stream:
+		match = ZC_FREQ_RE.search(line)
+		if match:
+			freq_List.append(float(match.group(1)))
+			size = int(match.group(2))
+			values = []
+			continue
+		for real, sign, imag in ZC_VALUE_RE.findall(line):
+			values.append(complex(float(real), float(imag) if sign == "+" else -float(imag)))
+		if size and len(values) == size * size:
+			Z_List.append(np.array(values).reshape(size, size))
+			values = []
+			size = 0
+	if len(Z_List) != len(freq_List):
+		raise ValueError("Incomplete impedance matrix in " + FASTHENRY_ZC_MAT)
+	if len(Z_List) == 0:
+		return (np.zeros(0), np.zeros((0, 1, 1), dtype=complex))
+	return (np.array(freq_List), np.array(Z_List))
+
+def writeZcMat(stream, freq, Z):
+	for f, Z_f in zip(freq, Z):
+		stream.write("Impedance matrix for frequency = %.10g %d x %d\n" % (f, Z_f.shape[0], Z_f.shape[1]))
+		for row in Z_f:
+			stream.write("".join(["  %.10g %+.10gj" % (z.real, z.imag) for z in row]) + "\n")
+	return
+
+def getImpedanceResults(freq, Z, port=0):
+	Z_port = Z[:, port, port]
+	R = Z_port.real
+	L = Z_port.imag / (2.0 * np.pi * freq)
+	with np.errstate(divide="ignore", invalid="ignore"):
+		Q = Z_port.imag / R
+	return {"freq": freq, "R": R, "L": L, "Q": Q, "Z": Z}
+
+
+def readHenryInp(file_name):
+	# .inp -> nodes {name: xyz}, segments [(n1, n2, H, W, rho)], externals [(n1, n2)], freq (fmin, fmax, ndec), unit scale
+	nodes = {}
+	segments = []
+	externals = []
+	freq = None
+	unit = 1.0
+	default = {"sigma": None, "rho": None}
+	with open(file_name) as f:
+		for line in f:
+			tokens = line.split()
+			if len(tokens) == 0 or tokens[0].startswith("*"):
+				continue
+			keyword = tokens[0].lower()
+			values = dict(token.lower().split("=", 1) for token in tokens[1:] if "=" in token)
+			if keyword == ".units":
+				unit = INP_UNITS[tokens[1].lower()]
+			elif keyword == ".default":
+				for key in default:
+					if key in values:
+						default[key] = float(values[key])
+			elif keyword == ".external":
+				if len(tokens) < 3:
+					raise ValueError("Incomplete .external in " + file_name)
+				externals.append((tokens[1], tokens[2]))
+			elif keyword == ".freq":
+				freq = (float(values["fmin"]), float(values["fmax"]), float(values.get("ndec", 1)))
+			elif keyword[0] == "n":
+				nodes[tokens[0]] = (float(values["x"]), float(values["y"]), float(values["z"]))
+			elif keyword[0] == "e":
+				if "rho" in values:
+					rho = float(values["rho"])
+				elif "sigma" in values:
+					rho = 1.0 / float(values["sigma"])
+				elif default["rho"] is not None:
+					rho = default["rho"]
+				else:
+					rho = 1.0 / default["sigma"]
+				segments.append((tokens[1], tokens[2], float(values["h"]), float(values["w"]), rho))
+	return (nodes, segments, externals, freq, unit)
+
+def getFrequencyList(fmin, fmax, ndec):
+	if fmin <= 0.0:
+		fmin = fmax
+	if fmax <= fmin:
+		return np.array([fmin])
+	decades = np.log10(fmax) - np.log10(fmin)
+	return np.logspace(np.log10(fmin), np.log10(fmax), int(round(decades * ndec)) + 1)
+
+def splitFrequencyBands(fmin, fmax, ndec, bands):
+	# .freq range -> [(fmin, fmax, ndec)] of up to bands sub-bands, together on the same frequency points
+	freq_List = getFrequencyList(float(fmin), float(fmax), float(ndec))
+	return [(float(chunk[0]), float(chunk[-1]), ndec) for chunk in np.array_split(freq_List, max(1, min(int(bands), len(freq_List))))]
+
+def mergeResults(results_List):
+	# Results of sub-band runs -> one frequency sorted result, the later band wins on a shared frequency
+	# "inp" : .inp of every band, "band" : index into "inp" of the band solving every frequency
+	merged = {"inp": [results["inp"] for results in results_List]}
+	freq = np.concatenate([results["freq"] for results in results_List])
+	order = np.argsort(freq, kind="stable")
+	last = np.append(freq[order][1:] != freq[order][:-1], True)
+	merged["band"] = np.concatenate([np.full(len(results["freq"]), i) for i, results in enumerate(results_List)])[order][last]
+	for key in ("freq", "R", "L", "Q", "Z"):
+		merged[key] = np.concatenate([results[key] for results in results_List])[order][last]
+	return merged
+
+def findPortPath(segments, node_start, node_end):
+	# Segment indexes and directions (+1 / -1) from node_start to node_end (BFS)
+	neighbor_Dict = {}
+	for index, (n1, n2, H, W, rho) in enumerate(segments):
+		neighbor_Dict.setdefault(n1, []).append((n2, index, 1.0))
+		neighbor_Dict.setdefault(n2, []).append((n1, index, -1.0))
+	previous = {node_start: None}
+	queue = [node_start]
+	for node in queue:
+		if node == node_end:
+			break
+		for next_node, index, direction in neighbor_Dict.get(node, []):
+			if next_node not in previous:
+				previous[next_node] = (node, index, direction)
+				queue.append(next_node)
+	if node_end not in previous:
+		raise ValueError("No conductor path between " + node_start + " and " + node_end)
+	path = []
+	node = node_end
+	while previous[node] is not None:
+		node, index, direction = previous[node]
+		path.append((index, direction))
+	path.reverse()
+	return path
+
+
+
+def runFastHenryBinary(inp_file, work_dir, binary=FASTHENRY_BINARY, timeout=None):
+	subprocess.run([binary, os.path.abspath(inp_file)], cwd=work_dir, check=True,
+		stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, timeout=timeout)
+	return os.path.join(work_dir, FASTHENRY_ZC_MAT)
+
+class StandInSolver():
+	# Stand-in for the fasthenry binary : DC resistance and self inductance of the port path
+	def __call__(self, inp_file, work_dir):
+		nodes, segments, externals, freq, unit = readHenryInp(inp_file)
+		freq_List = getFrequencyList(*freq) if freq is not None else np.array([1.0])
+		Z = np.zeros((len(freq_List), len(externals), len(externals)), dtype=complex)
+		for port, (node_start, node_end) in enumerate(externals):
+			R = 0.0
+			L = 0.0
+			for index, direction in findPortPath(segments, node_start, node_end):
+				n1, n2, H, W, rho = segments[index]
+				length = np.linalg.norm(np.subtract(nodes[n2], nodes[n1]))
+				R = R + rho * length / (H * W)
+				L = L + self.calBarInductance(length * unit, W * unit, H * unit)
+			Z[:, port, port] = R + 2j * np.pi * freq_List * L
+		zc_file = os.path.join(work_dir, FASTHENRY_ZC_MAT)
+		with open(zc_file, 'w') as f:
+			writeZcMat(f, freq_List, Z)
+		return zc_file
+
+	def calBarInductance(self, length, W, H):
+		# Grover : self inductance of a straight rectangular bar (m -> H)
+		if length <= 0.0:
+			return 0.0
+		return MU_0 / (2.0 * np.pi) * length * (np.log(2.0 * length / (W + H)) + 0.5 + 0.2235 * (W + H) / length)
+
+
+
+class FastHenryRunner():
+	def __init__(self, binary=FASTHENRY_BINARY, workers=None, solver=None, timeout=None, keep_dir=False):
+		self.binary = binary
+		self.workers = workers or os.cpu_count() or 1
+		self.solver = solver		# solver(inp_file, work_dir) -> Zc.mat path, None : fasthenry binary
+		self.timeout = timeout
+		self.keep_dir = keep_dir
+		self.pool = None
+
+	def isAvailable(self):
+		return self.solver is not None or shutil.which(self.binary) is not None
+
+	def run(self, inp_file, port=0):
+		work_dir = tempfile.mkdtemp(prefix="fasthenry_")
+		try:
+			if self.solver is not None:
+				zc_file = self.solver(inp_file, work_dir)
+			else:
+				zc_file = runFastHenryBinary(inp_file, work_dir, self.binary, self.timeout)
+			with open(zc_file) as f:
+				freq, Z = parseZcMat(f)
+		finally:
+			if not self.keep_dir:
+				shutil.rmtree(work_dir, ignore_errors=True)
+		results = getImpedanceResults(freq, Z, port)
+		results["inp"] = inp_file
+		return results
+
+	def submit(self, inp_file, port=0):
+		if self.pool is None:
+			self.pool = concurrent.futures.ThreadPoolExecutor(max_workers=self.workers)
+		return self.pool.submit(self.run, inp_file, port)
+
+	def runMany(self, inp_files, port=0):
+		futures = [self.submit(inp_file, port) for inp_file in inp_files]
+		return [future.result() for future in futures]
+
+	def runBands(self, inp_files, port=0):
+		# .inp of every sub-band in parallel -> one merged result
+		return mergeResults(self.runMany(inp_files, port))
+
+	def close(self):
+		if self.pool is not None:
+			self.pool.shutdown()
+			self.pool = None
+		return
@@ -0,0 +1,151 @@
+#!/bin/python3
+# Streaming GDSII writer for Inductor Generator.
+# Records go straight to the file handle as the geometry is produced : no library in memory, no global state.
+
+import datetime
+import struct
+
+
+GDS_UNIT = 1.0e-6				# m, user unit (um)
+GDS_PRECISION = 1.0e-9				# m, database unit
+
+# Record type, data type
+HEADER = 0x0002
+BGNLIB = 0x0102
+LIBNAME = 0x0206
+UNITS = 0x0305
+ENDLIB = 0x0400
+BGNSTR = 0x0502
+STRNAME = 0x0606
+ENDSTR = 0x0700
+BOUNDARY = 0x0800
+PATH = 0x0900
+SREF = 0x0A00
+AREF = 0x0B00
+LAYER = 0x0D02
+DATATYPE = 0x0E02
+WIDTH = 0x0F03
+XY = 0x1003
+ENDEL = 0x1100
+SNAME = 0x1206
+COLROW = 0x1302
+PATHTYPE = 0x2102
+
+
+def packReal8(value):
+	# GDSII excess-64 base-16 real
+	if value == 0:
+		return b"\x00" * 8
+	sign = 0x80 if value < 0 else 0x00
+	value = abs(value)
+	exponent = 64
+	while value >= 1.0:
+		value = value / 16.0
+		exponent = exponent + 1
+	while value < 1.0 / 16.0:
+		value = value * 16.0
+		exponent = exponent - 1
+	mantissa = int(round(value * 2**56))
+	if mantissa >= 2**56:
+		mantissa = mantissa >> 4
+		exponent = exponent + 1
+	return struct.pack(">Q", ((sign | exponent) << 56) | mantissa)
+
+def packString(text):
+	data = text.encode("ascii")
+	if len(data) % 2:
+		data = data + b"\x00"
+	return data
+
+def packRecord(record, data=b""):
+	return struct.pack(">HH", len(data) + 4, record) + data
+
+def packTimestamp(timestamp):
+	return struct.pack(">6h", timestamp.year, timestamp.month, timestamp.day, timestamp.hour, timestamp.minute, timestamp.second)
+
+
+
+class GdsStreamWriter():
+	def __init__(self, stream, lib_name="library", unit=GDS_UNIT, precision=GDS_PRECISION, timestamp=None):
+		self.stream = stream
+		self.scale = unit / precision		# user unit -> database unit
+		self.cell_name = None
+
+		if timestamp is None:
+			timestamp = datetime.datetime.today()
+		self.writeRecord(HEADER, struct.pack(">h", 600))
+		self.writeRecord(BGNLIB, packTimestamp(timestamp) * 2)
+		self.writeRecord(LIBNAME, packString(lib_name))
+		self.writeRecord(UNITS, packReal8(precision / unit) + packReal8(precision))
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, exc_type, exc_value, traceback):
+		if exc_type is None:
+			self.close()
+		return False
+
+
+	def writeRecord(self, record, data=b""):
+		self.stream.write(packRecord(record, data))
+		return
+
+	def packXY(self, points):
+		scale = self.scale
+		values = [int(round(value * scale)) for point in points for value in point[0:2]]
+		return struct.pack(">%di" % len(values), *values)
+
+	def packLayer(self, layer, datatype):
+		return packRecord(LAYER, struct.pack(">h", layer)) + packRecord(DATATYPE, struct.pack(">h", datatype))
+
+
+	def beginCell(self, name, timestamp=None):
+		if self.cell_name is not None:
+			raise ValueError("Cell " + self.cell_name + " is not ended")
+		if timestamp is None:
+			timestamp = datetime.datetime.today()
+		self.cell_name = name
+		self.writeRecord(BGNSTR, packTimestamp(timestamp) * 2)
+		self.writeRecord(STRNAME, packString(name))
+		return
+
+	def endCell(self):
+		self.writeRecord(ENDSTR)
+		self.cell_name = None
+		return
+
+	def addBoundary(self, points, layer=0, datatype=0):
+		# One write per element
+		points = list(points)
+		self.stream.write(b"".join((packRecord(BOUNDARY), self.packLayer(layer, datatype),
+			packRecord(XY, self.packXY(points + points[:1])), packRecord(ENDEL))))
+		return
+
+	def addRectangle(self, point_1, point_2, layer=0, datatype=0):
+		self.addBoundary(((point_1[0], point_1[1]), (point_1[0], point_2[1]), (point_2[0], point_2[1]), (point_2[0], point_1[1])), layer, datatype)
+		return
+
+	def addPath(self, points, width, layer=0, datatype=0, pathtype=0):
+		# pathtype 0 : flush ends (gdspy.FlexPath default)
+		self.stream.write(b"".join((packRecord(PATH), self.packLayer(layer, datatype),
+			packRecord(PATHTYPE, struct.pack(">h", pathtype)), packRecord(WIDTH, struct.pack(">i", int(round(width * self.scale)))),
+			packRecord(XY, self.packXY(points)), packRecord(ENDEL))))
+		return
+
+	def addCellReference(self, name, origin=(0, 0)):
+		self.stream.write(b"".join((packRecord(SREF), packRecord(SNAME, packString(name)),
+			packRecord(XY, self.packXY([origin])), packRecord(ENDEL))))
+		return
+
+	def addCellArray(self, name, columns, rows, spacing, origin=(0, 0)):
+		self.stream.write(b"".join((packRecord(AREF), packRecord(SNAME, packString(name)), packRecord(COLROW, struct.pack(">2h", columns, rows)),
+			packRecord(XY, self.packXY([origin, (origin[0] + columns * spacing[0], origin[1]), (origin[0], origin[1] + rows * spacing[1])])),
+			packRecord(ENDEL))))
+		return
+
+	def close(self):
+		if self.cell_name is not None:
+			self.endCell()
+		self.writeRecord(ENDLIB)
+		return
@@ -0,0 +1,45 @@
+#!/bin/python3
+# Shared command line arguments of Inductor Generator : design options, .freq and mesh strings
+# Used by inductor_cli and by the modules with their own main (inductor_corners, benchmark_scaling)
+
+from inductor_generator import InductorGenerator, InductorShapeType, METAL_THICKNESS, HENRY_MESHES
+
+
+ARGS_DESIGN_DEFAULTS = {
+	"shape": "spiral",
+	"R": 20.0,			# InnerR
+	"S": 2.0,			# Wire2Wire Space
+	"W": 2.0,			# Wire Width
+	"N": 4,				# Number of rolls
+	"T": METAL_THICKNESS,		# um Thickness
+	"GuardRing_S": 20.0,		# Guard Ring to Inductor Space
+	"GuardRing_W": 2.0,		# Guard Ring Wire Width
+}
+
+
+def addDesignArguments(parser):
+	parser.add_argument("--shape", default=ARGS_DESIGN_DEFAULTS["shape"], choices=[shapeType.name for shapeType in InductorShapeType], help="inductor shape")
+	parser.add_argument("-R", type=float, default=ARGS_DESIGN_DEFAULTS["R"], help="um, inner R")
+	parser.add_argument("-S", type=float, default=ARGS_DESIGN_DEFAULTS["S"], help="um, wire to wire space")
+	parser.add_argument("-W", type=float, default=ARGS_DESIGN_DEFAULTS["W"], help="um, wire width")
+	parser.add_argument("-N", type=int, default=ARGS_DESIGN_DEFAULTS["N"], help="number of rolls")
+	parser.add_argument("-T", type=float, default=ARGS_DESIGN_DEFAULTS["T"], help="um, metal thickness")
+	parser.add_argument("--guardring-s", type=float, default=ARGS_DESIGN_DEFAULTS["GuardRing_S"], help="um, guard ring to inductor space")
+	parser.add_argument("--guardring-w", type=float, default=ARGS_DESIGN_DEFAULTS["GuardRing_W"], help="um, guard ring wire width")
+	return parser
+
+def createDesignGenerator(args, out_dir=None, profiler=None):
+	return InductorGenerator(InductorShapeType[args.shape], args.R, args.S, args.W, args.N, args.T, args.guardring_s, args.guardring_w, out_dir, profiler)
+
+def parseFreq(freq):
+	# "fmin,fmax[,ndec]" -> tuple of the .freq strings
+	if freq is None:
+		return None
+	return tuple(freq.split(","))
+
+def parseMesh(mesh):
+	# "adaptive" / "NHxNW"
+	if mesh is None or mesh in HENRY_MESHES:
+		return mesh
+	nhinc, nwinc = mesh.lower().split("x")
+	return (int(nhinc), int(nwinc))
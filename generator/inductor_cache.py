@@ -0,0 +1,263 @@
+#!/bin/python3
+# On-disk result cache of Inductor Generator.
+# Key : InductorGenerator.calDesignKey() (params, shape, layers, freq range)
+# Entry : <root>/<key[:2]>/<key>/ inductor.gds, inductor.inp, inductor.lef, inductor.json, results.json
+# Workers share the root : entries are used under a shared flock of <root>/.lock, evicted under the exclusive one
+# <root>/.bytes : total of the whole root over every worker, eviction rescans the root for sizes and access times
+
+import contextlib
+import fcntl
+import json
+import os
+import shutil
+import time
+
+
+CACHE_MAX_BYTES = 1024 * 1024 * 1024		# 1GB
+CACHE_FILE_NAME = "inductor"
+CACHE_RESULTS_NAME = "results.json"
+CACHE_OUTPUT_EXT = {"gds": ".gds", "henry": ".inp", "lef": ".lef", "json": ".json"}	# every INDUCTOR_OUTPUTS
+CACHE_LOCK_NAME = ".lock"
+CACHE_BYTES_NAME = ".bytes"
+CACHE_EVICT_RATIO = 0.9		# eviction frees down to this share of max_bytes, the next writes skip the rescan
+
+
+def toJsonValue(value):
+	# numpy arrays / scalars of extracted results
+	if hasattr(value, "tolist"):
+		return value.tolist()
+	if isinstance(value, dict):
+		return {k: toJsonValue(v) for k, v in value.items()}
+	if isinstance(value, (list, tuple)):
+		return [toJsonValue(v) for v in value]
+	return value
+
+
+
+class InductorCache():
+	def __init__(self, root, max_bytes=CACHE_MAX_BYTES):
+		self.root = root
+		self.max_bytes = max_bytes
+
+		self.hits = 0
+		self.misses = 0
+		self.evictions = 0
+
+		self.entry_Dict = {}		# key : [bytes, last access] of the last scan and this worker's writes
+		self.total_bytes = 0		# bytes of the whole root, as of the last shared total
+
+		os.makedirs(self.root, exist_ok=True)
+		self.scanEntries()
+		self.evict(rescan=True)
+
+
+	@contextlib.contextmanager
+	def lockEntries(self, exclusive=False):
+		# Never take the exclusive lock while this process holds the shared one (evict after the entry operation)
+		with open(os.path.join(self.root, CACHE_LOCK_NAME), 'a') as f:
+			fcntl.flock(f, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+			try:
+				yield
+			finally:
+				fcntl.flock(f, fcntl.LOCK_UN)
+
+	def updateSharedBytes(self, delta=0, total=None):
+		# <root>/.bytes += delta (or = total) -> shared total, read-modify-write under its own flock
+		fd = os.open(os.path.join(self.root, CACHE_BYTES_NAME), os.O_RDWR | os.O_CREAT)
+		try:
+			fcntl.flock(fd, fcntl.LOCK_EX)
+			if total is None:
+				text = os.pread(fd, 64, 0).strip()
+				total = (int(text) if text else 0) + delta
+			os.ftruncate(fd, 0)
+			os.pwrite(fd, b"%d" % total, 0)
+		finally:
+			os.close(fd)
+		self.total_bytes = total
+		return total
+
+	def getEntryDir(self, key):
+		return os.path.join(self.root, key[:2], key)
+
+	def calEntryBytes(self, entry_dir):
+		entry_bytes = 0
+		for entry in os.scandir(entry_dir):
+			# .tmp : being written by a worker generating the same design
+			if entry.is_file() and not entry.name.endswith(".tmp"):
+				entry_bytes = entry_bytes + entry.stat().st_size
+		return entry_bytes
+
+	def scanEntries(self):
+		with self.lockEntries():
+			self.readEntries()
+		return
+
+	def readEntries(self):
+		# Every entry of the root with its size and last access (entry directory mtime, set by every worker)
+		self.entry_Dict = {}
+		self.total_bytes = 0
+		for prefix in os.scandir(self.root):
+			if not prefix.is_dir():
+				continue
+			for entry in os.scandir(prefix.path):
+				if not entry.is_dir():
+					continue
+				entry_bytes = self.calEntryBytes(entry.path)
+				self.entry_Dict[entry.name] = [entry_bytes, entry.stat().st_mtime]
+				self.total_bytes = self.total_bytes + entry_bytes
+		return
+
+	def updateEntry(self, key):
+		entry_dir = self.getEntryDir(key)
+		now = time.time()
+		os.utime(entry_dir, (now, now))		# LRU order survives restarts
+		entry_bytes = self.calEntryBytes(entry_dir)
+		old_bytes = self.entry_Dict.get(key, [0, 0.0])[0]
+		self.entry_Dict[key] = [entry_bytes, now]
+		if entry_bytes != old_bytes:
+			self.updateSharedBytes(entry_bytes - old_bytes)
+		return
+
+
+	def get(self, key, outputs=()):
+		# {"gds": path, "henry": path, "lef": path, "json": path, "results": dict} or None
+		with self.lockEntries():
+			return self.getEntry(key, outputs)
+
+	def getEntry(self, key, outputs=()):
+		entry_dir = self.getEntryDir(key)
+		if not os.path.isdir(entry_dir):
+			self.misses = self.misses + 1
+			return None
+
+		entry = {}
+		for output, ext in CACHE_OUTPUT_EXT.items():
+			file_name = os.path.join(entry_dir, CACHE_FILE_NAME + ext)
+			if os.path.exists(file_name):
+				entry[output] = file_name
+		results_file_name = os.path.join(entry_dir, CACHE_RESULTS_NAME)
+		if os.path.exists(results_file_name):
+			with open(results_file_name) as f:
+				entry["results"] = json.load(f)
+
+		for output in outputs:
+			if output not in entry:
+				self.misses = self.misses + 1
+				return None
+
+		self.hits = self.hits + 1
+		self.updateEntry(key)
+		return entry
+
+	def putFile(self, key, output, file_name):
+		entry_dir = self.getEntryDir(key)
+		with self.lockEntries():
+			os.makedirs(entry_dir, exist_ok=True)
+			cache_file_name = os.path.join(entry_dir, CACHE_FILE_NAME + CACHE_OUTPUT_EXT[output])
+			tmp_file_name = cache_file_name + ".%d.tmp" % os.getpid()
+			shutil.copyfile(file_name, tmp_file_name)
+			os.replace(tmp_file_name, cache_file_name)
+			self.updateEntry(key)
+		self.evict(keep=key)
+		return cache_file_name
+
+	def putResults(self, key, results):
+		with self.lockEntries():
+			merged = self.writeResults(key, results)
+		self.evict(keep=key)
+		return merged
+
+	def writeResults(self, key, results):
+		entry_dir = self.getEntryDir(key)
+		os.makedirs(entry_dir, exist_ok=True)
+		results_file_name = os.path.join(entry_dir, CACHE_RESULTS_NAME)
+		merged = {}
+		if os.path.exists(results_file_name):
+			with open(results_file_name) as f:
+				merged = json.load(f)
+		merged.update(toJsonValue(results))
+		tmp_file_name = results_file_name + ".%d.tmp" % os.getpid()
+		with open(tmp_file_name, 'w') as f:
+			json.dump(merged, f, sort_keys=True)
+		os.replace(tmp_file_name, results_file_name)
+		self.updateEntry(key)
+		return merged
+
+	def generate(self, generator, outputs=("henry", "gds"), results_func=None):
+		# Cached InductorGenerator outputs, generated into the entry on a miss
+		key = generator.calDesignKey()
+		required = tuple(outputs) + (("results",) if results_func is not None else ())
+		with self.lockEntries():
+			entry = self.getEntry(key, required)
+			if entry is not None:
+				return entry
+
+			entry_dir = self.getEntryDir(key)
+			os.makedirs(entry_dir, exist_ok=True)
+			out_dir = generator.out_dir
+			generator.out_dir = entry_dir
+			try:
+				generator.generateInductor(outputs, CACHE_FILE_NAME, skip_existing=True)
+			finally:
+				generator.out_dir = out_dir
+			if results_func is not None:
+				self.writeResults(key, results_func(generator))
+			self.updateEntry(key)
+
+			entry = {}
+			for output in outputs:
+				entry[output] = os.path.join(entry_dir, CACHE_FILE_NAME + CACHE_OUTPUT_EXT[output])
+			results_file_name = os.path.join(entry_dir, CACHE_RESULTS_NAME)
+			if os.path.exists(results_file_name):
+				with open(results_file_name) as f:
+					entry["results"] = json.load(f)
+		self.evict(keep=key)
+		return entry
+
+
+	def evict(self, keep=None, rescan=False):
+		# Least recently used entries of every worker first : the root is rescanned while no other worker is inside an entry
+		if not rescan and self.total_bytes <= self.max_bytes:
+			return
+		with self.lockEntries(exclusive=True):
+			self.readEntries()
+			if self.total_bytes > self.max_bytes:
+				target_bytes = self.max_bytes * CACHE_EVICT_RATIO
+				for key, (entry_bytes, last_access) in sorted(self.entry_Dict.items(), key=lambda item: item[1][1]):
+					if self.total_bytes <= target_bytes:
+						break
+					if key == keep:
+						continue
+					shutil.rmtree(self.getEntryDir(key), ignore_errors=True)
+					del self.entry_Dict[key]
+					self.total_bytes = self.total_bytes - entry_bytes
+					self.evictions = self.evictions + 1
+			self.updateSharedBytes(total=self.total_bytes)
+		return
+
+	def clear(self):
+		with self.lockEntries(exclusive=True):
+			self.readEntries()
+			for key in list(self.entry_Dict.keys()):
+				shutil.rmtree(self.getEntryDir(key), ignore_errors=True)
+			self.readEntries()
+			self.updateSharedBytes(total=self.total_bytes)
+		return
+
+	def getStats(self):
+		lookups = self.hits + self.misses
+		return {
+			"hits": self.hits,
+			"misses": self.misses,
+			"hit_rate": (self.hits / lookups) if lookups else 0.0,
+			"evictions": self.evictions,
+			"entries": len(self.entry_Dict),
+			"bytes": self.total_bytes,
+			"max_bytes": self.max_bytes,
+		}
+
+	def getReport(self):
+		stats = self.getStats()
+		return "cache: %d hits, %d misses (%.1f%%), %d entries, %d / %d bytes, %d evictions" % (
+			stats["hits"], stats["misses"], stats["hit_rate"] * 100.0,
+			stats["entries"], stats["bytes"], stats["max_bytes"], stats["evictions"])
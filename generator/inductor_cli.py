@@ -0,0 +1,165 @@
+#!/bin/python3
+# Command line of Inductor Generator.
+# generate : GDS, FastHenry, LEF and JSON of one design in a single pass
+# sweep / optimize / pareto / corners / extract / results / benchmark
+
+import argparse
+import logging
+import sys
+
+from inductor_generator import INDUCTOR_OUTPUTS
+from inductor_args import addDesignArguments, createDesignGenerator, parseFreq, parseMesh
+
+
+CLI_BENCHMARKS = ("gds", "import", "scaling", "memory")
+CLI_SOLVERS = ("partial", "standin", "fasthenry")
+
+
+def configureLogging(verbose):
+	# Netlist dump of the generators only with --verbose
+	logging.basicConfig(level=logging.DEBUG if verbose else logging.WARNING, format="%(message)s")
+	return
+
+
+
+def runGenerate(args):
+	profiler = None
+	if args.profile is not None:
+		from inductor_profile import StageProfiler
+		profiler = StageProfiler(memory=not args.profile_no_memory)
+	generator = createDesignGenerator(args, args.out_dir, profiler)
+	output_files = generator.generateInductor(args.outputs.split(","), args.file_name, args.skip_existing,
+		args.merge, args.stream, args.via_cell, parseFreq(args.freq), parseMesh(args.mesh), args.max_length)
+	for output, file_name in output_files.items():
+		print(output, file_name)
+	if profiler is not None:
+		profiler.close()
+		profiler.writeReport(args.profile)
+		print(profiler.getReport(), file=sys.stderr)
+	return 0
+
+def runExtract(args):
+	from fasthenry_runner import FastHenryRunner, StandInSolver
+	from partial_inductance import PartialInductanceSolver, extractInductorGenerator
+
+	design_run = args.freq is not None or args.bands > 1
+	if len(args.inp) == 0 and not design_run:
+		generator = createDesignGenerator(args)
+		R, L = extractInductorGenerator(generator)
+		print("%s R=%g L=%g" % (generator.getDefaultFileName(), R, L))
+		return 0
+	if len(args.inp) > 0 and design_run:
+		print("--freq / --bands need the design options instead of .inp files", file=sys.stderr)
+		return 2
+
+	solver = {"partial": PartialInductanceSolver(), "standin": StandInSolver(), "fasthenry": None}[args.solver]
+	runner = FastHenryRunner(workers=args.workers or None, solver=solver)
+	if not runner.isAvailable():
+		print("fasthenry binary not found, use --solver partial", file=sys.stderr)
+		return 1
+	try:
+		if design_run:
+			# Sub-band .inp files of the design solved in parallel, one frequency sorted result
+			generator = createDesignGenerator(args, args.out_dir)
+			results_List = [generator.generateInductorBands4henry(runner, max(1, args.bands), parseFreq(args.freq), parseMesh(args.mesh))]
+		else:
+			results_List = runner.runMany(args.inp)
+		for results in results_List:
+			# Merged bands : every frequency printed with the sub-band .inp solving it
+			inp_List = [results["inp"][band] for band in results["band"]] if "band" in results else [results["inp"]] * len(results["freq"])
+			for inp, freq, R, L, Q in zip(inp_List, results["freq"], results["R"], results["L"], results["Q"]):
+				print("%s freq=%g R=%g L=%g Q=%g" % (inp, freq, R, L, Q))
+	finally:
+		runner.close()
+	return 0
+
+def runSweep(argv):
+	from inductor_sweep import main as sweep_main
+	return sweep_main(argv)
+
+def runOptimize(argv):
+	from inductor_optimizer import main as optimize_main
+	return optimize_main(argv)
+
+def runPareto(argv):
+	from inductor_pareto import main as pareto_main
+	return pareto_main(argv)
+
+def runCorners(argv):
+	from inductor_corners import main as corners_main
+	return corners_main(argv)
+
+def runResults(argv):
+	from inductor_results import main as results_main
+	return results_main(argv)
+
+def runBenchmark(argv):
+	if len(argv) == 0 or argv[0] not in CLI_BENCHMARKS:
+		print("benchmark : " + " / ".join(CLI_BENCHMARKS), file=sys.stderr)
+		return 2
+	if argv[0] == "gds":
+		from benchmark_gds_merge import main as benchmark_main
+	elif argv[0] == "scaling":
+		from benchmark_scaling import main as benchmark_main
+	elif argv[0] == "memory":
+		from benchmark_memory import main as benchmark_main
+	else:
+		from benchmark_import import main as benchmark_main
+	return benchmark_main(argv[1:])
+
+# Subcommands with their own argparse : every argument after the subcommand is theirs
+CLI_PASSTHROUGH = {"sweep": runSweep, "optimize": runOptimize, "pareto": runPareto, "corners": runCorners, "results": runResults, "benchmark": runBenchmark}
+
+
+
+def main(argv=None):
+	if argv is None:
+		argv = sys.argv[1:]
+	if len(argv) > 0 and argv[0] in CLI_PASSTHROUGH:
+		return CLI_PASSTHROUGH[argv[0]](argv[1:])
+
+	parser = argparse.ArgumentParser(description="Inductor Generator for FastHenry & GDS")
+	subparsers = parser.add_subparsers(dest="command", required=True)
+
+	generate_parser = addDesignArguments(subparsers.add_parser("generate", help="GDS / FastHenry / LEF / JSON of one design"))
+	generate_parser.add_argument("--outputs", default=",".join(INDUCTOR_OUTPUTS), help=",".join(INDUCTOR_OUTPUTS))
+	generate_parser.add_argument("--out-dir", default=None, help="output directory")
+	generate_parser.add_argument("--file-name", default=None, help="output file name without extension (default : design hash)")
+	generate_parser.add_argument("--skip-existing", action="store_true", help="keep output files that already exist")
+	generate_parser.add_argument("--merge", action="store_true", help="GDS : one merged polygon per layer")
+	generate_parser.add_argument("--stream", action="store_true", help="GDS : streaming writer instead of gdspy")
+	generate_parser.add_argument("--via-cell", action="store_true", help="GDS : VIA cell arrays instead of flat via rectangles")
+	generate_parser.add_argument("--freq", default=None, help="Hz, fmin,fmax[,ndec] of the FastHenry .freq")
+	generate_parser.add_argument("--mesh", default=None, help="FastHenry filaments : adaptive (skin depth at fmax) or NHxNW")
+	generate_parser.add_argument("--max-length", type=float, default=None, help="um, split FastHenry segments longer than this")
+	generate_parser.add_argument("--profile", default=None, help="JSON report of wall time, allocations and counts of every stage")
+	generate_parser.add_argument("--profile-no-memory", action="store_true", help="--profile without tracemalloc")
+	generate_parser.add_argument("--verbose", action="store_true", help="log the netlist")
+	generate_parser.set_defaults(func=runGenerate)
+
+	extract_parser = addDesignArguments(subparsers.add_parser("extract", help="R, L, Q of .inp files (or of the design options)"))
+	extract_parser.add_argument("inp", nargs="*", help="FastHenry .inp files")
+	extract_parser.add_argument("--solver", default="partial", choices=CLI_SOLVERS, help="partial inductance / stand-in / fasthenry binary")
+	extract_parser.add_argument("--workers", type=int, default=0, help="parallel solver runs (0 : every core)")
+	extract_parser.add_argument("--freq", default=None, help="Hz, fmin,fmax[,ndec] : solve the design options over this range")
+	extract_parser.add_argument("--bands", type=int, default=1, help="split the design --freq range into sub-bands solved in parallel")
+	extract_parser.add_argument("--mesh", default=None, help="FastHenry filaments : adaptive (skin depth at every band fmax) or NHxNW")
+	extract_parser.add_argument("--out-dir", default=None, help="directory of the sub-band .inp files")
+	extract_parser.add_argument("--verbose", action="store_true", help="log the netlist")
+	extract_parser.set_defaults(func=runExtract)
+
+	subparsers.add_parser("sweep", help="batch sweep (inductor_sweep options)")
+	subparsers.add_parser("optimize", help="target driven synthesis (inductor_optimizer options)")
+	subparsers.add_parser("pareto", help="L / Q / footprint Pareto front (inductor_pareto options)")
+	subparsers.add_parser("corners", help="process corners / Monte Carlo of T, sheet resistance and W / S bias (inductor_corners options)")
+	subparsers.add_parser("results", help="query the SQLite result store (inductor_results options)")
+	subparsers.add_parser("benchmark", help="gds : GDS output modes, import : startup time, scaling : turn count / width scaling, memory : bytes per candidate")
+
+	args = parser.parse_args(argv)
+	configureLogging(args.verbose)
+	return args.func(args)
+
+
+
+if __name__ == '__main__':
+	sys.exit(main())
@@ -0,0 +1,255 @@
+#!/bin/python3
+# Process Corner & Monte Carlo Analysis of Inductor Generator.
+# Perturbed per sample around the nominal values : metal thickness T (METAL_THICKNESS), sheet resistance (RHO_STR) and the W / S etch bias
+# estimate : every sample in one vectorized inductor_estimator call, no geometry at all
+# partial : partial inductance solver in parallel, one solve per distinct drawn geometry (bias, T on CORNER_GRID),
+#           the sheet resistance only scales R
+# Both engines : R_dc = rho_sheet*l/W, T only enters R through calSkinFactor
+
+import argparse
+import concurrent.futures
+import itertools
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+from inductor_generator import InductorGenerator, InductorShapeType, METAL_THICKNESS, RHO_STR
+from inductor_estimator import estimateInductor, calSkinFactor, ESTIMATOR_FREQ, ESTIMATOR_MODELS
+from inductor_args import addDesignArguments
+from partial_inductance import extractInductorGenerator
+
+
+CORNER_PARAMS = ("T", "rho", "bias")
+CORNER_SPREAD = {
+	"T": 0.10,			# relative, 3 sigma of the Metal4 thickness
+	"rho": 0.15,			# relative, 3 sigma of the Metal4 sheet resistance
+	"bias": 0.03,			# um, 3 sigma of the W / S etch bias (W + bias, S - bias)
+}
+CORNER_SAMPLES = 1000
+CORNER_GRID = 0.005			# um, Sky130 layout grid : samples whose bias and T round together share one solve
+CORNER_PERCENTILES = (1, 5, 50, 95, 99)
+CORNER_ENGINES = ("estimate", "partial")
+CORNER_OUTPUTS = ("L", "R", "Q")
+CORNER_CHECK_PARAMS = ("T", "rho")	# sensitivities of R and Q both engines must agree on in sign
+
+
+def createCornerSamples(spread=CORNER_SPREAD, T=METAL_THICKNESS):
+	# Full factorial of -3 / 0 / +3 sigma of CORNER_PARAMS -> ({"T", "rho", "bias"} arrays, corner names), nominal first
+	level_List = list(itertools.product((0, -1, 1), repeat=len(CORNER_PARAMS)))
+	levels = np.array(level_List, dtype=np.float64)
+	samples = {
+		"T": T * (1.0 + spread["T"] * levels[:, 0]),
+		"rho": float(RHO_STR) * (1.0 + spread["rho"] * levels[:, 1]),
+		"bias": spread["bias"] * levels[:, 2],
+	}
+	name_List = [" ".join("%s%s" % (param, "-0+"[int(level) + 1]) for param, level in zip(CORNER_PARAMS, levels)) for levels in level_List]
+	return (samples, name_List)
+
+def createMonteCarloSamples(count=CORNER_SAMPLES, spread=CORNER_SPREAD, seed=None, T=METAL_THICKNESS):
+	# Normal samples of CORNER_PARAMS (sigma : spread / 3), nominal first
+	rng = np.random.default_rng(seed)
+	normal = rng.standard_normal((count, len(CORNER_PARAMS)))
+	normal = np.concatenate((np.zeros((1, len(CORNER_PARAMS))), normal))
+	samples = {
+		"T": T * (1.0 + spread["T"] / 3.0 * normal[:, 0]),
+		"rho": float(RHO_STR) * (1.0 + spread["rho"] / 3.0 * normal[:, 1]),
+		"bias": spread["bias"] / 3.0 * normal[:, 2],
+	}
+	return (samples, ["nominal"] + ["mc%d" % i for i in range(count)])
+
+def getBiasedParams(R, S, W, bias):
+	# Wires grow by bias around the same center lines (calNumNPositonArray) : the inner R and the space shrink by bias
+	return (R - bias, S - bias, W + bias)
+
+def estimateSamples(shapeType, R, S, W, N, samples, freq=ESTIMATOR_FREQ, model="monomial"):
+	# {"L", "R", "Q"} arrays of every sample in one call
+	R_b, S_b, W_b = getBiasedParams(R, S, W, samples["bias"])
+	estimate = estimateInductor(R_b, S_b, W_b, N, samples["T"], freq, shapeType, model, samples["rho"])
+	return dict((output, estimate[output]) for output in CORNER_OUTPUTS)
+
+def solveGeometry(shapeType, R, S, W, N, T, GuardRing_S, GuardRing_W):
+	# Worker : (R_dc ohm at the sheet resistance RHO_STR, L H) of one drawn geometry
+	# The netlist rho is RHO_STR * T (calResistivity) : R_dc does not change with T, only L and the skin factor do
+	return extractInductorGenerator(InductorGenerator(shapeType, R, S, W, N, T, GuardRing_S, GuardRing_W))
+
+def solveSamples(shapeType, R, S, W, N, samples, freq=ESTIMATOR_FREQ, GuardRing_S=20.0, GuardRing_W=2.0, grid=CORNER_GRID, workers=1):
+	# ({"L", "R", "Q"} arrays, solved geometry count) : samples sharing (bias, T) on grid share one solve
+	geometry = np.stack((samples["bias"], samples["T"]), axis=1)
+	if grid > 0.0:
+		geometry = np.round(geometry / grid) * grid
+	geometry_List, inverse = np.unique(geometry, axis=0, return_inverse=True)
+	inverse = inverse.ravel()
+	task_List = [(shapeType,) + getBiasedParams(R, S, W, bias) + (N, T, GuardRing_S, GuardRing_W) for bias, T in geometry_List.tolist()]
+	if workers == 1:
+		solved_List = [solveGeometry(*task) for task in task_List]
+	else:
+		with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as pool:
+			solved_List = list(pool.map(solveGeometry, *zip(*task_List), chunksize=max(1, len(task_List) // (workers * 4))))
+	R_dc = np.array([R_i for R_i, L_i in solved_List])[inverse] * samples["rho"] / float(RHO_STR)
+	L = np.array([L_i for R_i, L_i in solved_List], dtype=np.float64)[inverse]
+	R_ac = R_dc * calSkinFactor(samples["T"], samples["rho"], freq)
+	return ({"L": L, "R": R_ac, "Q": 2.0 * np.pi * freq * L / R_ac}, len(geometry_List))
+
+def calSensitivity(samples, values, spread=CORNER_SPREAD):
+	# Least squares slope of values on CORNER_PARAMS -> change per +1 sigma of every parameter
+	sigma = {"T": samples["T"][0] * spread["T"] / 3.0, "rho": samples["rho"][0] * spread["rho"] / 3.0, "bias": spread["bias"] / 3.0}
+	columns = [(samples[param] - samples[param][0]) / sigma[param] if sigma[param] > 0.0 else np.zeros(len(values)) for param in CORNER_PARAMS]
+	A = np.stack([np.ones(len(values))] + columns, axis=1)
+	coefficient = np.linalg.lstsq(A, values, rcond=None)[0]
+	return dict(zip(CORNER_PARAMS, coefficient[1:].tolist()))
+
+def summarizeSamples(samples, result, spread=CORNER_SPREAD):
+	# Statistics of every output against the nominal (first) sample
+	summary = {}
+	for output in CORNER_OUTPUTS:
+		values = result[output]
+		nominal = float(values[0])
+		summary[output] = {
+			"nominal": nominal,
+			"mean": float(values.mean()),
+			"std": float(values.std()),
+			"min": float(values.min()),
+			"max": float(values.max()),
+			"percentiles": dict(("p%d" % p, float(v)) for p, v in zip(CORNER_PERCENTILES, np.percentile(values, CORNER_PERCENTILES))),
+			"sensitivity": calSensitivity(samples, values, spread),
+		}
+	return summary
+
+
+
+class InductorCornerAnalysis():
+	def __init__(self, shapeType, R, S, W, N, T=METAL_THICKNESS, GuardRing_S=20.0, GuardRing_W=2.0, freq=ESTIMATOR_FREQ, engine="estimate", model="monomial",
+			spread=CORNER_SPREAD, grid=CORNER_GRID, workers=1):
+		self.shapeType = shapeType
+		self.R = R
+		self.S = S
+		self.W = W
+		self.N = N
+		self.T = T			# um, nominal thickness of the samples
+		self.GuardRing_S = GuardRing_S
+		self.GuardRing_W = GuardRing_W
+		self.freq = freq
+		self.engine = engine
+		self.model = model
+		self.spread = spread
+		self.grid = grid
+		self.workers = workers or os.cpu_count() or 1
+
+		self.sample_cnt = 0
+		self.solve_cnt = 0
+		self.elapsed = 0.0
+
+	def run(self, samples):
+		# {"L", "R", "Q"} arrays of the samples
+		if self.S - np.max(samples["bias"]) <= 0.0:
+			raise ValueError("Wire to wire space closed by the bias : S=%g bias=%g" % (self.S, np.max(samples["bias"])))
+		start = time.perf_counter()
+		if self.engine == "estimate":
+			result = estimateSamples(self.shapeType, self.R, self.S, self.W, self.N, samples, self.freq, self.model)
+		else:
+			result, solve_cnt = solveSamples(self.shapeType, self.R, self.S, self.W, self.N, samples, self.freq, self.GuardRing_S, self.GuardRing_W,
+				self.grid, self.workers)
+			self.solve_cnt = self.solve_cnt + solve_cnt
+		self.elapsed = self.elapsed + (time.perf_counter() - start)
+		self.sample_cnt = self.sample_cnt + len(samples["T"])
+		return result
+
+	def runCorners(self):
+		samples, name_List = createCornerSamples(self.spread, self.T)
+		result = self.run(samples)
+		return (samples, name_List, result, summarizeSamples(samples, result, self.spread))
+
+	def runMonteCarlo(self, count=CORNER_SAMPLES, seed=None):
+		samples, name_List = createMonteCarloSamples(count, self.spread, seed, self.T)
+		result = self.run(samples)
+		return (samples, name_List, result, summarizeSamples(samples, result, self.spread))
+
+	def getReport(self):
+		report = "%s: %d samples in %.3f sec (%.3f us/sample)" % (self.engine, self.sample_cnt, self.elapsed, self.elapsed / max(self.sample_cnt, 1) * 1e6)
+		if self.engine != "estimate":
+			report = report + ", %d geometries solved" % self.solve_cnt
+		return report
+
+
+
+def checkEngines(shapeType, R, S, W, N, T=METAL_THICKNESS, GuardRing_S=20.0, GuardRing_W=2.0, freq=ESTIMATOR_FREQ, spread=CORNER_SPREAD,
+		grid=CORNER_GRID, workers=1):
+	# Corners of both engines -> [(output, param, estimate, partial)] of the CORNER_CHECK_PARAMS sensitivities of opposite sign, [] : agree
+	summary_Dict = {}
+	for engine in CORNER_ENGINES:
+		analysis = InductorCornerAnalysis(shapeType, R, S, W, N, T, GuardRing_S, GuardRing_W, freq, engine, spread=spread, grid=grid, workers=workers)
+		summary_Dict[engine] = analysis.runCorners()[3]
+	mismatch_List = []
+	for output in ("R", "Q"):
+		for param in CORNER_CHECK_PARAMS:
+			values = tuple(summary_Dict[engine][output]["sensitivity"][param] for engine in CORNER_ENGINES)
+			if np.sign(values[0]) != np.sign(values[1]):
+				mismatch_List.append((output, param) + values)
+	return mismatch_List
+
+
+
+
+def main(argv=None):
+	parser = addDesignArguments(argparse.ArgumentParser(description="Process corners and Monte Carlo of Inductor Generator"))
+	parser.add_argument("--mode", default="corners", choices=("corners", "montecarlo"), help="3 sigma factorial corners / normal samples")
+	parser.add_argument("--samples", type=int, default=CORNER_SAMPLES, help="Monte Carlo samples")
+	parser.add_argument("--seed", type=int, default=None, help="Monte Carlo seed")
+	parser.add_argument("--engine", default="estimate", choices=CORNER_ENGINES, help="vectorized estimator / parallel partial inductance solver")
+	parser.add_argument("--model", default="monomial", choices=ESTIMATOR_MODELS, help="analytical inductance model of --engine estimate")
+	parser.add_argument("--freq", type=float, default=ESTIMATOR_FREQ, help="Hz, frequency of R and Q")
+	parser.add_argument("--T-spread", type=float, default=CORNER_SPREAD["T"], help="relative, 3 sigma of the metal thickness")
+	parser.add_argument("--rho-spread", type=float, default=CORNER_SPREAD["rho"], help="relative, 3 sigma of the sheet resistance")
+	parser.add_argument("--bias-spread", type=float, default=CORNER_SPREAD["bias"], help="um, 3 sigma of the W / S etch bias")
+	parser.add_argument("--grid", type=float, default=CORNER_GRID, help="um, bias / T rounding of the shared solves (0 : exact)")
+	parser.add_argument("--workers", type=int, default=1, help="worker processes of --engine partial (0 : every core)")
+	parser.add_argument("--output", default=None, help="write the samples and the summary as JSON")
+	parser.add_argument("--check", action="store_true", help="only compare the T / rho sensitivity signs of both engines on the corners")
+	args = parser.parse_args(argv)
+
+	spread = {"T": args.T_spread, "rho": args.rho_spread, "bias": args.bias_spread}
+	if args.check:
+		mismatch_List = checkEngines(InductorShapeType[args.shape], args.R, args.S, args.W, args.N, args.T, args.guardring_s, args.guardring_w, args.freq,
+			spread, args.grid, args.workers)
+		for output, param, estimate, partial in mismatch_List:
+			print("%s / %s sensitivity : estimate %+.5g, partial %+.5g" % (output, param, estimate, partial))
+		print("engines %s on the %s sensitivity signs of R and Q" % ("disagree" if mismatch_List else "agree", "/".join(CORNER_CHECK_PARAMS)))
+		return 1 if mismatch_List else 0
+
+	analysis = InductorCornerAnalysis(InductorShapeType[args.shape], args.R, args.S, args.W, args.N, args.T, args.guardring_s, args.guardring_w, args.freq,
+		args.engine, args.model, spread, args.grid, args.workers)
+	if args.mode == "corners":
+		samples, name_List, result, summary = analysis.runCorners()
+		print("%-18s %8s %8s %7s %12s %10s %8s" % ("corner", "T um", "rho", "bias um", "L H", "R ohm", "Q"))
+		for i, name in enumerate(name_List):
+			print("%-18s %8.4f %8.4f %7.3f %12.5g %10.5g %8.4g" % (name, samples["T"][i], samples["rho"][i], samples["bias"][i],
+				result["L"][i], result["R"][i], result["Q"][i]))
+	else:
+		samples, name_List, result, summary = analysis.runMonteCarlo(args.samples, args.seed)
+
+	print("%-3s %12s %12s %9s %12s %12s %12s %12s %12s" % ("", "nominal", "mean", "std %", "min", "max", "p5", "p95", "1 sigma T/rho/bias %"))
+	for output, stats in summary.items():
+		nominal = stats["nominal"]
+		print("%-3s %12.5g %12.5g %9.3f %12.5g %12.5g %12.5g %12.5g %s" % (output, nominal, stats["mean"], stats["std"] / abs(nominal) * 100.0,
+			stats["min"], stats["max"], stats["percentiles"]["p5"], stats["percentiles"]["p95"],
+			"/".join("%+.3f" % (stats["sensitivity"][param] / abs(nominal) * 100.0) for param in CORNER_PARAMS)))
+	print(analysis.getReport(), file=sys.stderr)
+
+	if args.output is not None:
+		with open(args.output, 'w') as f:
+			json.dump({
+				"design": {"shape": args.shape, "R": args.R, "S": args.S, "W": args.W, "N": args.N},
+				"mode": args.mode, "engine": args.engine, "freq": args.freq, "spread": spread,
+				"samples": [dict([("name", name)] + [(param, samples[param][i].item()) for param in CORNER_PARAMS] +
+					[(output, result[output][i].item()) for output in CORNER_OUTPUTS]) for i, name in enumerate(name_List)],
+				"summary": summary,
+			}, f, indent=1)
+	return 0
+
+
+
+if __name__ == '__main__':
+	sys.exit(main())
@@ -0,0 +1,104 @@
+#!/bin/python3
+# Analytical Inductance Estimator for Inductor Generator.
+# Closed form L, series R and Q of planar spirals, vectorized over sweep arrays.
+# S. S. Mohan et al., "Simple Accurate Expressions for Planar Spiral Inductances", IEEE JSSC 1999.
+
+import numpy as np
+
+from inductor_generator import InductorShapeType, METAL_THICKNESS, MU_0, RHO_STR, SHAPE_SIDES, calResistivity
+
+
+ESTIMATOR_FREQ = 2.0e9				# Hz, LC-Oscillator
+ESTIMATOR_MODELS = ("wheeler", "sheet", "monomial")
+
+# Modified Wheeler K1, K2 / Current sheet c1, c2, c3, c4 / Monomial beta, alpha1-5 (um -> nH)
+ESTIMATOR_COEFFICIENTS = {
+	4: {
+		"wheeler": (2.34, 2.75),
+		"sheet": (1.27, 2.07, 0.18, 0.13),
+		"monomial": (1.62e-3, -1.21, -0.147, 2.40, 1.78, -0.030),
+	},
+	6: {
+		"wheeler": (2.33, 3.82),
+		"sheet": (1.09, 2.23, 0.00, 0.17),
+		"monomial": (1.28e-3, -1.24, -0.174, 2.47, 1.77, -0.049),
+	},
+	8: {
+		"wheeler": (2.25, 3.55),
+		"sheet": (1.07, 2.29, 0.00, 0.19),
+		"monomial": (1.33e-3, -1.21, -0.163, 2.43, 1.75, -0.049),
+	},
+}
+
+
+def calDiameter(R, S, W, N):
+	# um : inner, outer, average diameter and fill ratio
+	d_in = R
+	d_out = R + 2.0 * W * N + 2.0 * S * (N - 1)
+	d_avg = (d_out + d_in) / 2.0
+	fill = (d_out - d_in) / (d_out + d_in)
+	return (d_in, d_out, d_avg, fill)
+
+def calWheelerL(N, d_avg, fill, sides=4):
+	K1, K2 = ESTIMATOR_COEFFICIENTS[sides]["wheeler"]
+	return K1 * MU_0 * N * N * (d_avg * 1e-6) / (1.0 + K2 * fill)
+
+def calCurrentSheetL(N, d_avg, fill, sides=4):
+	c1, c2, c3, c4 = ESTIMATOR_COEFFICIENTS[sides]["sheet"]
+	return MU_0 * N * N * (d_avg * 1e-6) * c1 / 2.0 * (np.log(c2 / fill) + c3 * fill + c4 * fill * fill)
+
+def calMonomialL(N, d_out, d_avg, W, S, sides=4):
+	beta, a1, a2, a3, a4, a5 = ESTIMATOR_COEFFICIENTS[sides]["monomial"]
+	S = np.maximum(S, 1e-3)
+	return beta * d_out**a1 * W**a2 * d_avg**a3 * N**a4 * S**a5 * 1e-9
+
+def calWireLength(R, S, W, N, sides=4):
+	# um : sum of the center line perimeter of every roll, apothem R/2 + W*n - W/2 + S*(n-1)
+	perimeter = 2.0 * sides * np.tan(np.pi / sides)
+	return perimeter * (N * (R / 2.0 - W / 2.0 - S) + (W + S) * N * (N + 1) / 2.0)
+
+def calSkinFactor(T, rho_sheet, freq):
+	# R_ac / R_dc of a T thick conductor
+	rho_bulk = calResistivity(rho_sheet, T) * 1e-6		# ohm*m
+	delta = np.sqrt(rho_bulk / (np.pi * freq * MU_0)) * 1e6	# um
+	ratio = T / delta
+	return ratio / (1.0 - np.exp(-ratio))
+
+
+
+def estimateInductor(R, S, W, N, T=METAL_THICKNESS, freq=ESTIMATOR_FREQ, shapeType=InductorShapeType.spiral,
+		model="monomial", rho_sheet=float(RHO_STR)):
+	# Every argument may be a scalar or an array of the whole sweep
+	R, S, W, N, T, freq, rho_sheet = np.broadcast_arrays(*[np.asarray(v, dtype=np.float64) for v in (R, S, W, N, T, freq, rho_sheet)])
+	sides = SHAPE_SIDES[shapeType]
+
+	d_in, d_out, d_avg, fill = calDiameter(R, S, W, N)
+	estimate = {
+		"d_out": d_out,
+		"wheeler": calWheelerL(N, d_avg, fill, sides),
+		"sheet": calCurrentSheetL(N, d_avg, fill, sides),
+		"monomial": calMonomialL(N, d_out, d_avg, W, S, sides),
+	}
+	estimate["L"] = estimate[model]
+	estimate["length"] = calWireLength(R, S, W, N, sides)
+	estimate["R_dc"] = rho_sheet * estimate["length"] / W
+	estimate["R"] = estimate["R_dc"] * calSkinFactor(T, rho_sheet, freq)
+	estimate["Q"] = 2.0 * np.pi * freq * estimate["L"] / estimate["R"]
+	return estimate
+
+def estimateInductorParams(parameters, shapeType=InductorShapeType.spiral, freq=ESTIMATOR_FREQ, model="monomial"):
+	return estimateInductor(parameters.R, parameters.S, parameters.W, parameters.N, parameters.T, freq, shapeType, model)
+
+def screenInductorParams(param_List, L_target, tolerance=0.2, freq=ESTIMATOR_FREQ, model="monomial"):
+	# Sweep rows (inductor_sweep) whose estimate is within tolerance of L_target
+	screened = []
+	for shape in set(params["shape"] for params in param_List):
+		rows = [params for params in param_List if params["shape"] == shape]
+		columns = {key: np.array([params[key] for params in rows]) for key in ("R", "S", "W", "N", "T")}
+		estimate = estimateInductor(columns["R"], columns["S"], columns["W"], columns["N"], columns["T"], freq,
+			InductorShapeType[shape], model)
+		error = np.abs(estimate["L"] - L_target) / L_target
+		screened.extend(params for params, ok in zip(rows, error <= tolerance) if ok)
+	order = {id(params): index for index, params in enumerate(param_List)}
+	screened.sort(key=lambda params: order[id(params)])
+	return screened
@@ -1,18 +1,21 @@
 #!/bin/python3
 # Inductor Generateor for FastHenry & GDS.
-# Support Type : spiral, symmetry
+# Support Type : spiral, symmetry, hexagon, octagon (spiral and symmetry of the polygon shapes)
 
 import numpy as np
-import random
-import sys
 import datetime
-import pya
 import os
-import gdspy
 
-import uuid
+import hashlib
+import json
+import logging
+from array import array
 from enum import Enum
 
+from inductor_profile import NULL_PROFILER
+
+# gdspy / gds_stream / uuid are imported by the backends using them : FastHenry only runs never load the GDS stack
+
 
 CELL_NAME = "INDUCTOR"
 ORIGIN_XY = (0.0,0.0)
@@ -25,14 +28,41 @@ UNDER_METAL_LAYER = {"layer": 70, "datatype": 20}	# Sky130 of Metal3
 #UNDER_METAL_LAYER = {"layer": 8, "datatype": 0}	# OR1 of Metal1
 VIA_SIZE = 1.0
 VIA_MAT_SIZE = 1.6
+VIA_SPACE = 0.3					# um Cut to Cut Space of via arrays
+VIA_ENCLOSURE = (VIA_MAT_SIZE - VIA_SIZE)/2.0	# um Metal enclosure of via arrays
+VIA_CELL_NAME = "VIA"
 #METAL_THICKNESS = 1.26				# um Thickness of Sky130 Metal5
 METAL_THICKNESS = 0.854				# um Thickness of Sky130 Metal4,3
 #METAL_THICKNESS = 0.854				# um Thickness of OR1 Metal2
 #RHO_STR = "0.0285"				# ohm/sq of Sky130 Metal5
 RHO_STR = "0.047"				# ohm/sq of Sky130 Metal4,3
 #RHO_STR = "0.047"				# ohm/sq of OR1 Metal2
+# RHO_STR is a sheet resistance everywhere : FastHenry segments get calResistivity(RHO_STR, T) ohm*um, R = rho_sheet*l/W
+#LEF_TOP_METAL_LAYER = "met5"			# Sky130 of Metal5
+LEF_TOP_METAL_LAYER = "met4"			# Sky130 of Metal4
+#LEF_TOP_METAL_LAYER = "metal2"			# OR1 of Metal2
+LEF_UNDER_METAL_LAYER = "met3"			# Sky130 of Metal3
+#LEF_UNDER_METAL_LAYER = "metal1"		# OR1 of Metal1
+INDUCTOR_OUTPUTS = ("gds", "henry", "lef", "json")
 MIN_FREQ="1e1"
 MAX_FREQ="1e6"
+HENRY_NDEC = "10"
+HENRY_NHINC = 5					# Filaments across H of every segment (.Default)
+HENRY_NWINC = 5					# Filaments across W of every segment (.Default)
+HENRY_MESHES = ("adaptive",)			# or (nhinc, nwinc) of every segment
+MESH_SKIN_RATIO = 1.0				# Adaptive mesh : filament no thicker than skin depth x this
+MESH_MAX_INC = 15				# Adaptive mesh : filaments per side
+MU_0 = 4.0e-7 * np.pi				# H/m, the only definition : estimator, partial inductance and stand-in solver import it
+
+# Netlist dumps are DEBUG records : sweeps never format them
+logger = logging.getLogger("inductor_generator")
+
+# VIA rectangles of every crossing : (layer, half size, is VIA mat)
+GDS_VIA_TEMPLATE = (
+	(TOP_VIA_LAYER, VIA_SIZE/2.0, False),
+	(TOP_METAL_LAYER, VIA_MAT_SIZE/2.0, True),
+	(UNDER_METAL_LAYER, VIA_MAT_SIZE/2.0, True),
+)
 
 
 class InductorShapeType(Enum):
@@ -40,6 +70,19 @@ class InductorShapeType(Enum):
 	hexagon = 1
 	octagon = 2
 	symmetry = 3
+	hexagon_symmetry = 4
+	octagon_symmetry = 5
+
+# Sides of the rolls, polygon shapes come from createPolygonInductorPositonArray
+SHAPE_SIDES = {
+	InductorShapeType.spiral: 4,
+	InductorShapeType.hexagon: 6,
+	InductorShapeType.octagon: 8,
+	InductorShapeType.symmetry: 4,
+	InductorShapeType.hexagon_symmetry: 6,
+	InductorShapeType.octagon_symmetry: 8,
+}
+SHAPE_SIDES_ARRAY = np.array([SHAPE_SIDES[shapeType] for shapeType in sorted(InductorShapeType, key=lambda shapeType: shapeType.value)])
 
 class InductorSideType(Enum):
 	Top = 0
@@ -49,10 +92,95 @@ class InductorSideType(Enum):
 	Start = 0
 	End = 1
 
+# xy sign of each InductorSideType(T,R,B,L) from the center
+CENTER_SIDE_SIGN = np.array([(0.0, 1.0), (1.0, 0.0), (0.0, -1.0), (-1.0, 0.0)])
+# xy sign of Line Start/End along each side
+LINE_LENGTH_SIGN = np.array([
+	((-1.0, 0.0), (1.0, 0.0)),	# Top
+	((0.0, 1.0), (0.0, -1.0)),	# Right
+	((1.0, 0.0), (-1.0, 0.0)),	# Bottom
+	((0.0, -1.0), (0.0, 1.0)),	# Left
+])
+# xy sign of Box Start/End along and across each side
+BOX_LENGTH_SIGN = np.array([
+	((-1.0, 0.0), (1.0, 0.0)),	# Top
+	((0.0, -1.0), (0.0, 1.0)),	# Right
+	((-1.0, 0.0), (1.0, 0.0)),	# Bottom
+	((0.0, -1.0), (0.0, 1.0)),	# Left
+])
+BOX_EDGE_SIGN = np.array([
+	((0.0, 1.0), (0.0, -1.0)),	# Top
+	((-1.0, 0.0), (1.0, 0.0)),	# Right
+	((0.0, 1.0), (0.0, -1.0)),	# Bottom
+	((-1.0, 0.0), (1.0, 0.0)),	# Left
+])
+
+# Whole populations of parameter sets (optimizer grids) : one record per candidate with the derived sizes of InductorParams
+PARAMS_RECORD_DTYPE = np.dtype([
+	("shape", np.uint8),			# InductorShapeType value
+	("R", np.float64),
+	("S", np.float64),
+	("W", np.float64),
+	("N", np.int32),
+	("T", np.float64),
+	("GuardRing_S", np.float64),
+	("GuardRing_W", np.float64),
+	("L", np.float64),
+	("A", np.float64),
+	("GuardRing_L", np.float64),
+])
+
+
+def calExtentRatio(sides):
+	# Half size / apothem of the rolls : flat sides face x and y for 4, 8 sides, the hexagon corners face x
+	sides = np.asarray(sides)
+	return np.where(sides % 4 == 0, 1.0, 1.0 / np.cos(np.pi / sides))
+
+def calAreaLength(R, S, W, N, extent_ratio=1.0):
+	return ( R/2.0 + (W*N) + (S*(N-1)) ) *2.0 * extent_ratio
+
+def calGuardRingLength(L, GuardRing_S, GuardRing_W):
+	return L + GuardRing_S*2.0 + GuardRing_W*2.0
+
+def getParamsKey(R, S, W, N, T, GuardRing_S, GuardRing_W, sides=4):
+	# Text of the values InductorParams is built from : the same design gives the same key in every process
+	return "R=%r,S=%r,W=%r,N=%d,T=%r,GuardRing_S=%r,GuardRing_W=%r,sides=%d" % (float(R), float(S), float(W), int(N), float(T),
+		float(GuardRing_S), float(GuardRing_W), int(sides))
+
+def calParamsID(params_key):
+	import uuid
+	return uuid.uuid5(uuid.NAMESPACE_OID, "InductorParams:" + params_key)
+
+def createParamsRecords(shapeType, R, S, W, N, T=METAL_THICKNESS, GuardRing_S=20.0, GuardRing_W=2.0):
+	# Every argument may be a scalar or an array (shapeType : InductorShapeType or array of its values) -> PARAMS_RECORD_DTYPE array
+	if isinstance(shapeType, InductorShapeType):
+		shapeType = shapeType.value
+	columns = np.broadcast_arrays(*[np.asarray(value) for value in (shapeType, R, S, W, N, T, GuardRing_S, GuardRing_W)])
+	records = np.empty(columns[0].size, dtype=PARAMS_RECORD_DTYPE)
+	for name, column in zip(PARAMS_RECORD_DTYPE.names, columns):
+		records[name] = column.ravel()
+	sides = SHAPE_SIDES_ARRAY[records["shape"]]
+	records["L"] = calAreaLength(records["R"], records["S"], records["W"], records["N"], calExtentRatio(sides))
+	records["A"] = records["L"] * records["L"]
+	records["GuardRing_L"] = calGuardRingLength(records["L"], records["GuardRing_S"], records["GuardRing_W"])
+	return records
+
+def getParamsRow(record):
+	# One record -> sweep parameter row (inductor_sweep.normalizeSweepParams)
+	row = dict((name, record[name].item()) for name in ("R", "S", "W", "N", "T", "GuardRing_S", "GuardRing_W"))
+	row["shape"] = InductorShapeType(int(record["shape"])).name
+	return row
+
+
+
 class InductorParams():
-	def __init__(self, R, S, W, N, T, GuardRing_S, GuardRing_W):
+	# Slots : no per object __dict__, populations of candidates stay small (benchmark_memory)
+	__slots__ = ("_ID", "R", "S", "W", "N", "L", "A", "T", "sides", "GuardRing_S", "GuardRing_W", "GuardRing_L", "GuardRing_T",
+		"Tap_L", "_center_xyz", "_position_Dict")
 
-		self.ID = uuid.uuid4()
+	def __init__(self, R, S, W, N, T, GuardRing_S, GuardRing_W, sides=4):
+
+		self._ID = None				# uuid5 of the parameter values, Cal by ID
 
 		self.R = R				# InnerR
 		self.S = S				# Wire2Wire Space
@@ -61,7 +189,7 @@ class InductorParams():
 		self.L = 0.0				# Area Length. Cal by getL()
 		self.A = 0.0				# Area Size. Cal by getA()
 		self.T = T				# um Thickness
-
+		self.sides = int(sides)			# Sides of every roll
 
 		self.GuardRing_S = GuardRing_S		# Guard Ring to Inductor Space 
 		self.GuardRing_W = GuardRing_W		# Guard Ring Wire Width
@@ -70,139 +198,138 @@ class InductorParams():
 
 		self.Tap_L = 10.0			# Tab Length
 
-		self.center_xyz = (0.0, 0.0, 0.0)
+		self._center_xyz = None			# Cal by center_xyz
+		self._position_Dict = None		# Position lists shared by every backend, Cal by position_Dict
 
 		self.calL()
 		self.calA()
 		self.calGuardRing_L()
-		self.calCenter()
 		self.calTap_L()
 
 
+	@classmethod
+	def fromRecord(cls, record):
+		# One PARAMS_RECORD_DTYPE record of createParamsRecords
+		return cls(float(record["R"]), float(record["S"]), float(record["W"]), int(record["N"]), float(record["T"]),
+			float(record["GuardRing_S"]), float(record["GuardRing_W"]), SHAPE_SIDES[InductorShapeType(int(record["shape"]))])
+
+	@property
+	def ID(self):
+		if self._ID is None:
+			self._ID = calParamsID(self.getParamsKey())
+		return self._ID
+
+	@property
+	def center_xyz(self):
+		if self._center_xyz is None:
+			self.calCenter()
+		return self._center_xyz
+
+	@property
+	def position_Dict(self):
+		if self._position_Dict is None:
+			self._position_Dict = {}
+		return self._position_Dict
+
+	def getParamsKey(self):
+		return getParamsKey(self.R, self.S, self.W, self.N, self.T, self.GuardRing_S, self.GuardRing_W, self.sides)
+
 	def calL(self):
-		self.L = ( self.R/2.0 + (self.W*self.N) + (self.S*(self.N-1)) ) *2.0 	# Area Length
+		self.L = calAreaLength(self.R, self.S, self.W, self.N, self.calExtentRatio())	# Area Length
 		return self.L
 
+	def calExtentRatio(self):
+		if self.sides % 4 == 0:
+			return 1.0
+		return float(calExtentRatio(self.sides))
+
 	def calA(self):
 		self.A = self.L*self.L			# Area Size
 		return self.A
 
 	def calGuardRing_L(self):
-		self.GuardRing_L = self.L + self.GuardRing_S*2.0 + self.GuardRing_W*2.0
+		self.GuardRing_L = calGuardRingLength(self.L, self.GuardRing_S, self.GuardRing_W)
 		return self.GuardRing_L
 
 	def calCenter(self):
-		self.center_xyz = (self.GuardRing_L/2.0, self.GuardRing_L/2.0, self.T/2.0)
-		return self.center_xyz
+		self._center_xyz = (self.GuardRing_L/2.0, self.GuardRing_L/2.0, self.T/2.0)
+		return self._center_xyz
 
 	def calTap_L(self):
 		if self.Tap_L == 0.0:
 			self.Tap_L = self.GuardRing_S	# um
 		return self.Tap_L
 
-	def calCenterPositonList(self):
-		num_N_Center_List = []
-		for num_N in range(int(self.N)):
-			num_N = num_N + 1
-			num_N_positon = self.R/2.0 + (self.W*num_N) - (self.W/2.0) + (self.S*(num_N-1))
-
-			# InductorSideType.Top
-			num_N_Center_xyz_T = (self.center_xyz[0], self.center_xyz[1]+num_N_positon, self.center_xyz[2])
-			# InductorSideType.Bottom
-			num_N_Center_xyz_B = (self.center_xyz[0], self.center_xyz[1]-num_N_positon, self.center_xyz[2])
-			# InductorSideType.Left
-			num_N_Center_xyz_L = (self.center_xyz[0]-num_N_positon, self.center_xyz[1], self.center_xyz[2])
-			# InductorSideType.Right
-			num_N_Center_xyz_R = (self.center_xyz[0]+num_N_positon, self.center_xyz[1], self.center_xyz[2])
+	def calNumNArray(self):
+		return np.arange(1, self.N+1, dtype=np.float64)		# num_N of every roll
+
+	def calNumNPositonArray(self):
+		# Apothem of the wire center line of every roll
+		num_N = self.calNumNArray()
+		return self.R/2.0 + (self.W*num_N) - (self.W/2.0) + (self.S*(num_N-1))
+
+	def calCenterPositonArray(self):
+		# (N, 4, 3) : roll, InductorSideType(T,R,B,L), xyz
+		num_N = self.calNumNArray()
+		num_N_positon = self.calNumNPositonArray()
+
+		num_N_Center_Array = np.empty((len(num_N), 4, 3))
+		num_N_Center_Array[:, :, :] = self.center_xyz
+		num_N_Center_Array[:, :, 0:2] += CENTER_SIDE_SIGN[np.newaxis, :, :] * num_N_positon[:, np.newaxis, np.newaxis]
+		return num_N_Center_Array
+
+	def createBoxInductorPositonArray(self):
+		# (N, 4, 2, 3) : roll, InductorSideType(T,R,B,L), InductorSideType(Start,End), xyz
+		num_N_Center_Array = self.calCenterPositonArray()
+		num_N = self.calNumNArray()
+
+		num_N_L = self.R/2.0 + (self.W*num_N) + (self.S*(num_N-1))
+		edge_W = (self.W/2.0)
+
+		box_points_Array = np.repeat(num_N_Center_Array[:, :, np.newaxis, :], 2, axis=2)
+		box_points_Array[:, :, :, 0:2] += BOX_LENGTH_SIGN[np.newaxis, :, :, :] * num_N_L[:, np.newaxis, np.newaxis, np.newaxis]
+		box_points_Array[:, :, :, 0:2] += BOX_EDGE_SIGN[np.newaxis, :, :, :] * edge_W
+		return box_points_Array
+
+	def createLineInductorPositonArray(self):
+		# (N, 4, 2, 3) : roll, InductorSideType(T,R,B,L), InductorSideType(Start,End), xyz
+		num_N_Center_Array = self.calCenterPositonArray()
+		num_N = self.calNumNArray()
+
+		edge_W = (self.W/2.0)
+		num_N_L = self.R/2.0 + (self.W*num_N) + (self.S*(num_N-1)) - edge_W
+
+		line_points_Array = np.repeat(num_N_Center_Array[:, :, np.newaxis, :], 2, axis=2)
+		line_points_Array[:, :, :, 0:2] += LINE_LENGTH_SIGN[np.newaxis, :, :, :] * num_N_L[:, np.newaxis, np.newaxis, np.newaxis]
+		return line_points_Array
+
+	def createPolygonInductorPositonArray(self):
+		# (N, sides, 3) : roll, corner, xyz. Corners run counterclockwise from the right end of the flat bottom side
+		if "polygon" not in self.position_Dict:
+			angle = np.pi * (2.0*np.arange(self.sides) + 1.0) / self.sides - np.pi/2.0
+			# Unit corners rounded : the flat sides stay exactly on x / y
+			corner = np.round(np.stack((np.cos(angle), np.sin(angle)), axis=1), 12)
+			radius = self.calNumNPositonArray() / np.cos(np.pi / self.sides)
+			polygon_Array = np.empty((self.N, self.sides, 3))
+			polygon_Array[:, :, :] = self.center_xyz
+			polygon_Array[:, :, 0:2] += radius[:, np.newaxis, np.newaxis] * corner[np.newaxis, :, :]
+			self.position_Dict["polygon"] = polygon_Array
+		return self.position_Dict["polygon"]
 
-			num_N_Center_xyz = (num_N_Center_xyz_T, num_N_Center_xyz_R, num_N_Center_xyz_B, num_N_Center_xyz_L)
-			num_N_Center_List.append(num_N_Center_xyz)
-
-		return num_N_Center_List
+	def calCenterPositonList(self):
+		if "center" not in self.position_Dict:
+			self.position_Dict["center"] = [tuple(tuple(xyz) for xyz in TRBL) for TRBL in self.calCenterPositonArray().tolist()]
+		return self.position_Dict["center"]
 
 	def createBoxInductorPositonList(self):
-		num_N_Center_List = self.calCenterPositonList()
-		num_N = 0
-		box_points_List = []
-		for num_N_Center_TRBL in num_N_Center_List:
-			num_N = num_N + 1
-			# InductorSideType.Top
-			num_N_Center_xyz_T = num_N_Center_TRBL[InductorSideType.Top.value]
-			# InductorSideType.Bottom
-			num_N_Center_xyz_B = num_N_Center_TRBL[InductorSideType.Bottom.value]
-			# InductorSideType.Left
-			num_N_Center_xyz_L = num_N_Center_TRBL[InductorSideType.Left.value]
-			# InductorSideType.Right
-			num_N_Center_xyz_R = num_N_Center_TRBL[InductorSideType.Right.value]
-
-			num_N_L = self.R/2.0 + (self.W*num_N) + (self.S*(num_N-1))
-			edge_W = (self.W/2.0)
-
-			num_N_Box_Start_xyz_T = (num_N_Center_xyz_T[0] - num_N_L, num_N_Center_xyz_T[1] + edge_W, num_N_Center_xyz_T[2])
-			num_N_Box_End_xyz_T = (num_N_Center_xyz_T[0] + num_N_L, num_N_Center_xyz_T[1] - edge_W, num_N_Center_xyz_T[2])
-			
-			num_N_Box_Start_xyz_B = (num_N_Center_xyz_B[0] - num_N_L, num_N_Center_xyz_B[1] + edge_W, num_N_Center_xyz_B[2])
-			num_N_Box_End_xyz_B = (num_N_Center_xyz_B[0] + num_N_L, num_N_Center_xyz_B[1] - edge_W, num_N_Center_xyz_B[2])
-
-			num_N_Box_Start_xyz_R = (num_N_Center_xyz_R[0] - edge_W, num_N_Center_xyz_R[1] - num_N_L, num_N_Center_xyz_R[2])
-			num_N_Box_End_xyz_R = (num_N_Center_xyz_R[0] + edge_W, num_N_Center_xyz_R[1] + num_N_L, num_N_Center_xyz_R[2])
-
-			num_N_Box_Start_xyz_L = (num_N_Center_xyz_L[0] - edge_W, num_N_Center_xyz_L[1] - num_N_L, num_N_Center_xyz_L[2])
-			num_N_Box_End_xyz_L = (num_N_Center_xyz_L[0] + edge_W, num_N_Center_xyz_L[1] + num_N_L, num_N_Center_xyz_L[2])
-
-			num_N_Box_points_T = (num_N_Box_Start_xyz_T, num_N_Box_End_xyz_T)
-			num_N_Box_points_B = (num_N_Box_Start_xyz_B, num_N_Box_End_xyz_B)
-			num_N_Box_points_R = (num_N_Box_Start_xyz_R, num_N_Box_End_xyz_R)
-			num_N_Box_points_L = (num_N_Box_Start_xyz_L, num_N_Box_End_xyz_L)
-
-			num_N_Box_points_List = (num_N_Box_points_T, num_N_Box_points_R, num_N_Box_points_B, num_N_Box_points_L)
-
-			box_points_List.append(num_N_Box_points_List)
-
-		return box_points_List
+		if "box" not in self.position_Dict:
+			self.position_Dict["box"] = [tuple(tuple(tuple(xyz) for xyz in points) for points in TRBL) for TRBL in self.createBoxInductorPositonArray().tolist()]
+		return self.position_Dict["box"]
 
 	def createLineInductorPositonList(self):
-		num_N_Center_List = self.calCenterPositonList()
-		num_N = 0
-		line_points_List = []
-		for num_N_Center_TRBL in num_N_Center_List:
-			num_N = num_N + 1
-			# InductorSideType.Top
-			num_N_Center_xyz_T = num_N_Center_TRBL[InductorSideType.Top.value]
-			# InductorSideType.Bottom1
-			num_N_Center_xyz_B = num_N_Center_TRBL[InductorSideType.Bottom.value]
-			# InductorSideType.Left
-			num_N_Center_xyz_L = num_N_Center_TRBL[InductorSideType.Left.value]
-			# InductorSideType.Right
-			num_N_Center_xyz_R = num_N_Center_TRBL[InductorSideType.Right.value]
-
-			edge_W = (self.W/2.0)
-			num_N_L = self.R/2.0 + (self.W*num_N) + (self.S*(num_N-1)) - edge_W
-
-			num_N_Line_Start_xyz_T = (num_N_Center_xyz_T[0] - num_N_L, num_N_Center_xyz_T[1], num_N_Center_xyz_T[2])
-			num_N_Line_End_xyz_T = (num_N_Center_xyz_T[0] + num_N_L, num_N_Center_xyz_T[1], num_N_Center_xyz_T[2])
-			
-			num_N_Line_Start_xyz_B = (num_N_Center_xyz_B[0] + num_N_L, num_N_Center_xyz_B[1], num_N_Center_xyz_B[2])
-			num_N_Line_End_xyz_B = (num_N_Center_xyz_B[0] - num_N_L, num_N_Center_xyz_B[1], num_N_Center_xyz_B[2])
-
-			num_N_Line_Start_xyz_R = (num_N_Center_xyz_R[0], num_N_Center_xyz_R[1] + num_N_L, num_N_Center_xyz_R[2])
-			num_N_Line_End_xyz_R = (num_N_Center_xyz_R[0], num_N_Center_xyz_R[1] - num_N_L, num_N_Center_xyz_R[2])
-
-			num_N_Line_Start_xyz_L = (num_N_Center_xyz_L[0], num_N_Center_xyz_L[1] - num_N_L, num_N_Center_xyz_L[2])
-			num_N_Line_End_xyz_L = (num_N_Center_xyz_L[0], num_N_Center_xyz_L[1] + num_N_L, num_N_Center_xyz_L[2])
-
-
-			num_N_Line_points_T = (num_N_Line_Start_xyz_T, num_N_Line_End_xyz_T)
-			num_N_Line_points_B = (num_N_Line_Start_xyz_B, num_N_Line_End_xyz_B)
-			num_N_Line_points_R = (num_N_Line_Start_xyz_R, num_N_Line_End_xyz_R)
-			num_N_Line_points_L = (num_N_Line_Start_xyz_L, num_N_Line_End_xyz_L)
-
-
-			num_N_Line_points_List = (num_N_Line_points_T, num_N_Line_points_R, num_N_Line_points_B, num_N_Line_points_L)
-
-			line_points_List.append(num_N_Line_points_List)
-
-		return line_points_List
+		if "line" not in self.position_Dict:
+			self.position_Dict["line"] = [tuple(tuple(tuple(xyz) for xyz in points) for points in TRBL) for TRBL in self.createLineInductorPositonArray().tolist()]
+		return self.position_Dict["line"]
 
 	def createBoxGuardRingPositonList(self):
 		GR_Center_List = self.calCenterPositonList()
@@ -284,704 +411,792 @@ class InductorParams():
 
 
 
-class InductorGenerator():
-	def __init__(self, shapeType, R, S, W, N, T, GuardRing_S, GuardRing_W):
-		self.parameters = InductorParams(R, S, W, N, T, GuardRing_S, GuardRing_W)
-		self.dt_now = datetime.datetime.now()
-		self.shapeType = shapeType
-
-
-	def generateInductor4gds(self):
-		lib = gdspy.GdsLibrary()
-		gdspy.current_library=gdspy.GdsLibrary()
-		unitCell = lib.new_cell(CELL_NAME)
-
-		if self.shapeType == InductorShapeType.spiral:
-			self.generateInductorSpiral4gds_path(unitCell)
-		elif self.shapeType == InductorShapeType.hexagon:
-			print("Not implementation\n")
-		elif self.shapeType == InductorShapeType.octagon:
-			print("Not implementation\n")
-		elif self.shapeType == InductorShapeType.symmetry:
-			self.generateInductorSymmetry4gds_path(unitCell)
-		else:
-			print("Not implementation\n")
+class HenryNetlist():
+	# Conductor model of one design : nodes, wire / VIA segments and Taps, serialized by every backend
+	def __init__(self, rho=None):
+		self.rho = rho or "%g" % calResistivity(float(RHO_STR), METAL_THICKNESS)	# ohm*um of the segments without their own rho
+		self.node_ids = array('l')		# Number of N%d / NV%d
+		self.node_via = array('b')		# 1 : NV(VIA) node
+		self.node_xyz = array('d')		# x, y, z of every node
+		self.N_cnt = 0
+		self.NV_cnt = 0
 
+		self.seg_nodes = array('l')		# node index pair of every segment
+		self.seg_H = array('d')			# um Height
+		self.seg_W = array('d')			# um Width
+		self.seg_rho = array('d')
+		self.rho_str = {}			# rho value to netlist text
 
-		top = lib.new_cell("TOP")
-		top.add(unitCell)
-		lib.write_gds("inductor_" + 
-			str(self.dt_now.year) + 
-			str(self.dt_now.month) + 
-			str(self.dt_now.day) + 
-			str(self.dt_now.hour) + 
-			str(self.dt_now.minute) + 
-			str(self.dt_now.second) + 
-			".gds")
+		self.external_nodes = []		# node index of Taps
 
 
+	def addNode(self, x, y, z, via=False):
+		if via:
+			self.NV_cnt = self.NV_cnt + 1
+			self.node_ids.append(self.NV_cnt)
+		else:
+			self.N_cnt = self.N_cnt + 1
+			self.node_ids.append(self.N_cnt)
+		self.node_via.append(1 if via else 0)
+		self.node_xyz.extend((x, y, z))
+		return len(self.node_ids) - 1
+
+	def addNodes(self, xyz, via=False):
+		# [n, 3] nodes at once -> node index array
+		xyz = np.ascontiguousarray(xyz, dtype=np.float64).reshape(-1, 3)
+		count = len(xyz)
+		if via:
+			self.node_ids.extend(range(self.NV_cnt + 1, self.NV_cnt + count + 1))
+			self.NV_cnt = self.NV_cnt + count
+		else:
+			self.node_ids.extend(range(self.N_cnt + 1, self.N_cnt + count + 1))
+			self.N_cnt = self.N_cnt + count
+		start = len(self.node_via)
+		self.node_via.extend([1 if via else 0] * count)
+		self.node_xyz.frombytes(xyz.tobytes())
+		return np.arange(start, start + count)
+
+	def addSegments(self, node_1, node_2, H, W, rho=None):
+		# Segments node_1[i] - node_2[i] of the same H, W -> segment index array
+		rho = rho or self.rho
+		rho_value = float(rho)
+		self.rho_str.setdefault(rho_value, rho)
+		nodes = np.stack((np.asarray(node_1), np.asarray(node_2)), axis=-1).ravel()
+		count = len(nodes) // 2
+		start = len(self.seg_H)
+		self.seg_nodes.extend(nodes.tolist())
+		self.seg_H.extend([H] * count)
+		self.seg_W.extend([W] * count)
+		self.seg_rho.extend([rho_value] * count)
+		return np.arange(start, start + count)
+
+	def addSegment(self, node_1, node_2, H, W, rho=None):
+		rho = rho or self.rho
+		rho_value = float(rho)
+		self.rho_str.setdefault(rho_value, rho)
+		self.seg_nodes.extend((node_1, node_2))
+		self.seg_H.append(H)
+		self.seg_W.append(W)
+		self.seg_rho.append(rho_value)
+		return len(self.seg_H) - 1
+
+	def addExternal(self, node):
+		self.external_nodes.append(node)
 		return
 
-	def generateInductorSpiral4gds_path(self, unitCell):
-		linePositonList = self.parameters.createLineInductorPositonList()
-		num_N_CenterList = self.parameters.calCenterPositonList()
-		#lineNum = linePositonList.len()
-		turxy_cnt = 0
-		num_N = 0
-		xy_cnt = 1
-		xy_list = []
-		xy_list.append(ORIGIN_XY)
-		start_VIA_point = []
-
-		for pointList in linePositonList:
-			num_N_Center_TRBL = num_N_CenterList[num_N]
-			turxy_cnt = turxy_cnt + 1
-			num_N = num_N + 1
-
-			num_N_Center_xyz_T = num_N_Center_TRBL[InductorSideType.Top.value]
-			num_N_Center_xyz_B = num_N_Center_TRBL[InductorSideType.Bottom.value]
-
-			points_T = pointList[InductorSideType.Top.value]
-			points_B = pointList[InductorSideType.Bottom.value]
-			points_R = pointList[InductorSideType.Right.value]
-			points_L = pointList[InductorSideType.Left.value]
-
-			points_T_start = points_T[InductorSideType.Start.value]
-			points_T_end = points_T[InductorSideType.End.value]
-
-			points_B_start = points_B[InductorSideType.Start.value]
-			points_B_end = points_B[InductorSideType.End.value]
-
-			points_R_start = points_R[InductorSideType.Start.value]
-			points_R_end = points_R[InductorSideType.End.value]
-
-			points_L_start = points_L[InductorSideType.Start.value]
-			points_L_end = points_L[InductorSideType.End.value]
-
-			# Right Side
-			xy_point = (points_R_end[0], points_R_end[1])
-			xy_list.append(xy_point)
-			xy_cnt = xy_cnt + 1
-			xy_point = (points_R_start[0], points_R_start[1])
-			xy_list.append(xy_point)
-			xy_cnt = xy_cnt + 1
-			points = [(xy_list[xy_cnt-2][0]-self.parameters.W/2.0, xy_list[xy_cnt-2][1]), (xy_list[xy_cnt-1][0]-self.parameters.W/2.0, xy_list[xy_cnt-1][1])]
-			path = gdspy.FlexPath(points, self.parameters.W, **TOP_METAL_LAYER)
-			unitCell.add(path)
-
-
-			if num_N == 1:
-				# VIA
-				xy_point = (points_R_end[0] - self.parameters.W/2.0, points_R_end[1])
-				via = gdspy.Rectangle((xy_point[0]-VIA_SIZE/2.0, xy_point[1]-VIA_SIZE/2.0), (xy_point[0]+VIA_SIZE/2.0, xy_point[1]+VIA_SIZE/2.0), **TOP_VIA_LAYER)
-				unitCell.add(via)
-				via = gdspy.Rectangle((xy_point[0]-VIA_MAT_SIZE/2.0, xy_point[1]-VIA_MAT_SIZE/2.0), (xy_point[0]+VIA_MAT_SIZE/2.0, xy_point[1]+VIA_MAT_SIZE/2.0), **TOP_METAL_LAYER)
-				unitCell.add(via)
-				via = gdspy.Rectangle((xy_point[0]-VIA_MAT_SIZE/2.0, xy_point[1]-VIA_MAT_SIZE/2.0), (xy_point[0]+VIA_MAT_SIZE/2.0, xy_point[1]+VIA_MAT_SIZE/2.0), **UNDER_METAL_LAYER)
-				unitCell.add(via)
-				start_VIA_point = (points_R_end[0], points_R_end[1])
-			elif num_N == self.parameters.N:
-				# Terminate Tap
-				xy_point = (start_VIA_point[0], points_R_end[1] - self.parameters.GuardRing_S/2.0)
-				points = [(start_VIA_point[0]-self.parameters.W/2.0, start_VIA_point[1]), (xy_point[0]-self.parameters.W/2.0, xy_point[1])]
-				path = gdspy.FlexPath(points, self.parameters.W, **UNDER_METAL_LAYER)
-				unitCell.add(path)
-
-				
-			# Upper Side
-			xy_point = (points_T_end[0] + self.parameters.W/2.0, points_T_end[1])
-			xy_list.append(xy_point)
-			xy_cnt = xy_cnt + 1
-			xy_point = (points_T_start[0] - self.parameters.W/2.0, points_T_start[1])
-			xy_list.append(xy_point)
-			xy_cnt = xy_cnt + 1
-			points = [(xy_list[xy_cnt-2][0]-self.parameters.W/2.0, xy_list[xy_cnt-2][1]), (xy_list[xy_cnt-1][0]-self.parameters.W/2.0, xy_list[xy_cnt-1][1])]
-			path = gdspy.FlexPath(points, self.parameters.W, **TOP_METAL_LAYER)
-			unitCell.add(path)
-
-			# Left Side
-			xy_point = (points_L_end[0], points_L_end[1])
-			xy_list.append(xy_point)
-			xy_cnt = xy_cnt + 1
-			xy_point = (points_L_start[0], points_L_start[1] - self.parameters.S - self.parameters.W)
-			xy_list.append(xy_point)
-			xy_cnt = xy_cnt + 1
-			points = [(xy_list[xy_cnt-2][0]-self.parameters.W/2.0, xy_list[xy_cnt-2][1]), (xy_list[xy_cnt-1][0]-self.parameters.W/2.0, xy_list[xy_cnt-1][1])]
-			path = gdspy.FlexPath(points, self.parameters.W, **TOP_METAL_LAYER)
-			unitCell.add(path)
-			
-			# Bottom Side
-			if num_N != self.parameters.N:
-				xy_point = (points_B_start[0] + self.parameters.S + self.parameters.W + self.parameters.W/2.0, points_B_start[1] - self.parameters.S - self.parameters.W)
-				xy_list.append(xy_point)
-				xy_cnt = xy_cnt + 1
-				xy_point = (points_B_end[0] - self.parameters.W/2.0, points_B_end[1] - self.parameters.S - self.parameters.W)
-				xy_list.append(xy_point)
-				xy_cnt = xy_cnt + 1
-				points = [(xy_list[xy_cnt-2][0]-self.parameters.W/2.0, xy_list[xy_cnt-2][1]), (xy_list[xy_cnt-1][0]-self.parameters.W/2.0, xy_list[xy_cnt-1][1])]
-				path = gdspy.FlexPath(points, self.parameters.W, **TOP_METAL_LAYER)
-				unitCell.add(path)
-
-
-
-		# Terminate Tap
-		xy_point = (points_L_start[0], points_L_start[1] - self.parameters.GuardRing_S/2.0)
-		xy_list.append(xy_point)
-		xy_cnt = xy_cnt + 1
-		points = [(xy_list[xy_cnt-2][0]-self.parameters.W/2.0, xy_list[xy_cnt-2][1]), (xy_list[xy_cnt-1][0]-self.parameters.W/2.0, xy_list[xy_cnt-1][1])]
-		path = gdspy.FlexPath(points, self.parameters.W, **TOP_METAL_LAYER)
-		unitCell.add(path)
-
-
-
-		xy_point = (0, 0)
-		xy_list.append(xy_point)
-		xy_cnt = xy_cnt + 1
-		xy_point = (self.parameters.GuardRing_L, 0)
-		xy_list.append(xy_point)
-		xy_cnt = xy_cnt + 1
-		points = [(xy_list[xy_cnt-1][0]-self.parameters.W/2.0, xy_list[xy_cnt-1][1]), (xy_list[xy_cnt-2][0]-self.parameters.W/2.0, xy_list[xy_cnt-2][1])]
-		path = gdspy.FlexPath(points, self.parameters.W, **TOP_METAL_LAYER)
-		unitCell.add(path)
-
-		xy_point = (self.parameters.GuardRing_L, self.parameters.GuardRing_L)
-		xy_list.append(xy_point)
-		xy_cnt = xy_cnt + 1
-		points = [(xy_list[xy_cnt-1][0]-self.parameters.W/2.0, xy_list[xy_cnt-1][1]+self.parameters.W/2.0), (xy_list[xy_cnt-2][0]-self.parameters.W/2.0, xy_list[xy_cnt-2][1]-self.parameters.W/2.0)]
-		path = gdspy.FlexPath(points, self.parameters.W, **TOP_METAL_LAYER)
-		unitCell.add(path)
-
-		xy_point = (0, self.parameters.GuardRing_L)
-		xy_list.append(xy_point)
-		xy_cnt = xy_cnt + 1
-		points = [(xy_list[xy_cnt-1][0]-self.parameters.W/2.0, xy_list[xy_cnt-1][1]), (xy_list[xy_cnt-2][0]-self.parameters.W/2.0, xy_list[xy_cnt-2][1])]
-		path = gdspy.FlexPath(points, self.parameters.W, **TOP_METAL_LAYER)
-		unitCell.add(path)
-
-		points = [(xy_list[xy_cnt-1][0]-self.parameters.W/2.0, xy_list[xy_cnt-1][1]+self.parameters.W/2.0), (xy_list[xy_cnt-4][0]-self.parameters.W/2.0, xy_list[xy_cnt-4][1]-self.parameters.W/2.0)]
-		path = gdspy.FlexPath(points, self.parameters.W, **TOP_METAL_LAYER)
-		unitCell.add(path)
-
-		return (xy_list)
-
-
-	def generateInductorSymmetry4gds_path(self, unitCell):
-		linePositonList = self.parameters.createLineInductorPositonList()
-		num_N_CenterList = self.parameters.calCenterPositonList()
-		#lineNum = linePositonList.len()
-		turn_cnt = 0
-		num_N = 0
-		xy_cnt = 1
-		xy_list = []
-		xy_list.append(ORIGIN_XY)
-		cross_L = self.parameters.W + self.parameters.S
-		cross_L_half = cross_L / 2.0
-
-
-		for pointList in linePositonList:
-			num_N_Center_TRBL = num_N_CenterList[num_N]
-			turn_cnt = turn_cnt + 1
-			num_N = num_N + 1
-
-			num_N_Center_xyz_T = num_N_Center_TRBL[InductorSideType.Top.value]
-			num_N_Center_xyz_B = num_N_Center_TRBL[InductorSideType.Bottom.value]
-			points_T_X_cross_start = num_N_Center_xyz_T[0] - cross_L_half
-			points_T_X_cross_end = num_N_Center_xyz_T[0] + cross_L_half
-			points_B_X_cross_start = num_N_Center_xyz_B[0] + cross_L_half
-			points_B_X_cross_end = num_N_Center_xyz_B[0] - cross_L_half
-
-			points_T = pointList[InductorSideType.Top.value]
-			points_B = pointList[InductorSideType.Bottom.value]
-			points_R = pointList[InductorSideType.Right.value]
-			points_L = pointList[InductorSideType.Left.value]
-
-			points_T_start = points_T[InductorSideType.Start.value]
-			points_T_end = points_T[InductorSideType.End.value]
+	def getNodeName(self, node):
+		if self.node_via[node]:
+			return "NV%d" % self.node_ids[node]
+		return "N%d" % self.node_ids[node]
+
+	def getNodeArray(self):
+		return np.array(self.node_xyz, dtype=np.float64).reshape(-1, 3)
+
+	def getSegmentArray(self):
+		return np.array(self.seg_nodes, dtype=np.int64).reshape(-1, 2)
+
+	def getSegmentPointList(self):
+		xyz = self.node_xyz
+		return [((xyz[n1*3], xyz[n1*3+1], xyz[n1*3+2]), (xyz[n2*3], xyz[n2*3+1], xyz[n2*3+2])) for n1, n2 in zip(self.seg_nodes[0::2], self.seg_nodes[1::2])]
+
+	def renderNodes(self):
+		xyz = self.node_xyz
+		return "".join(['%s x=%f y=%f z=%f \n' % (self.getNodeName(i), xyz[i*3], xyz[i*3+1], xyz[i*3+2]) for i in range(len(self.node_ids))])
+
+	def renderSegments(self, mesh=None):
+		# mesh : (nhinc, nwinc) arrays of calMesh, None : .Default of the header
+		node_names = [self.getNodeName(i) for i in range(len(self.node_ids))]
+		if mesh is None:
+			return "".join(['E%d %s %s rho=%s  H=%f W=%f \n' % (i+1, node_names[n1], node_names[n2], self.rho_str[rho], H, W)
+				for i, (n1, n2, H, W, rho) in enumerate(zip(self.seg_nodes[0::2], self.seg_nodes[1::2], self.seg_H, self.seg_W, self.seg_rho))])
+		return "".join(['E%d %s %s rho=%s  H=%f W=%f nhinc=%d nwinc=%d \n' % (i+1, node_names[n1], node_names[n2], self.rho_str[rho], H, W, nhinc, nwinc)
+			for i, (n1, n2, H, W, rho, nhinc, nwinc) in enumerate(zip(self.seg_nodes[0::2], self.seg_nodes[1::2], self.seg_H, self.seg_W, self.seg_rho,
+				mesh[0].tolist(), mesh[1].tolist()))])
+
+	def calMesh(self, freq, ratio=MESH_SKIN_RATIO, max_inc=MESH_MAX_INC):
+		# (nhinc, nwinc) of every segment : odd filament counts whose edge filaments are no thicker than the skin depth at freq
+		delta = calSkinDepth(np.array(self.seg_rho), freq) * ratio
+		mesh = []
+		for size in (np.array(self.seg_H), np.array(self.seg_W)):
+			inc = np.ceil(size / delta - 1e-9).astype(np.int64)
+			inc = inc + (inc % 2 == 0)
+			mesh.append(np.clip(inc, 1, max_inc | 1))
+		return tuple(mesh)
+
+	def splitSegments(self, max_length):
+		# Copy with every planar segment longer than max_length split into equal pieces, the added nodes come after the original ones
+		netlist = HenryNetlist(self.rho)
+		xyz = self.getNodeArray()
+		for i in range(len(self.node_ids)):
+			netlist.addNode(xyz[i][0], xyz[i][1], xyz[i][2], via=bool(self.node_via[i]))
+		for rho_value, rho in self.rho_str.items():
+			netlist.rho_str[rho_value] = rho
+		for (n1, n2), H, W, rho in zip(self.getSegmentArray().tolist(), self.seg_H, self.seg_W, self.seg_rho):
+			pieces = 1
+			if xyz[n1][2] == xyz[n2][2]:
+				pieces = max(1, int(np.ceil(np.linalg.norm(xyz[n2] - xyz[n1]) / max_length - 1e-9)))
+			node_from = n1
+			for piece in range(1, pieces):
+				point = xyz[n1] + (xyz[n2] - xyz[n1]) * piece / pieces
+				node_to = netlist.addNode(point[0], point[1], point[2])
+				netlist.addSegment(node_from, node_to, H, W, netlist.rho_str[rho])
+				node_from = node_to
+			netlist.addSegment(node_from, n2, H, W, netlist.rho_str[rho])
+		for node in self.external_nodes:
+			netlist.addExternal(node)
+		return netlist
+
+
+
+
+def calResistivity(rho_sheet, T):
+	# ohm/sq of a T um thick metal -> ohm*um
+	return rho_sheet * T
+
+def calSkinDepth(rho, freq):
+	# rho : ohm*um as written on the FastHenry segments (.units um) -> um
+	return np.sqrt(rho * 1e-6 / (np.pi * freq * MU_0)) * 1e6
+
+def calViaArray(x_lo, y_lo, x_hi, y_hi):
+	# Cuts fitting in a via landing : (columns, rows, center of the first cut)
+	pitch = VIA_SIZE + VIA_SPACE
+	columns = max(1, int((x_hi - x_lo - 2.0*VIA_ENCLOSURE + VIA_SPACE) / pitch + 1e-9))
+	rows = max(1, int((y_hi - y_lo - 2.0*VIA_ENCLOSURE + VIA_SPACE) / pitch + 1e-9))
+	origin = ((x_lo + x_hi)/2.0 - (columns - 1)*pitch/2.0, (y_lo + y_hi)/2.0 - (rows - 1)*pitch/2.0)
+	return (columns, rows, origin)
+
+
+
+
+class GdsCellSink():
+	# gdspy Cell behind the addPath / addRectangle / reference interface of GdsStreamWriter
+	def __init__(self, cell, lib=None):
+		self.cell = cell
+		self.lib = lib
+
+	def addPath(self, points, width, layer=0, datatype=0):
+		import gdspy
+		self.cell.add(gdspy.FlexPath(points, width, layer=layer, datatype=datatype))
+		return
 
-			points_B_start = points_B[InductorSideType.Start.value]
-			points_B_end = points_B[InductorSideType.End.value]
+	def addRectangle(self, point_1, point_2, layer=0, datatype=0):
+		import gdspy
+		self.cell.add(gdspy.Rectangle(point_1, point_2, layer=layer, datatype=datatype))
+		return
 
-			points_R_start = points_R[InductorSideType.Start.value]
-			points_R_end = points_R[InductorSideType.End.value]
+	def addCellReference(self, name, origin=(0, 0)):
+		import gdspy
+		self.cell.add(gdspy.CellReference(self.lib.cells[name], origin))
+		return
 
-			points_L_start = points_L[InductorSideType.Start.value]
-			points_L_end = points_L[InductorSideType.End.value]
+	def addCellArray(self, name, columns, rows, spacing, origin=(0, 0)):
+		import gdspy
+		self.cell.add(gdspy.CellArray(self.lib.cells[name], columns, rows, spacing, origin))
+		return
 
-			if num_N == 1:
-				# Start Tap
-				xy_point = (num_N_Center_xyz_B[0], num_N_Center_xyz_B[1]+self.parameters.R/2.0)
-				xy_list.append(xy_point)
-				xy_cnt = xy_cnt + 1
-				xy_point = (num_N_Center_xyz_B[0], num_N_Center_xyz_B[1])
-				xy_list.append(xy_point)
-				xy_cnt = xy_cnt + 1
-				points = [(xy_list[xy_cnt-2][0]-self.parameters.W/2.0, xy_list[xy_cnt-2][1]), (xy_list[xy_cnt-1][0]-self.parameters.W/2.0, xy_list[xy_cnt-1][1])]
-				path = gdspy.FlexPath(points, self.parameters.W, **TOP_METAL_LAYER)
-				unitCell.add(path)
-
-				xy_point = (points_B_start[0], points_B_start[1])
-				xy_list.append(xy_point)
-				xy_cnt = xy_cnt + 1
-				xy_point = (points_L_start[0], points_L_start[1])
-				xy_list.append(xy_point)
-				xy_cnt = xy_cnt + 1
-				points = [(xy_list[xy_cnt-2][0]-self.parameters.W/2.0, xy_list[xy_cnt-2][1]), (xy_list[xy_cnt-1][0]-self.parameters.W/2.0, xy_list[xy_cnt-1][1])]
-				path = gdspy.FlexPath(points, self.parameters.W, **TOP_METAL_LAYER)
-				unitCell.add(path)
 
-			elif num_N == self.parameters.N and num_N % 2 == 0:
-				# Skip for Tap
-				xy_point = (points_B_start[0], points_B_start[1])
-				xy_list.append(xy_point)
-				xy_cnt = xy_cnt + 1
-				xy_point = (points_L_start[0], points_L_start[1])
-				xy_list.append(xy_point)
-				xy_cnt = xy_cnt + 1
-			else:
-				# Cross
-				xy_point = (points_B_start[0], points_B_start[1])
-				xy_list.append(xy_point)
-				xy_cnt = xy_cnt + 1
-				xy_point = (points_B_X_cross_start, points_B_start[1])
-				xy_list.append(xy_point)
-				xy_cnt = xy_cnt + 1
-				points = [(xy_list[xy_cnt-2][0]-self.parameters.W/2.0, xy_list[xy_cnt-2][1]), (xy_list[xy_cnt-1][0]-self.parameters.W/2.0, xy_list[xy_cnt-1][1])]
-				path = gdspy.FlexPath(points, self.parameters.W, **TOP_METAL_LAYER)
-				unitCell.add(path)
-
-				xy_point = (points_B_X_cross_end, points_B_start[1])
-				xy_list.append(xy_point)
-				xy_cnt = xy_cnt + 1
-				xy_point = (points_L_start[0], points_L_start[1])
-				xy_list.append(xy_point)
-				xy_cnt = xy_cnt + 1
-				points = [(xy_list[xy_cnt-2][0]-self.parameters.W/2.0, xy_list[xy_cnt-2][1]), (xy_list[xy_cnt-1][0]-self.parameters.W/2.0, xy_list[xy_cnt-1][1])]
-				path = gdspy.FlexPath(points, self.parameters.W, **TOP_METAL_LAYER)
-				unitCell.add(path)
 
-				if num_N % 2 == 0:
-					# VIA
-					xy_point = (points_B_X_cross_end, points_B_start[1])
-					via = gdspy.Rectangle((xy_point[0]-VIA_SIZE/2.0, xy_point[1]-VIA_SIZE/2.0), (xy_point[0]+VIA_SIZE/2.0, xy_point[1]+VIA_SIZE/2.0), **TOP_VIA_LAYER)
-					unitCell.add(via)
-					via = gdspy.Rectangle((xy_point[0]-VIA_MAT_SIZE/2.0, xy_point[1]-VIA_MAT_SIZE/2.0), (xy_point[0]+VIA_MAT_SIZE/2.0, xy_list[xy_cnt-1][1]+VIA_MAT_SIZE/2.0), **TOP_METAL_LAYER)
-					unitCell.add(via)
-					via = gdspy.Rectangle((xy_point[0]-VIA_MAT_SIZE/2.0, xy_point[1]-VIA_MAT_SIZE/2.0), (xy_point[0]+VIA_MAT_SIZE/2.0, xy_list[xy_cnt-1][1]+VIA_MAT_SIZE/2.0), **UNDER_METAL_LAYER)
-					unitCell.add(via)
 
-				else:
-					# VIA
-					xy_point = (points_B_X_cross_start, points_B_start[1])
-					via = gdspy.Rectangle((xy_point[0]-VIA_SIZE/2.0, xy_point[1]-VIA_SIZE/2.0), (xy_point[0]+VIA_SIZE/2.0, xy_point[1]+VIA_SIZE/2.0), **TOP_VIA_LAYER)
-					unitCell.add(via)
-					via = gdspy.Rectangle((xy_point[0]-VIA_MAT_SIZE/2.0, xy_point[1]-VIA_MAT_SIZE/2.0), (xy_point[0]+VIA_MAT_SIZE/2.0, xy_list[xy_cnt-1][1]+VIA_MAT_SIZE/2.0), **TOP_METAL_LAYER)
-					unitCell.add(via)
-					via = gdspy.Rectangle((xy_point[0]-VIA_MAT_SIZE/2.0, xy_point[1]-VIA_MAT_SIZE/2.0), (xy_point[0]+VIA_MAT_SIZE/2.0, xy_list[xy_cnt-1][1]+VIA_MAT_SIZE/2.0), **UNDER_METAL_LAYER)
-					unitCell.add(via)
-					# Inner Connection
-					points = [(xy_list[xy_cnt-2][0]-self.parameters.W/2.0, xy_list[xy_cnt-2][1]), (xy_list[xy_cnt-11][0]-self.parameters.W/2.0, xy_list[xy_cnt-11][1])]
-					path = gdspy.FlexPath(points, self.parameters.W, **TOP_METAL_LAYER)
-					unitCell.add(path)
-					points = [(xy_list[xy_cnt-10][0]-self.parameters.W/2.0, xy_list[xy_cnt-10][1]), (xy_list[xy_cnt-3][0]-self.parameters.W/2.0, xy_list[xy_cnt-3][1])]
-					path = gdspy.FlexPath(points, self.parameters.W, **UNDER_METAL_LAYER)
-					unitCell.add(path)
+class GdsBoundsSink():
+	# Bounding box of every layer drawn through the addPath / addRectangle interface
+	def __init__(self):
+		self.bounds_Dict = {}		# (layer, datatype) : [x_lo, y_lo, x_hi, y_hi]
 
+	def addBounds(self, points, layer, datatype):
+		x_lo, y_lo = np.min(points, axis=0)
+		x_hi, y_hi = np.max(points, axis=0)
+		bounds = self.bounds_Dict.setdefault((layer, datatype), [x_lo, y_lo, x_hi, y_hi])
+		bounds[:] = [min(bounds[0], x_lo), min(bounds[1], y_lo), max(bounds[2], x_hi), max(bounds[3], y_hi)]
+		return
 
+	def addPath(self, points, width, layer=0, datatype=0):
+		points = np.array(points, dtype=np.float64)
+		for point_1, point_2 in zip(points[:-1], points[1:]):
+			vector = point_2 - point_1
+			length = np.hypot(vector[0], vector[1])
+			if length == 0.0:
+				continue
+			normal = np.array((-vector[1], vector[0])) / length * width / 2.0
+			self.addBounds((point_1 + normal, point_1 - normal, point_2 + normal, point_2 - normal), layer, datatype)
+		return
 
-			xy_point = (points_T_start[0], points_T_start[1])
-			xy_list.append(xy_point)
-			xy_cnt = xy_cnt + 1
-			points = [(xy_list[xy_cnt-2][0]-self.parameters.W/2.0, xy_list[xy_cnt-2][1]-self.parameters.W/2.0), (xy_list[xy_cnt-1][0]-self.parameters.W/2.0, xy_list[xy_cnt-1][1]+self.parameters.W/2.0)]
-			path = gdspy.FlexPath(points, self.parameters.W, **TOP_METAL_LAYER)
-			unitCell.add(path)
+	def addRectangle(self, point_1, point_2, layer=0, datatype=0):
+		self.addBounds((point_1, point_2), layer, datatype)
+		return
 
+	def addCellReference(self, name, origin=(0, 0)):
+		return		# VIA cuts stay inside their landing mats
 
+	def addCellArray(self, name, columns, rows, spacing, origin=(0, 0)):
+		return
 
-			if num_N == self.parameters.N and num_N % 2 == 1:
-				# Skip for Tap
-				xy_point = (points_R_start[0], points_R_start[1])
-				xy_list.append(xy_point)
-				xy_cnt = xy_cnt + 1
-			else:
-				# Cross
-				xy_point = (points_T_X_cross_start, points_T_start[1])
-				xy_list.append(xy_point)
-				xy_cnt = xy_cnt + 1
-				points = [(xy_list[xy_cnt-2][0]-self.parameters.W/2.0, xy_list[xy_cnt-2][1]), (xy_list[xy_cnt-1][0]-self.parameters.W/2.0, xy_list[xy_cnt-1][1])]
-				path = gdspy.FlexPath(points, self.parameters.W, **TOP_METAL_LAYER)
-				unitCell.add(path)
+	def getBounds(self, layer=None):
+		bounds_List = [bounds for key, bounds in self.bounds_Dict.items() if layer is None or key == (layer["layer"], layer["datatype"])]
+		if len(bounds_List) == 0:
+			return None
+		bounds_Array = np.array(bounds_List)
+		return [float(bounds_Array[:, 0].min()), float(bounds_Array[:, 1].min()), float(bounds_Array[:, 2].max()), float(bounds_Array[:, 3].max())]
 
 
-				xy_point = (points_T_X_cross_end, points_T_start[1])
-				xy_list.append(xy_point)
-				xy_cnt = xy_cnt + 1
 
-				xy_point = (points_R_start[0], points_R_start[1])
-				xy_list.append(xy_point)
-				xy_cnt = xy_cnt + 1
-				points = [(xy_list[xy_cnt-2][0]-self.parameters.W/2.0, xy_list[xy_cnt-2][1]), (xy_list[xy_cnt-1][0]-self.parameters.W/2.0, xy_list[xy_cnt-1][1])]
-				path = gdspy.FlexPath(points, self.parameters.W, **TOP_METAL_LAYER)
-				unitCell.add(path)
 
-				if num_N % 2 == 0:
-					# VIA
-					xy_point = (points_T_X_cross_end, points_T_start[1])
-					via = gdspy.Rectangle((xy_point[0]-VIA_SIZE/2.0, xy_point[1]-VIA_SIZE/2.0), (xy_point[0]+VIA_SIZE/2.0, xy_point[1]+VIA_SIZE/2.0), **TOP_VIA_LAYER)
-					unitCell.add(via)
-					via = gdspy.Rectangle((xy_point[0]-VIA_MAT_SIZE/2.0, xy_point[1]-VIA_MAT_SIZE/2.0), (xy_point[0]+VIA_MAT_SIZE/2.0, xy_list[xy_cnt-1][1]+VIA_MAT_SIZE/2.0), **TOP_METAL_LAYER)
-					unitCell.add(via)
-					via = gdspy.Rectangle((xy_point[0]-VIA_MAT_SIZE/2.0, xy_point[1]-VIA_MAT_SIZE/2.0), (xy_point[0]+VIA_MAT_SIZE/2.0, xy_list[xy_cnt-1][1]+VIA_MAT_SIZE/2.0), **UNDER_METAL_LAYER)
-					unitCell.add(via)
-					if num_N == self.parameters.N:
-						# Inner Connection
-						points = [(xy_list[xy_cnt-3][0]-self.parameters.W/2.0, xy_list[xy_cnt-3][1]), (xy_list[xy_cnt-8][0]-self.parameters.W/2.0, xy_list[xy_cnt-8][1])]
-						path = gdspy.FlexPath(points, self.parameters.W, **TOP_METAL_LAYER)
-						unitCell.add(path)
-						points = [(xy_list[xy_cnt-9][0]-self.parameters.W/2.0, xy_list[xy_cnt-9][1]), (xy_list[xy_cnt-2][0]-self.parameters.W/2.0, xy_list[xy_cnt-2][1])]
-						path = gdspy.FlexPath(points, self.parameters.W, **UNDER_METAL_LAYER)
-						unitCell.add(path)
-					else:
-						# Inner Connection
-						points = [(xy_list[xy_cnt-3][0]-self.parameters.W/2.0, xy_list[xy_cnt-3][1]), (xy_list[xy_cnt-10][0]-self.parameters.W/2.0, xy_list[xy_cnt-10][1])]
-						path = gdspy.FlexPath(points, self.parameters.W, **TOP_METAL_LAYER)
-						unitCell.add(path)
-						points = [(xy_list[xy_cnt-11][0]-self.parameters.W/2.0, xy_list[xy_cnt-11][1]), (xy_list[xy_cnt-2][0]-self.parameters.W/2.0, xy_list[xy_cnt-2][1])]
-						path = gdspy.FlexPath(points, self.parameters.W, **UNDER_METAL_LAYER)
-						unitCell.add(path)
-				else:
+class InductorGenerator():
+	def __init__(self, shapeType, R, S, W, N, T, GuardRing_S, GuardRing_W, out_dir=None, profiler=None):
+		self.profiler = profiler or NULL_PROFILER	# StageProfiler of inductor_profile
+		with self.profiler.stage("params"):
+			self.parameters = InductorParams(R, S, W, N, T, GuardRing_S, GuardRing_W, SHAPE_SIDES[shapeType])
+		self.dt_now = datetime.datetime.now()
+		self.shapeType = shapeType
+		self.out_dir = out_dir
+		self.via_cell = False			# VIA cell references instead of flat via rectangles
+		self.henry_body = None			# (netlist, Tap) Cal by getHenryBody()
+		self.henry_netlist = None
+		self.henry_results = None		# Last FastHenryRunner results of runHenry() / generateInductorBands4henry()
+
+
+	def getDesignDict(self):
+		# Everything that changes the output files
+		return {
+			"shape": self.shapeType.name,
+			"R": float(self.parameters.R),
+			"S": float(self.parameters.S),
+			"W": float(self.parameters.W),
+			"N": int(self.parameters.N),
+			"T": float(self.parameters.T),
+			"GuardRing_S": float(self.parameters.GuardRing_S),
+			"GuardRing_W": float(self.parameters.GuardRing_W),
+			"layers": [TOP_METAL_LAYER, TOP_VIA_LAYER, UNDER_METAL_LAYER],
+			"via": [VIA_SIZE, VIA_MAT_SIZE],
+			"rho": self.getHenryRho(),
+			"freq": [MIN_FREQ, MAX_FREQ],
+		}
+
+	def getHenryRho(self):
+		# ohm*um written on the FastHenry segments, the sheet resistance RHO_STR stays the same over T
+		return "%g" % calResistivity(float(RHO_STR), self.parameters.T)
+
+	def calDesignKey(self):
+		design_str = json.dumps(self.getDesignDict(), sort_keys=True, separators=(",", ":"))
+		return hashlib.sha1(design_str.encode("utf-8")).hexdigest()
+
+	def getDefaultFileName(self):
+		return "inductor_" + self.shapeType.name + "_" + self.calDesignKey()[:16]
+
+	def getFileName(self, ext, file_name=None):
+		if file_name is None:
+			file_name = self.getDefaultFileName()
+		if self.out_dir is not None:
+			os.makedirs(self.out_dir, exist_ok=True)
+			file_name = os.path.join(self.out_dir, file_name)
+		return file_name + ext
+
+	def writeFileAtomic(self, file_name, write_func):
+		# Parallel runs of the same design never see a half written file
+		tmp_file_name = file_name + ".%d.tmp" % os.getpid()
+		with self.profiler.stage("write", file=os.path.basename(file_name)) as record:
+			write_func(tmp_file_name)
+			os.replace(tmp_file_name, file_name)
+			if self.profiler.enabled:
+				record["bytes"] = os.path.getsize(file_name)
+		return file_name
+
+	def generateInductor4gds(self, file_name=None, skip_existing=False, merge=False, stream=False, via_cell=False):
+		# merge : one polygon per layer instead of a FlexPath / Rectangle per segment
+		# stream : GDSII records written while the geometry is produced (gds_stream), no gdspy library
+		# via_cell : VIA cell arrays filling every via landing instead of one flat cut
+		if merge and stream:
+			raise ValueError("merge needs the gdspy library, it can not be streamed")
+		if file_name is None and (merge or via_cell):
+			file_name = self.getDefaultFileName() + ("_merged" if merge else "") + ("_via" if via_cell else "")
+		self.via_cell = via_cell
+		gds_file_name = self.getFileName(".gds", file_name)
+		if skip_existing and os.path.exists(gds_file_name):
+			return gds_file_name
+
+		with self.profiler.stage("gds", merge=merge, stream=stream, via_cell=via_cell):
+			if stream:
+				self.writeFileAtomic(gds_file_name, self.writeInductor4gdsStream)
+				return gds_file_name
+
+			# Cells kept out of gdspy.current_library : no global state between designs / threads
+			with self.profiler.stage("gds_import"):
+				import gdspy
+			with self.profiler.stage("gds_build"):
+				lib = gdspy.GdsLibrary()
+				if via_cell:
+					viaCell = lib.add(gdspy.Cell(VIA_CELL_NAME, exclude_from_current=True)).cells[VIA_CELL_NAME]
+					self.generateViaCell4gds(GdsCellSink(viaCell))
+				unitCell = lib.add(gdspy.Cell(CELL_NAME, exclude_from_current=True)).cells[CELL_NAME]
+				self.generateInductorCell4gds(GdsCellSink(unitCell, lib))
+
+			if merge:
+				with self.profiler.stage("gds_merge"):
+					self.mergeCell4gds(unitCell)
+
+			top = gdspy.Cell("TOP", exclude_from_current=True)
+			top.add(unitCell)
+			lib.add(top)
+			self.writeFileAtomic(gds_file_name, lib.write_gds)
+
+		return gds_file_name
+
+	def writeInductor4gdsStream(self, gds_file_name):
+		from gds_stream import GdsStreamWriter
+		with open(gds_file_name, 'wb') as f:
+			with GdsStreamWriter(f) as writer:
+				if self.via_cell:
+					writer.beginCell(VIA_CELL_NAME)
+					self.generateViaCell4gds(writer)
+					writer.endCell()
+				writer.beginCell(CELL_NAME)
+				self.generateInductorCell4gds(writer)
+				writer.endCell()
+				writer.beginCell("TOP")
+				writer.addCellReference(CELL_NAME)
+				writer.endCell()
+		return gds_file_name
+
+	def generateInductorCell4gds(self, unitCell):
+		# unitCell : addPath / addRectangle sink (GdsCellSink, GdsStreamWriter)
+		# The layout only serializes the HenryNetlist : wires and vias are exactly the FastHenry segments
+		if not self.getHenryBody():
+			return unitCell
+		netlist = self.henry_netlist
+		xyz = netlist.node_xyz
+		external = set(netlist.external_nodes)
+		wire_List = []				# (node_1, node_2, W, unit vector, z) of every planar segment, None for VIA
+		node_wire_Dict = {}			# node : [(wire index, unit vector away from the node)]
+		for node_1, node_2, W in zip(netlist.seg_nodes[0::2], netlist.seg_nodes[1::2], netlist.seg_W):
+			x_1, y_1, z_1 = xyz[node_1*3:node_1*3+3]
+			x_2, y_2, z_2 = xyz[node_2*3:node_2*3+3]
+			length = ((x_2 - x_1)**2 + (y_2 - y_1)**2) ** 0.5
+			if z_1 != z_2 or length == 0.0:
+				wire_List.append((node_1, node_2, W, None, z_1 != z_2))
+				continue
+			unit = ((x_2 - x_1) / length, (y_2 - y_1) / length)
+			node_wire_Dict.setdefault(node_1, []).append((len(wire_List), unit))
+			node_wire_Dict.setdefault(node_2, []).append((len(wire_List), (-unit[0], -unit[1])))
+			wire_List.append((node_1, node_2, W, unit, z_1))
+
+		for index, (node_1, node_2, W, unit, z) in enumerate(wire_List):
+			if unit is None:
+				if z:
 					# VIA
-					xy_point = (points_T_X_cross_start, points_T_start[1])
-					via = gdspy.Rectangle((xy_point[0]-VIA_SIZE/2.0, xy_point[1]-VIA_SIZE/2.0), (xy_point[0]+VIA_SIZE/2.0, xy_point[1]+VIA_SIZE/2.0), **TOP_VIA_LAYER)
-					unitCell.add(via)
-					via = gdspy.Rectangle((xy_point[0]-VIA_MAT_SIZE/2.0, xy_point[1]-VIA_MAT_SIZE/2.0), (xy_point[0]+VIA_MAT_SIZE/2.0, xy_list[xy_cnt-1][1]+VIA_MAT_SIZE/2.0), **TOP_METAL_LAYER)
-					unitCell.add(via)
-					via = gdspy.Rectangle((xy_point[0]-VIA_MAT_SIZE/2.0, xy_point[1]-VIA_MAT_SIZE/2.0), (xy_point[0]+VIA_MAT_SIZE/2.0, xy_list[xy_cnt-1][1]+VIA_MAT_SIZE/2.0), **UNDER_METAL_LAYER)
-					unitCell.add(via)
-
-
-
-
-
-			if num_N == 1:
-				points = [(xy_list[xy_cnt-1][0]-self.parameters.W/2.0, xy_list[xy_cnt-1][1]+self.parameters.W/2.0), (xy_list[xy_cnt-6][0]-self.parameters.W/2.0, xy_list[xy_cnt-6][1]-self.parameters.W/2.0)]
-				path = gdspy.FlexPath(points, self.parameters.W, **TOP_METAL_LAYER)
-				unitCell.add(path)
-			elif num_N == self.parameters.N:
-				points = [(xy_list[xy_cnt-1][0]-self.parameters.W/2.0, xy_list[xy_cnt-1][1]+self.parameters.W/2.0), (xy_list[xy_cnt-6][0]-self.parameters.W/2.0, xy_list[xy_cnt-6][1]-self.parameters.W/2.0)]
-				path = gdspy.FlexPath(points, self.parameters.W, **TOP_METAL_LAYER)
-				unitCell.add(path)
-			else:
-				points = [(xy_list[xy_cnt-1][0]-self.parameters.W/2.0, xy_list[xy_cnt-1][1]+self.parameters.W/2.0), (xy_list[xy_cnt-8][0]-self.parameters.W/2.0, xy_list[xy_cnt-8][1]-self.parameters.W/2.0)]
-				path = gdspy.FlexPath(points, self.parameters.W, **TOP_METAL_LAYER)
-				unitCell.add(path)
-
-
-			# Terminate Tap
-			if num_N == self.parameters.N and num_N % 2 == 0:
-				# Non Bottom
-				xy_point = (points_L_start[0], points_L_start[1] - self.parameters.GuardRing_S/2.0)
-				xy_list.append(xy_point)
-				xy_cnt = xy_cnt + 1
-				points = [(xy_list[xy_cnt-6][0]-self.parameters.W/2.0, xy_list[xy_cnt-6][1]), (xy_list[xy_cnt-1][0]-self.parameters.W/2.0, xy_list[xy_cnt-1][1])]
-				path = gdspy.FlexPath(points, self.parameters.W, **TOP_METAL_LAYER)
-				unitCell.add(path)
-
-				xy_point = (points_R_end[0], points_R_end[1] - self.parameters.GuardRing_S/2.0, points_R_end[2])
-				xy_list.append(xy_point)
-				xy_cnt = xy_cnt + 1
-				points = [(xy_list[xy_cnt-8][0]-self.parameters.W/2.0, xy_list[xy_cnt-8][1]), (xy_list[xy_cnt-1][0]-self.parameters.W/2.0, xy_list[xy_cnt-1][1])]
-				path = gdspy.FlexPath(points, self.parameters.W, **TOP_METAL_LAYER)
-				unitCell.add(path)
-			elif num_N == self.parameters.N and num_N % 2 == 1:
-				# Non Upper
-				xy_point = (points_L_end[0], points_L_end[1] + self.parameters.GuardRing_S/2.0)
-				xy_list.append(xy_point)
-				xy_cnt = xy_cnt + 1
-				points = [(xy_list[xy_cnt-3][0]-self.parameters.W/2.0, xy_list[xy_cnt-3][1]), (xy_list[xy_cnt-1][0]-self.parameters.W/2.0, xy_list[xy_cnt-1][1])]
-				path = gdspy.FlexPath(points, self.parameters.W, **TOP_METAL_LAYER)
-				unitCell.add(path)
-
-				xy_point = (points_R_start[0], points_R_start[1] + self.parameters.GuardRing_S/2.0, points_R_start[2])
-				xy_list.append(xy_point)
-				xy_cnt = xy_cnt + 1
-				points = [(xy_list[xy_cnt-8][0]-self.parameters.W/2.0, xy_list[xy_cnt-8][1]), (xy_list[xy_cnt-1][0]-self.parameters.W/2.0, xy_list[xy_cnt-1][1])]
-				path = gdspy.FlexPath(points, self.parameters.W, **TOP_METAL_LAYER)
-				unitCell.add(path)
-
-
-		xy_point = (0, 0)
-		xy_list.append(xy_point)
-		xy_cnt = xy_cnt + 1
-		xy_point = (self.parameters.GuardRing_L, 0)
-		xy_list.append(xy_point)
-		xy_cnt = xy_cnt + 1
-		points = [(xy_list[xy_cnt-1][0]-self.parameters.W/2.0, xy_list[xy_cnt-1][1]), (xy_list[xy_cnt-2][0]-self.parameters.W/2.0, xy_list[xy_cnt-2][1])]
-		path = gdspy.FlexPath(points, self.parameters.W, **TOP_METAL_LAYER)
-		unitCell.add(path)
-
-		xy_point = (self.parameters.GuardRing_L, self.parameters.GuardRing_L)
-		xy_list.append(xy_point)
-		xy_cnt = xy_cnt + 1
-		points = [(xy_list[xy_cnt-1][0]-self.parameters.W/2.0, xy_list[xy_cnt-1][1]+self.parameters.W/2.0), (xy_list[xy_cnt-2][0]-self.parameters.W/2.0, xy_list[xy_cnt-2][1]-self.parameters.W/2.0)]
-		path = gdspy.FlexPath(points, self.parameters.W, **TOP_METAL_LAYER)
-		unitCell.add(path)
-
-		xy_point = (0, self.parameters.GuardRing_L)
-		xy_list.append(xy_point)
-		xy_cnt = xy_cnt + 1
-		points = [(xy_list[xy_cnt-1][0]-self.parameters.W/2.0, xy_list[xy_cnt-1][1]), (xy_list[xy_cnt-2][0]-self.parameters.W/2.0, xy_list[xy_cnt-2][1])]
-		path = gdspy.FlexPath(points, self.parameters.W, **TOP_METAL_LAYER)
-		unitCell.add(path)
-
-		points = [(xy_list[xy_cnt-1][0]-self.parameters.W/2.0, xy_list[xy_cnt-1][1]+self.parameters.W/2.0), (xy_list[xy_cnt-4][0]-self.parameters.W/2.0, xy_list[xy_cnt-4][1]-self.parameters.W/2.0)]
-		path = gdspy.FlexPath(points, self.parameters.W, **TOP_METAL_LAYER)
-		unitCell.add(path)
-
+					self.addVia4gds(unitCell, xyz[node_1*3:node_1*3+2])
+				continue
+			start = self.calWireEnd4gds(node_1, index, W, unit, node_wire_Dict, external, -1.0)
+			end = self.calWireEnd4gds(node_2, index, W, unit, node_wire_Dict, external, 1.0)
+			unitCell.addPath([start, end], W, **(UNDER_METAL_LAYER if z < 0.0 else TOP_METAL_LAYER))
+		return unitCell
+
+	def calWireEnd4gds(self, node, index, W, unit, node_wire_Dict, external, sign):
+		# Square ends close the corners of straight wires, corners of a slanted wire are mitred, Taps and VIA ends of slanted wires stay flush
+		# sign : -1.0 start / 1.0 end of the wire along unit
+		x, y = self.henry_netlist.node_xyz[node*3:node*3+2]
+		if node in external:
+			return (x, y)
+		axis = unit[0] == 0.0 or unit[1] == 0.0
+		cap = W/2.0 if axis else 0.0
+		other_List = [other for other in node_wire_Dict[node] if other[0] != index]
+		if len(other_List) == 1:
+			other_index, other_unit = other_List[0]
+			other_axis = other_unit[0] == 0.0 or other_unit[1] == 0.0
+			if not (axis and other_axis):
+				# cos of the turn between this wire (into the node) and the other wire (away from the node)
+				cos_turn = sign * (unit[0] * other_unit[0] + unit[1] * other_unit[1])
+				cap = W/2.0 * min(((1.0 - cos_turn) / max(1.0 + cos_turn, 1e-12)) ** 0.5, 1.0)
+		return (x + sign * unit[0] * cap, y + sign * unit[1] * cap)
+
+	def mergeCell4gds(self, unitCell):
+		# Boolean union of every shape on the same layer
+		import gdspy
+		polygons_Dict = unitCell.get_polygons(by_spec=True)
+		unitCell.remove_polygons(lambda points, layer, datatype: True)
+		unitCell.remove_paths(lambda path: True)
+		unitCell.references = []		# VIA cells are flattened
+		for (layer, datatype), polygons in sorted(polygons_Dict.items()):
+			merged = gdspy.boolean(polygons, None, "or", layer=layer, datatype=datatype)
+			if merged is not None:
+				unitCell.add(merged)
+		return unitCell
+
+	def generateViaCell4gds(self, viaCell):
+		viaCell.addRectangle((-VIA_SIZE/2.0, -VIA_SIZE/2.0), (VIA_SIZE/2.0, VIA_SIZE/2.0), **TOP_VIA_LAYER)
+		return viaCell
+
+	def addVia4gds(self, unitCell, xy_point):
+		if self.via_cell:
+			return self.addViaArray4gds(unitCell, xy_point)
+		for layer, half_size, is_mat in GDS_VIA_TEMPLATE:
+			unitCell.addRectangle((xy_point[0]-half_size, xy_point[1]-half_size), (xy_point[0]+half_size, xy_point[1]+half_size), **layer)
 		return
 
-
-
-	def generateInductor4henry(self):
-		body_str = ""
-
-		if self.shapeType == InductorShapeType.spiral:
-			body_str = self.generateInductorSpiral4henry_wire()
-		elif self.shapeType == InductorShapeType.hexagon:
-			print("Not implementation\n")
-		elif self.shapeType == InductorShapeType.octagon:
-			print("Not implementation\n")
-		elif self.shapeType == InductorShapeType.symmetry:
-			body_str = self.generateInductorSymmetry4henry_wire()
+	def addViaArray4gds(self, unitCell, xy_point):
+		# Landing mats over the whole W x W crossing, cuts as one SREF / AREF of the VIA cell
+		half_size = max(VIA_MAT_SIZE, self.parameters.W)/2.0
+		for layer, mat_half_size, is_mat in GDS_VIA_TEMPLATE:
+			if is_mat:
+				unitCell.addRectangle((xy_point[0]-half_size, xy_point[1]-half_size), (xy_point[0]+half_size, xy_point[1]+half_size), **layer)
+		columns, rows, origin = calViaArray(xy_point[0]-half_size, xy_point[1]-half_size, xy_point[0]+half_size, xy_point[1]+half_size)
+		if columns == 1 and rows == 1:
+			unitCell.addCellReference(VIA_CELL_NAME, origin)
 		else:
-			print("Not implementation\n")
-
+			unitCell.addCellArray(VIA_CELL_NAME, columns, rows, (VIA_SIZE + VIA_SPACE, VIA_SIZE + VIA_SPACE), origin)
+		return
 
-		point_Line_List = body_str[2]
+	def getHenryOptions(self, freq=None, mesh=None, max_length=None):
+		# freq : (fmin, fmax[, ndec]) of .freq, None : MIN_FREQ / MAX_FREQ
+		# mesh : None : nhinc / nwinc of .Default, (nhinc, nwinc) : every segment, "adaptive" : per segment from the skin depth at fmax
+		# max_length : um, planar segments are split into pieces no longer than this
+		if freq is None:
+			freq = (MIN_FREQ, MAX_FREQ)
+		if len(freq) < 3:
+			freq = tuple(freq) + (HENRY_NDEC,)
+		if mesh is not None and mesh not in HENRY_MESHES:
+			mesh = [int(mesh[0]), int(mesh[1])]
+		if max_length is not None:
+			max_length = float(max_length)
+			if max_length <= 0.0:
+				raise ValueError("max_length must be positive")
+		return {
+			"freq": [value if isinstance(value, str) else "%.12g" % value for value in freq],
+			"mesh": mesh,
+			"max_length": max_length,
+		}
+
+	def getHenryFileName(self, henry_options):
+		# Content addressed name of a non default .freq / mesh
+		if henry_options == self.getHenryOptions():
+			return self.getDefaultFileName()
+		options_str = json.dumps(henry_options, sort_keys=True, separators=(",", ":"))
+		return self.getDefaultFileName() + "_" + hashlib.sha1(options_str.encode("utf-8")).hexdigest()[:8]
+
+	def generateInductor4henry(self, file_name=None, skip_existing=False, runner=None, freq=None, mesh=None, max_length=None):
+		# runner : FastHenryRunner, returns {"inp", "freq", "R", "L", "Q", "Z"} instead of the .inp path
+		henry_options = self.getHenryOptions(freq, mesh, max_length)
+		if file_name is None:
+			file_name = self.getHenryFileName(henry_options)
+		inp_file_name = self.getFileName(".inp", file_name)
+		if skip_existing and os.path.exists(inp_file_name):
+			return self.runHenry(inp_file_name, runner)
+
+		with self.profiler.stage("henry"):
+			return self.writeInductor4henry(inp_file_name, runner, henry_options)
+
+	def generateInductorBands4henry(self, runner, bands, freq=None, mesh=None, max_length=None):
+		# One .inp per sub-band of freq solved in parallel by runner (FastHenryRunner) -> merged, frequency sorted results
+		# whose "inp" lists the sub-band .inp files and "band" picks the one of every frequency (mergeResults)
+		# The HenryNetlist is shared by every band, an adaptive mesh follows the fmax of its band
+		from fasthenry_runner import splitFrequencyBands
+		henry_options = self.getHenryOptions(freq, mesh, max_length)
+		inp_files = [self.generateInductor4henry(freq=band, mesh=mesh, max_length=max_length)
+			for band in splitFrequencyBands(*henry_options["freq"], bands)]
+		with self.profiler.stage("solver", bands=len(inp_files)):
+			self.henry_results = runner.runBands(inp_files)
+		return self.henry_results
+
+	def writeInductor4henry(self, inp_file_name, runner=None, henry_options=None):
+		if not self.getHenryBody():
+			raise ValueError("Not implementation : " + self.shapeType.name)
+		netlist, henry_Tap_str = self.henry_body
+		if henry_options is None:
+			henry_options = self.getHenryOptions()
+
+		with self.profiler.stage("henry_format") as record:
+			inp_str = self.renderInductor4henry(netlist, henry_Tap_str, henry_options, record)
+			record["chars"] = len(inp_str)
+
+		if logger.isEnabledFor(logging.DEBUG):
+			for n in netlist.getSegmentPointList():
+				logger.debug("%s", n)
+
+		def write_inp(tmp_file_name):
+			with open(tmp_file_name, 'w') as f:
+				f.write(inp_str)
+		self.writeFileAtomic(inp_file_name, write_inp)
+		return self.runHenry(inp_file_name, runner)
+
+	def renderInductor4henry(self, netlist, henry_Tap_str, henry_options, record=None):
+		# record : profiler stage record, gets the segment and filament counts
+		fmin, fmax, ndec = henry_options["freq"]
+		nhinc, nwinc = HENRY_NHINC, HENRY_NWINC
+		mesh = None
+		if henry_options["max_length"] is not None:
+			netlist = netlist.splitSegments(henry_options["max_length"])
+		if henry_options["mesh"] == "adaptive":
+			mesh = netlist.calMesh(float(fmax))
+		elif henry_options["mesh"] is not None:
+			nhinc, nwinc = henry_options["mesh"]
 
 		header_str = "** Autogenerated ind \n"
 		footer_str = "\n"
 
 		header_str = header_str + ".units um \n"
-		header_str = header_str + ".Default sigma=5.8e4 nhinc=5 nwinc=5 \n\n"
+		header_str = header_str + ".Default sigma=5.8e4 nhinc=%d nwinc=%d \n\n" % (nhinc, nwinc)
 
-		footer_str = footer_str + ".external " + body_str[1] + "\n"
-		footer_str = footer_str + ".freq fmin=" + MIN_FREQ + " fmax=" + MAX_FREQ + " ndec=10\n"
+		footer_str = footer_str + ".external " + henry_Tap_str + "\n"
+		footer_str = footer_str + ".freq fmin=" + fmin + " fmax=" + fmax + " ndec=" + ndec + "\n"
 		footer_str = footer_str + "\n.end\n"
 
-		for n in point_Line_List:
-			print(n)
-
-		dt_now = datetime.datetime.now()
-		file_name = ("inductor_" + 
-			str(self.dt_now.year) + 
-			str(self.dt_now.month) + 
-			str(self.dt_now.day) + 
-			str(self.dt_now.hour) + 
-			str(self.dt_now.minute) + 
-			str(self.dt_now.second) + 
-			".inp")
-
-		f = open(file_name, 'w')
-		f.write(header_str)
-		f.write(body_str[0])
-		f.write(footer_str)
-		f.close()
+		if record is not None:
+			record["segments"] = len(netlist.seg_H)
+			record["filaments"] = int((mesh[0] * mesh[1]).sum()) if mesh is not None else len(netlist.seg_H) * nhinc * nwinc
+		return header_str + netlist.renderNodes() + "\n" + netlist.renderSegments(mesh) + footer_str
+
+	def generateInductor(self, outputs=INDUCTOR_OUTPUTS, file_name=None, skip_existing=False, merge=False, stream=False, via_cell=False,
+			freq=None, mesh=None, max_length=None):
+		# Single pass : one position model and one HenryNetlist for every output
+		output_files = {}
+		if "henry" in outputs:
+			output_files["henry"] = self.generateInductor4henry(file_name, skip_existing, None, freq, mesh, max_length)
+		if "gds" in outputs:
+			output_files["gds"] = self.generateInductor4gds(file_name, skip_existing, merge, stream, via_cell)
+		if "lef" in outputs:
+			with self.profiler.stage("lef"):
+				output_files["lef"] = self.generateInductor4lef(file_name, skip_existing)
+		if "json" in outputs:
+			with self.profiler.stage("json"):
+				output_files["json"] = self.generateInductor4json(file_name, output_files)
+		return output_files
+
+	def calBounds4gds(self):
+		boundsSink = GdsBoundsSink()
+		self.generateInductorCell4gds(boundsSink)
+		return boundsSink
+
+	def calPins(self):
+		# Tap pads of the GDS : W long from every Tap along its wire
+		netlist = self.getHenryBody() and self.henry_netlist
+		xyz = netlist.getNodeArray()
+		seg_nodes = netlist.getSegmentArray()
+		W = self.parameters.W
+		pin_List = []
+		for pin_cnt, node in enumerate(netlist.external_nodes):
+			segment = seg_nodes[(seg_nodes == node).any(axis=1)][0]
+			other = segment[1] if segment[0] == node else segment[0]
+			vector = xyz[other][0:2] - xyz[node][0:2]
+			axis = int(np.abs(vector).argmax())
+			point_1 = xyz[node][0:2].copy()
+			point_2 = point_1.copy()
+			point_2[axis] = point_2[axis] + np.sign(vector[axis]) * W
+			point_1[1 - axis] = point_1[1 - axis] - W/2.0
+			point_2[1 - axis] = point_2[1 - axis] + W/2.0
+			rect = [min(point_1[0], point_2[0]), min(point_1[1], point_2[1]), max(point_1[0], point_2[0]), max(point_1[1], point_2[1])]
+			pin_List.append({
+				"name": "P%d" % (pin_cnt + 1),
+				"layer": LEF_UNDER_METAL_LAYER if xyz[node][2] < 0.0 else LEF_TOP_METAL_LAYER,
+				"rect": [float(value) for value in rect],
+			})
+		return pin_List
+
+	def generateInductor4lef(self, file_name=None, skip_existing=False):
+		lef_file_name = self.getFileName(".lef", file_name)
+		if skip_existing and os.path.exists(lef_file_name):
+			return lef_file_name
+
+		boundsSink = self.calBounds4gds()
+		x_lo, y_lo, x_hi, y_hi = boundsSink.getBounds()
+
+		lef_str = "VERSION 5.7 ;\n"
+		lef_str = lef_str + "  NOWIREEXTENSIONATPIN ON ;\n"
+		lef_str = lef_str + "  DIVIDERCHAR \"/\" ;\n"
+		lef_str = lef_str + "  BUSBITCHARS \"[]\" ;\n"
+		lef_str = lef_str + "MACRO %s\n" % CELL_NAME
+		lef_str = lef_str + "  CLASS BLOCK ;\n"
+		lef_str = lef_str + "  FOREIGN %s ;\n" % CELL_NAME
+		lef_str = lef_str + "  ORIGIN %.3f %.3f ;\n" % (-x_lo, -y_lo)
+		lef_str = lef_str + "  SIZE %.3f BY %.3f ;\n" % (x_hi - x_lo, y_hi - y_lo)
+		for pin in self.calPins():
+			lef_str = lef_str + "  PIN %s\n" % pin["name"]
+			lef_str = lef_str + "    DIRECTION INOUT ;\n"
+			lef_str = lef_str + "    USE SIGNAL ;\n"
+			lef_str = lef_str + "    PORT\n"
+			lef_str = lef_str + "      LAYER %s ;\n" % pin["layer"]
+			lef_str = lef_str + "        RECT %.3f %.3f %.3f %.3f ;\n" % tuple(pin["rect"])
+			lef_str = lef_str + "    END\n"
+			lef_str = lef_str + "  END %s\n" % pin["name"]
+		lef_str = lef_str + "  OBS\n"
+		for layer, lef_layer in ((TOP_METAL_LAYER, LEF_TOP_METAL_LAYER), (UNDER_METAL_LAYER, LEF_UNDER_METAL_LAYER)):
+			bounds = boundsSink.getBounds(layer)
+			if bounds is not None:
+				lef_str = lef_str + "      LAYER %s ;\n" % lef_layer
+				lef_str = lef_str + "        RECT %.3f %.3f %.3f %.3f ;\n" % tuple(bounds)
+		lef_str = lef_str + "  END\n"
+		lef_str = lef_str + "END %s\n" % CELL_NAME
+		lef_str = lef_str + "END LIBRARY\n"
+
+		def write_lef(tmp_file_name):
+			with open(tmp_file_name, 'w') as f:
+				f.write(lef_str)
+		return self.writeFileAtomic(lef_file_name, write_lef)
+
+	def generateInductor4json(self, file_name=None, output_files=None):
+		# Design metadata next to the other outputs
+		json_file_name = self.getFileName(".json", file_name)
+		self.getHenryBody()
+		netlist = self.henry_netlist
+		metadata = {
+			"key": self.calDesignKey(),
+			"design": self.getDesignDict(),
+			"geometry": {
+				"L": float(self.parameters.L),
+				"A": float(self.parameters.A),
+				"GuardRing_L": float(self.parameters.GuardRing_L),
+				"Tap_L": float(self.parameters.Tap_L),
+				"bounds": self.calBounds4gds().getBounds(),
+			},
+			"netlist": {
+				"nodes": len(netlist.node_ids),
+				"segments": len(netlist.seg_H),
+				"taps": netlist.getNodeArray()[netlist.external_nodes].tolist(),
+			},
+			"pins": self.calPins(),
+			"files": dict(output_files or {}),
+		}
+		def write_json(tmp_file_name):
+			with open(tmp_file_name, 'w') as f:
+				json.dump(metadata, f, indent=1, sort_keys=True)
+		return self.writeFileAtomic(json_file_name, write_json)
+
+	def getHenryBody(self):
+		# The HenryNetlist is built once and shared by GDS, FastHenry, LEF and JSON outputs
+		if self.henry_body is not None:
+			return self.henry_body
+
+		body_str = ""
+
+		with self.profiler.stage("netlist") as record:
+			if self.shapeType == InductorShapeType.spiral:
+				body_str = self.generateInductorSpiral4henry_wire()
+			elif self.shapeType == InductorShapeType.hexagon or self.shapeType == InductorShapeType.octagon:
+				body_str = self.generateInductorPolygon4henry_wire()
+			elif self.shapeType == InductorShapeType.symmetry:
+				body_str = self.generateInductorSymmetry4henry_wire()
+			elif self.shapeType == InductorShapeType.hexagon_symmetry or self.shapeType == InductorShapeType.octagon_symmetry:
+				body_str = self.generateInductorPolygonSymmetry4henry_wire()
+			else:
+				logger.warning("Not implementation : %s", self.shapeType.name)
+
+			if body_str:
+				self.henry_body = body_str
+				record["nodes"] = len(self.henry_netlist.node_ids)
+				record["segments"] = len(self.henry_netlist.seg_H)
+		return body_str
+
+	def runHenry(self, inp_file_name, runner=None):
+		if runner is None:
+			return inp_file_name
+		with self.profiler.stage("solver"):
+			self.henry_results = runner.run(inp_file_name)
+		return self.henry_results
+
+	def generateGuardRing4henry_wire(self, netlist):
+		node_GR_0 = netlist.addNode(0, 0, self.parameters.GuardRing_T / 2.0)
+		node_GR_1 = netlist.addNode(self.parameters.GuardRing_L, 0, self.parameters.GuardRing_T / 2.0)
+		netlist.addSegment(node_GR_1, node_GR_0, self.parameters.T, self.parameters.W)
+		node_GR_2 = netlist.addNode(self.parameters.GuardRing_L, self.parameters.GuardRing_L, self.parameters.GuardRing_T / 2.0)
+		netlist.addSegment(node_GR_2, node_GR_1, self.parameters.T, self.parameters.W)
+		node_GR_3 = netlist.addNode(0, self.parameters.GuardRing_L, self.parameters.GuardRing_T / 2.0)
+		netlist.addSegment(node_GR_3, node_GR_2, self.parameters.T, self.parameters.W)
+		netlist.addSegment(node_GR_3, node_GR_0, self.parameters.T, self.parameters.W)
 		return
 
 	def generateInductorSpiral4henry_wire(self):
 		linePositonList = self.parameters.createLineInductorPositonList()
-		num_N_CenterList = self.parameters.calCenterPositonList()
-		#lineNum = linePositonList.len()
-		turn_cnt = 0
+		netlist = HenryNetlist(self.getHenryRho())
 		num_N = 0
-		N_cnt = 1
-		E_cnt = 1
-		NV_cnt = 1
-		henry_N_str = ""
-		henry_N_list = []
-		henry_N_list.append("dummy")
-		henry_E_str = ""
 		henry_Tap_str = ""
-		point_Line_List = []
 		via_L = self.parameters.T * 2.0
 		start_VIA_point = []
+		node_last = None
 
 		for pointList in linePositonList:
-			num_N_Center_TRBL = num_N_CenterList[num_N]
-			turn_cnt = turn_cnt + 1
 			num_N = num_N + 1
 
-			num_N_Center_xyz_T = num_N_Center_TRBL[InductorSideType.Top.value]
-			num_N_Center_xyz_B = num_N_Center_TRBL[InductorSideType.Bottom.value]
-
 			points_T = pointList[InductorSideType.Top.value]
 			points_B = pointList[InductorSideType.Bottom.value]
 			points_R = pointList[InductorSideType.Right.value]
 			points_L = pointList[InductorSideType.Left.value]
 
 			points_T_start = points_T[InductorSideType.Start.value]
-			points_T_end = points_T[InductorSideType.End.value]
 
 			points_B_start = points_B[InductorSideType.Start.value]
-			points_B_end = points_B[InductorSideType.End.value]
 
 			points_R_start = points_R[InductorSideType.Start.value]
 			points_R_end = points_R[InductorSideType.End.value]
 
 			points_L_start = points_L[InductorSideType.Start.value]
-			points_L_end = points_L[InductorSideType.End.value]
 
 			# Right Side
 			if num_N == 1:
-				formatted_msg = 'N%d x=%f y=%f z=%f \n' % (N_cnt, points_R_end[0], points_R_end[1], points_R_end[2])
-				henry_N_str = henry_N_str + formatted_msg
-				henry_N_list.append(formatted_msg)
-				N_cnt = N_cnt + 1
-			formatted_msg = 'N%d x=%f y=%f z=%f \n' % (N_cnt, points_R_start[0], points_R_start[1], points_R_start[2])
-			henry_N_str = henry_N_str + formatted_msg
-			henry_N_list.append(formatted_msg)
-			N_cnt = N_cnt + 1
-			formatted_msg = 'E%d N%d N%d rho=%s  H=%f W=%f \n' % (E_cnt, N_cnt-2, N_cnt-1, RHO_STR, self.parameters.T, self.parameters.W)
-			henry_E_str = henry_E_str + formatted_msg
-			point_Line_List.append((henry_N_list[N_cnt-2], henry_N_list[N_cnt-1]))
-			E_cnt = E_cnt + 1
+				node_R_end = netlist.addNode(points_R_end[0], points_R_end[1], points_R_end[2])
+				node_last = node_R_end
+			node_R_start = netlist.addNode(points_R_start[0], points_R_start[1], points_R_start[2])
+			netlist.addSegment(node_last, node_R_start, self.parameters.T, self.parameters.W)
+			node_T_from = node_R_start
 			if num_N == 1:
 				# VIA
-				formatted_msg = 'NV%d x=%f y=%f z=%f \n' % (NV_cnt, points_R_end[0], points_R_end[1], points_R_end[2] - via_L)
-				henry_N_str = henry_N_str + formatted_msg
-				henry_N_list.append(formatted_msg)
-				NV_cnt = NV_cnt + 1
-				formatted_msg = 'E%d NV%d N%d rho=%s  H=%f W=%f \n' % (E_cnt, NV_cnt-1, N_cnt-2, RHO_STR, via_L, self.parameters.T)
-				henry_E_str = henry_E_str + formatted_msg
-				E_cnt = E_cnt + 1
+				node_VIA = netlist.addNode(points_R_end[0], points_R_end[1], points_R_end[2] - via_L, via=True)
+				netlist.addSegment(node_VIA, node_R_end, via_L, self.parameters.T)
 				start_VIA_point = points_R_end
+				if num_N == self.parameters.N:
+					# N=1 : Upper Side starts from the Right Side end
+					node_T_from = node_R_end
 			elif num_N == self.parameters.N:
 				# VIA
-				formatted_msg = 'N%d x=%f y=%f z=%f \n' % (N_cnt, start_VIA_point[0], points_R_end[1] - self.parameters.GuardRing_S/2.0, points_R_end[2] - via_L)
-				henry_N_str = henry_N_str + formatted_msg
-				henry_N_list.append(formatted_msg)
-				N_cnt = N_cnt + 1
-				formatted_msg = 'E%d NV%d N%d rho=%s  H=%f W=%f \n' % (E_cnt, NV_cnt-1, N_cnt-1, RHO_STR, self.parameters.T, self.parameters.W)
-				henry_E_str = henry_E_str + formatted_msg
-				E_cnt = E_cnt + 1
+				node_Tap = netlist.addNode(start_VIA_point[0], points_R_end[1] - self.parameters.GuardRing_S/2.0, points_R_end[2] - via_L)
+				netlist.addSegment(node_VIA, node_Tap, self.parameters.T, self.parameters.W)
 				# Terminate Tap
-				henry_Tap_str = "N" + str(N_cnt - 1)
+				henry_Tap_str = netlist.getNodeName(node_Tap)
+				netlist.addExternal(node_Tap)
 
-				
 			# Upper Side
-			formatted_msg = 'N%d x=%f y=%f z=%f \n' % (N_cnt, points_T_start[0], points_T_start[1], points_T_start[2])
-			henry_N_str = henry_N_str + formatted_msg
-			henry_N_list.append(formatted_msg)
-			N_cnt = N_cnt + 1
-			if num_N == self.parameters.N:
-				formatted_msg = 'E%d N%d N%d rho=%s  H=%f W=%f \n' % (E_cnt, N_cnt-3, N_cnt-1, RHO_STR, self.parameters.T, self.parameters.W)
-			else:
-				formatted_msg = 'E%d N%d N%d rho=%s  H=%f W=%f \n' % (E_cnt, N_cnt-2, N_cnt-1, RHO_STR, self.parameters.T, self.parameters.W)
-
-			henry_E_str = henry_E_str + formatted_msg
-			point_Line_List.append((henry_N_list[N_cnt-2], henry_N_list[N_cnt-1]))
-			E_cnt = E_cnt + 1
+			node_T_start = netlist.addNode(points_T_start[0], points_T_start[1], points_T_start[2])
+			netlist.addSegment(node_T_from, node_T_start, self.parameters.T, self.parameters.W)
 
 			# Left Side
-			formatted_msg = 'N%d x=%f y=%f z=%f \n' % (N_cnt, points_L_start[0], points_L_start[1] - self.parameters.S - self.parameters.W, points_L_start[2])
-			henry_N_str = henry_N_str + formatted_msg
-			henry_N_list.append(formatted_msg)
-			N_cnt = N_cnt + 1
-			formatted_msg = 'E%d N%d N%d rho=%s  H=%f W=%f \n' % (E_cnt, N_cnt-2, N_cnt-1, RHO_STR, self.parameters.T, self.parameters.W)
-			henry_E_str = henry_E_str + formatted_msg
-			point_Line_List.append((henry_N_list[N_cnt-2], henry_N_list[N_cnt-1]))
-			E_cnt = E_cnt + 1
-			
+			node_L_start = netlist.addNode(points_L_start[0], points_L_start[1] - self.parameters.S - self.parameters.W, points_L_start[2])
+			netlist.addSegment(node_T_start, node_L_start, self.parameters.T, self.parameters.W)
+			node_last = node_L_start
+
 			# Bottom Side
 			if num_N != self.parameters.N:
-				formatted_msg = 'N%d x=%f y=%f z=%f \n' % (N_cnt, points_B_start[0] + self.parameters.S + self.parameters.W, points_B_start[1] - self.parameters.S - self.parameters.W, points_B_start[2])
-				henry_N_str = henry_N_str + formatted_msg
-				henry_N_list.append(formatted_msg)
-				N_cnt = N_cnt + 1
-				formatted_msg = 'E%d N%d N%d rho=%s  H=%f W=%f \n' % (E_cnt, N_cnt-2, N_cnt-1, RHO_STR, self.parameters.T, self.parameters.W)
-				henry_E_str = henry_E_str + formatted_msg
-				point_Line_List.append((henry_N_list[N_cnt-2], henry_N_list[N_cnt-1]))
-				E_cnt = E_cnt + 1
+				node_B_start = netlist.addNode(points_B_start[0] + self.parameters.S + self.parameters.W, points_B_start[1] - self.parameters.S - self.parameters.W, points_B_start[2])
+				netlist.addSegment(node_L_start, node_B_start, self.parameters.T, self.parameters.W)
+				node_last = node_B_start
 
 
 
 		# Terminate Tap
-		formatted_msg = 'N%d x=%f y=%f z=%f \n' % (N_cnt, points_L_start[0], points_L_start[1] - self.parameters.GuardRing_S/2.0, points_L_start[2])
-		henry_N_str = henry_N_str + formatted_msg
-		henry_N_list.append(formatted_msg)
-		N_cnt = N_cnt + 1
-		formatted_msg = 'E%d N%d N%d rho=%s  H=%f W=%f \n' % (E_cnt, N_cnt-2, N_cnt-1, RHO_STR, self.parameters.T, self.parameters.W)
-		henry_E_str = henry_E_str + formatted_msg
-		point_Line_List.append((henry_N_list[N_cnt-2], henry_N_list[N_cnt-1]))
-		E_cnt = E_cnt + 1
-		henry_Tap_str = henry_Tap_str + " N" + str(N_cnt - 1)
-
-
-
-		formatted_msg = 'N%d x=%f y=%f z=%f \n' % (N_cnt, 0, 0, self.parameters.GuardRing_T / 2.0)
-		henry_N_str = henry_N_str + formatted_msg
-		henry_N_list.append(formatted_msg)
-		N_cnt = N_cnt + 1
-		formatted_msg = 'N%d x=%f y=%f z=%f \n' % (N_cnt, self.parameters.GuardRing_L, 0, self.parameters.GuardRing_T / 2.0)
-		henry_N_str = henry_N_str + formatted_msg
-		henry_N_list.append(formatted_msg)
-		N_cnt = N_cnt + 1
-		formatted_msg = 'E%d N%d N%d rho=%s  H=%f W=%f \n' % (E_cnt, N_cnt-1, N_cnt-2, RHO_STR, self.parameters.T, self.parameters.W)
-		henry_E_str = henry_E_str + formatted_msg
-		point_Line_List.append((henry_N_list[N_cnt-1], henry_N_list[N_cnt-2]))
-		E_cnt = E_cnt + 1
-
-		formatted_msg = 'N%d x=%f y=%f z=%f \n' % (N_cnt, self.parameters.GuardRing_L, self.parameters.GuardRing_L, self.parameters.GuardRing_T / 2.0)
-		henry_N_str = henry_N_str + formatted_msg
-		henry_N_list.append(formatted_msg)
-		N_cnt = N_cnt + 1
-		formatted_msg = 'E%d N%d N%d rho=%s  H=%f W=%f \n' % (E_cnt, N_cnt-1, N_cnt-2, RHO_STR, self.parameters.T, self.parameters.W)
-		henry_E_str = henry_E_str + formatted_msg
-		point_Line_List.append((henry_N_list[N_cnt-1], henry_N_list[N_cnt-2]))
-		E_cnt = E_cnt + 1
-
-		formatted_msg = 'N%d x=%f y=%f z=%f \n' % (N_cnt, 0, self.parameters.GuardRing_L, self.parameters.GuardRing_T / 2.0)
-		henry_N_str = henry_N_str + formatted_msg
-		henry_N_list.append(formatted_msg)
-		N_cnt = N_cnt + 1
-		formatted_msg = 'E%d N%d N%d rho=%s  H=%f W=%f \n' % (E_cnt, N_cnt-1, N_cnt-2, RHO_STR, self.parameters.T, self.parameters.W)
-		henry_E_str = henry_E_str + formatted_msg
-		point_Line_List.append((henry_N_list[N_cnt-1], henry_N_list[N_cnt-2]))
-		E_cnt = E_cnt + 1
-
-		formatted_msg = 'E%d N%d N%d rho=%s  H=%f W=%f \n' % (E_cnt, N_cnt-1, N_cnt-4, RHO_STR, self.parameters.T, self.parameters.W)
-		henry_E_str = henry_E_str + formatted_msg
-		point_Line_List.append((henry_N_list[N_cnt-1], henry_N_list[N_cnt-4]))
-		E_cnt = E_cnt + 1
-
-		print (henry_N_str)
-		print (henry_E_str)
-		print (henry_Tap_str)
-		return ((henry_N_str + "\n" + henry_E_str), henry_Tap_str, point_Line_List)
+		node_Tap = netlist.addNode(points_L_start[0], points_L_start[1] - self.parameters.GuardRing_S/2.0, points_L_start[2])
+		netlist.addSegment(node_last, node_Tap, self.parameters.T, self.parameters.W)
+		henry_Tap_str = henry_Tap_str + " " + netlist.getNodeName(node_Tap)
+		netlist.addExternal(node_Tap)
+
+		self.generateGuardRing4henry_wire(netlist)
+
+		self.henry_netlist = netlist
+		if logger.isEnabledFor(logging.DEBUG):
+			logger.debug("%s\n%s\n%s", netlist.renderNodes(), netlist.renderSegments(), henry_Tap_str)
+		return (netlist, henry_Tap_str)
 
 
 	def generateInductorSymmetry4henry_wire(self):
 		linePositonList = self.parameters.createLineInductorPositonList()
 		num_N_CenterList = self.parameters.calCenterPositonList()
-		#lineNum = linePositonList.len()
-		turn_cnt = 0
+		netlist = HenryNetlist(self.getHenryRho())
 		num_N = 0
-		N_cnt = 1
-		E_cnt = 1
-		NV_cnt = 1
-		henry_N_str = ""
-		henry_N_list = []
-		henry_N_list.append("dummy")
-		henry_E_str = ""
 		henry_Tap_str = ""
-		point_Line_List = []
 		cross_L = self.parameters.W + self.parameters.S
 		cross_L_half = cross_L / 2.0
 		via_L = self.parameters.T * 2.0
+		node_B_X_cross_start_prev = None
+		node_T_X_cross_end_prev = None
+		node_B_VIA_prev = None
+		node_T_VIA_prev = None
 
 		for pointList in linePositonList:
 			num_N_Center_TRBL = num_N_CenterList[num_N]
-			turn_cnt = turn_cnt + 1
 			num_N = num_N + 1
 
 			num_N_Center_xyz_T = num_N_Center_TRBL[InductorSideType.Top.value]
@@ -997,10 +1212,8 @@ class InductorGenerator():
 			points_L = pointList[InductorSideType.Left.value]
 
 			points_T_start = points_T[InductorSideType.Start.value]
-			points_T_end = points_T[InductorSideType.End.value]
 
 			points_B_start = points_B[InductorSideType.Start.value]
-			points_B_end = points_B[InductorSideType.End.value]
 
 			points_R_start = points_R[InductorSideType.Start.value]
 			points_R_end = points_R[InductorSideType.End.value]
@@ -1008,302 +1221,264 @@ class InductorGenerator():
 			points_L_start = points_L[InductorSideType.Start.value]
 			points_L_end = points_L[InductorSideType.End.value]
 
+			node_B_VIA = None
+			node_T_VIA = None
+
 			if num_N == 1:
 				# Start Tap
-				formatted_msg = 'N%d x=%f y=%f z=%f \n' % (N_cnt, num_N_Center_xyz_B[0], num_N_Center_xyz_B[1]+self.parameters.R/2.0, num_N_Center_xyz_B[2])
-				henry_N_str = henry_N_str + formatted_msg
-				henry_N_list.append(formatted_msg)
-				N_cnt = N_cnt + 1
-				formatted_msg = 'N%d x=%f y=%f z=%f \n' % (N_cnt, num_N_Center_xyz_B[0], num_N_Center_xyz_B[1], num_N_Center_xyz_B[2])
-				henry_N_str = henry_N_str + formatted_msg
-				henry_N_list.append(formatted_msg)
-				N_cnt = N_cnt + 1
-				formatted_msg = 'E%d N%d N%d rho=%s  H=%f W=%f \n' % (E_cnt, N_cnt-2, N_cnt-1, RHO_STR, self.parameters.T, self.parameters.W)
-				henry_E_str = henry_E_str + formatted_msg
-				point_Line_List.append((henry_N_list[N_cnt-2], henry_N_list[N_cnt-1]))
-				E_cnt = E_cnt + 1
-
-				formatted_msg = 'N%d x=%f y=%f z=%f \n' % (N_cnt, points_B_start[0], points_B_start[1], points_B_start[2])
-				henry_N_str = henry_N_str + formatted_msg
-				henry_N_list.append(formatted_msg)
-				N_cnt = N_cnt + 1
-				formatted_msg = 'N%d x=%f y=%f z=%f \n' % (N_cnt, points_L_start[0], points_L_start[1], points_L_start[2])
-				henry_N_str = henry_N_str + formatted_msg
-				henry_N_list.append(formatted_msg)
-				N_cnt = N_cnt + 1
-				formatted_msg = 'E%d N%d N%d rho=%s  H=%f W=%f \n' % (E_cnt, N_cnt-2, N_cnt-1, RHO_STR, self.parameters.T, self.parameters.W)
-				henry_E_str = henry_E_str + formatted_msg
-				point_Line_List.append((henry_N_list[N_cnt-2], henry_N_list[N_cnt-1]))
-				E_cnt = E_cnt + 1
+				node_Tap_start = netlist.addNode(num_N_Center_xyz_B[0], num_N_Center_xyz_B[1]+self.parameters.R/2.0, num_N_Center_xyz_B[2])
+				node_Tap_center = netlist.addNode(num_N_Center_xyz_B[0], num_N_Center_xyz_B[1], num_N_Center_xyz_B[2])
+				netlist.addSegment(node_Tap_start, node_Tap_center, self.parameters.T, self.parameters.W)
+
+				node_B_start = netlist.addNode(points_B_start[0], points_B_start[1], points_B_start[2])
+				node_L_start = netlist.addNode(points_L_start[0], points_L_start[1], points_L_start[2])
+				netlist.addSegment(node_B_start, node_L_start, self.parameters.T, self.parameters.W)
+
+				# N=1 has no Cross, the Right Side closes on the Start Tap
+				node_R_close = node_Tap_start if num_N == self.parameters.N else node_B_start
 
 			elif num_N == self.parameters.N and num_N % 2 == 0:
 				# Skip for Tap
-				formatted_msg = 'N%d x=%f y=%f z=%f \n' % (N_cnt, points_B_start[0], points_B_start[1], points_B_start[2])
-				henry_N_str = henry_N_str + formatted_msg
-				henry_N_list.append(formatted_msg)
-				N_cnt = N_cnt + 1
-				formatted_msg = 'N%d x=%f y=%f z=%f \n' % (N_cnt, points_L_start[0], points_L_start[1], points_L_start[2])
-				henry_N_str = henry_N_str + formatted_msg
-				henry_N_list.append(formatted_msg)
-				N_cnt = N_cnt + 1
+				node_B_start = netlist.addNode(points_B_start[0], points_B_start[1], points_B_start[2])
+				node_L_start = netlist.addNode(points_L_start[0], points_L_start[1], points_L_start[2])
+				node_R_close = node_B_start
 			else:
 				# Cross
-				formatted_msg = 'N%d x=%f y=%f z=%f \n' % (N_cnt, points_B_start[0], points_B_start[1], points_B_start[2])
-				henry_N_str = henry_N_str + formatted_msg
-				henry_N_list.append(formatted_msg)
-				N_cnt = N_cnt + 1
-				formatted_msg = 'N%d x=%f y=%f z=%f \n' % (N_cnt, points_B_X_cross_start, points_B_start[1], points_B_start[2])
-				henry_N_str = henry_N_str + formatted_msg
-				henry_N_list.append(formatted_msg)
-				N_cnt = N_cnt + 1
-				formatted_msg = 'E%d N%d N%d rho=%s  H=%f W=%f \n' % (E_cnt, N_cnt-2, N_cnt-1, RHO_STR, self.parameters.T, self.parameters.W)
-				henry_E_str = henry_E_str + formatted_msg
-				point_Line_List.append((henry_N_list[N_cnt-2], henry_N_list[N_cnt-1]))
-				E_cnt = E_cnt + 1
-
-				formatted_msg = 'N%d x=%f y=%f z=%f \n' % (N_cnt, points_B_X_cross_end, points_B_start[1], points_B_start[2])
-				henry_N_str = henry_N_str + formatted_msg
-				henry_N_list.append(formatted_msg)
-				N_cnt = N_cnt + 1
-
-				formatted_msg = 'N%d x=%f y=%f z=%f \n' % (N_cnt, points_L_start[0], points_L_start[1], points_L_start[2])
-				henry_N_str = henry_N_str + formatted_msg
-				henry_N_list.append(formatted_msg)
-				N_cnt = N_cnt + 1
-				formatted_msg = 'E%d N%d N%d rho=%s  H=%f W=%f \n' % (E_cnt, N_cnt-2, N_cnt-1, RHO_STR, self.parameters.T, self.parameters.W)
-				henry_E_str = henry_E_str + formatted_msg
-				point_Line_List.append((henry_N_list[N_cnt-2], henry_N_list[N_cnt-1]))
-				E_cnt = E_cnt + 1
+				node_B_start = netlist.addNode(points_B_start[0], points_B_start[1], points_B_start[2])
+				node_B_X_cross_start = netlist.addNode(points_B_X_cross_start, points_B_start[1], points_B_start[2])
+				netlist.addSegment(node_B_start, node_B_X_cross_start, self.parameters.T, self.parameters.W)
+
+				node_B_X_cross_end = netlist.addNode(points_B_X_cross_end, points_B_start[1], points_B_start[2])
+				node_L_start = netlist.addNode(points_L_start[0], points_L_start[1], points_L_start[2])
+				netlist.addSegment(node_B_X_cross_end, node_L_start, self.parameters.T, self.parameters.W)
+				node_R_close = node_B_start
 
 				if num_N % 2 == 0:
 					# VIA
-					formatted_msg = 'NV%d x=%f y=%f z=%f \n' % (NV_cnt, points_B_X_cross_end, points_B_start[1], points_B_start[2] - via_L)
-					henry_N_str = henry_N_str + formatted_msg
-					henry_N_list.append(formatted_msg)
-					NV_cnt = NV_cnt + 1
-					formatted_msg = 'E%d NV%d N%d rho=%s  H=%f W=%f \n' % (E_cnt, NV_cnt-1, N_cnt-2, RHO_STR, via_L, self.parameters.T)
-					henry_E_str = henry_E_str + formatted_msg
-					E_cnt = E_cnt + 1
+					node_B_VIA = netlist.addNode(points_B_X_cross_end, points_B_start[1], points_B_start[2] - via_L, via=True)
+					netlist.addSegment(node_B_VIA, node_B_X_cross_end, via_L, self.parameters.T)
 				else:
 					# VIA
-					formatted_msg = 'NV%d x=%f y=%f z=%f \n' % (NV_cnt, points_B_X_cross_start, points_B_start[1], points_B_start[2] - via_L)
-					henry_N_str = henry_N_str + formatted_msg
-					NV_cnt = NV_cnt + 1
-					formatted_msg = 'E%d NV%d N%d rho=%s  H=%f W=%f \n' % (E_cnt, NV_cnt-1, N_cnt-3, RHO_STR, via_L, self.parameters.T)
-					henry_E_str = henry_E_str + formatted_msg
-					E_cnt = E_cnt + 1
+					node_B_VIA = netlist.addNode(points_B_X_cross_start, points_B_start[1], points_B_start[2] - via_L, via=True)
+					netlist.addSegment(node_B_VIA, node_B_X_cross_start, via_L, self.parameters.T)
 					# Inner Connection
-					formatted_msg = 'E%d N%d N%d rho=%s  H=%f W=%f \n' % (E_cnt, N_cnt-2, N_cnt-11, RHO_STR, self.parameters.T, self.parameters.W)
-					henry_E_str = henry_E_str + formatted_msg
-					E_cnt = E_cnt + 1
-					formatted_msg = 'E%d NV%d NV%d rho=%s  H=%f W=%f \n' % (E_cnt, NV_cnt-1, NV_cnt-3, RHO_STR, self.parameters.T, self.parameters.W)
-					henry_E_str = henry_E_str + formatted_msg
-					E_cnt = E_cnt + 1
+					netlist.addSegment(node_B_X_cross_end, node_B_X_cross_start_prev, self.parameters.T, self.parameters.W)
+					netlist.addSegment(node_B_VIA, node_B_VIA_prev, self.parameters.T, self.parameters.W)
 
+				node_B_X_cross_start_prev = node_B_X_cross_start
 
 
-			formatted_msg = 'N%d x=%f y=%f z=%f \n' % (N_cnt, points_T_start[0], points_T_start[1], points_T_start[2])
-			henry_N_str = henry_N_str + formatted_msg
-			henry_N_list.append(formatted_msg)
-			N_cnt = N_cnt + 1
-			formatted_msg = 'E%d N%d N%d rho=%s  H=%f W=%f \n' % (E_cnt, N_cnt-2, N_cnt-1, RHO_STR, self.parameters.T, self.parameters.W)
-			henry_E_str = henry_E_str + formatted_msg
-			point_Line_List.append((henry_N_list[N_cnt-2], henry_N_list[N_cnt-1]))
-			E_cnt = E_cnt + 1
+
+			node_T_start = netlist.addNode(points_T_start[0], points_T_start[1], points_T_start[2])
+			netlist.addSegment(node_L_start, node_T_start, self.parameters.T, self.parameters.W)
 
 
 
 			if num_N == self.parameters.N and num_N % 2 == 1:
 				# Skip for Tap
-				formatted_msg = 'N%d x=%f y=%f z=%f \n' % (N_cnt, points_R_start[0], points_R_start[1], points_R_start[2])
-				henry_N_str = henry_N_str + formatted_msg
-				henry_N_list.append(formatted_msg)
-				N_cnt = N_cnt + 1
+				node_R_start = netlist.addNode(points_R_start[0], points_R_start[1], points_R_start[2])
 			else:
 				# Cross
-				formatted_msg = 'N%d x=%f y=%f z=%f \n' % (N_cnt, points_T_X_cross_start, points_T_start[1], points_T_start[2])
-				henry_N_str = henry_N_str + formatted_msg
-				henry_N_list.append(formatted_msg)
-				N_cnt = N_cnt + 1
-				formatted_msg = 'E%d N%d N%d rho=%s  H=%f W=%f \n' % (E_cnt, N_cnt-2, N_cnt-1, RHO_STR, self.parameters.T, self.parameters.W)
-				henry_E_str = henry_E_str + formatted_msg
-				point_Line_List.append((henry_N_list[N_cnt-2], henry_N_list[N_cnt-1]))
-				E_cnt = E_cnt + 1
-
-
-				formatted_msg = 'N%d x=%f y=%f z=%f \n' % (N_cnt, points_T_X_cross_end, points_T_start[1], points_T_start[2])
-				henry_N_str = henry_N_str + formatted_msg
-				henry_N_list.append(formatted_msg)
-				N_cnt = N_cnt + 1
-
-				formatted_msg = 'N%d x=%f y=%f z=%f \n' % (N_cnt, points_R_start[0], points_R_start[1], points_R_start[2])
-				henry_N_str = henry_N_str + formatted_msg
-				henry_N_list.append(formatted_msg)
-				N_cnt = N_cnt + 1
-				formatted_msg = 'E%d N%d N%d rho=%s  H=%f W=%f \n' % (E_cnt, N_cnt-2, N_cnt-1, RHO_STR, self.parameters.T, self.parameters.W)
-				henry_E_str = henry_E_str + formatted_msg
-				point_Line_List.append((henry_N_list[N_cnt-2], henry_N_list[N_cnt-1]))
-				E_cnt = E_cnt + 1
+				node_T_X_cross_start = netlist.addNode(points_T_X_cross_start, points_T_start[1], points_T_start[2])
+				netlist.addSegment(node_T_start, node_T_X_cross_start, self.parameters.T, self.parameters.W)
+
+
+				node_T_X_cross_end = netlist.addNode(points_T_X_cross_end, points_T_start[1], points_T_start[2])
+
+				node_R_start = netlist.addNode(points_R_start[0], points_R_start[1], points_R_start[2])
+				netlist.addSegment(node_T_X_cross_end, node_R_start, self.parameters.T, self.parameters.W)
 
 				if num_N % 2 == 0:
 					# VIA
-					formatted_msg = 'NV%d x=%f y=%f z=%f \n' % (NV_cnt, points_T_X_cross_end, points_T_start[1], points_T_start[2] - via_L)
-					henry_N_str = henry_N_str + formatted_msg
-					NV_cnt = NV_cnt + 1
-					formatted_msg = 'E%d NV%d N%d rho=%s  H=%f W=%f \n' % (E_cnt, NV_cnt-1, N_cnt-2, RHO_STR, via_L, self.parameters.T)
-					henry_E_str = henry_E_str + formatted_msg
-					E_cnt = E_cnt + 1
-					if num_N == self.parameters.N:
-						# Inner Connection
-						formatted_msg = 'E%d N%d N%d rho=%s  H=%f W=%f \n' % (E_cnt, N_cnt-3, N_cnt-8, RHO_STR, self.parameters.T, self.parameters.W)
-						henry_E_str = henry_E_str + formatted_msg
-						E_cnt = E_cnt + 1
-						formatted_msg = 'E%d NV%d NV%d rho=%s  H=%f W=%f \n' % (E_cnt, NV_cnt-1, NV_cnt-2, RHO_STR, self.parameters.T, self.parameters.W)
-						henry_E_str = henry_E_str + formatted_msg
-						E_cnt = E_cnt + 1
-					else:
-						# Inner Connection
-						formatted_msg = 'E%d N%d N%d rho=%s  H=%f W=%f \n' % (E_cnt, N_cnt-3, N_cnt-10, RHO_STR, self.parameters.T, self.parameters.W)
-						henry_E_str = henry_E_str + formatted_msg
-						E_cnt = E_cnt + 1
-						formatted_msg = 'E%d NV%d NV%d rho=%s  H=%f W=%f \n' % (E_cnt, NV_cnt-1, NV_cnt-3, RHO_STR, self.parameters.T, self.parameters.W)
-						henry_E_str = henry_E_str + formatted_msg
-						E_cnt = E_cnt + 1
+					node_T_VIA = netlist.addNode(points_T_X_cross_end, points_T_start[1], points_T_start[2] - via_L, via=True)
+					netlist.addSegment(node_T_VIA, node_T_X_cross_end, via_L, self.parameters.T)
+					# Inner Connection
+					netlist.addSegment(node_T_X_cross_start, node_T_X_cross_end_prev, self.parameters.T, self.parameters.W)
+					netlist.addSegment(node_T_VIA, node_T_VIA_prev, self.parameters.T, self.parameters.W)
 				else:
 					# VIA
-					formatted_msg = 'NV%d x=%f y=%f z=%f \n' % (NV_cnt, points_T_X_cross_start, points_T_start[1], points_T_start[2] - via_L)
-					henry_N_str = henry_N_str + formatted_msg
-					NV_cnt = NV_cnt + 1
-					formatted_msg = 'E%d NV%d N%d rho=%s  H=%f W=%f \n' % (E_cnt, NV_cnt-1, N_cnt-3, RHO_STR, via_L, self.parameters.T)
-					henry_E_str = henry_E_str + formatted_msg
-					E_cnt = E_cnt + 1
+					node_T_VIA = netlist.addNode(points_T_X_cross_start, points_T_start[1], points_T_start[2] - via_L, via=True)
+					netlist.addSegment(node_T_VIA, node_T_X_cross_start, via_L, self.parameters.T)
 
+				node_T_X_cross_end_prev = node_T_X_cross_end
 
 
 
-
-			if num_N == 1:
-				formatted_msg = 'E%d N%d N%d rho=%s  H=%f W=%f \n' % (E_cnt, N_cnt-1, N_cnt-6, RHO_STR, self.parameters.T, self.parameters.W)
-				henry_E_str = henry_E_str + formatted_msg
-				point_Line_List.append((henry_N_list[N_cnt-1], henry_N_list[N_cnt-6]))
-				E_cnt = E_cnt + 1
-			elif num_N == self.parameters.N:
-				formatted_msg = 'E%d N%d N%d rho=%s  H=%f W=%f \n' % (E_cnt, N_cnt-1, N_cnt-6, RHO_STR, self.parameters.T, self.parameters.W)
-				henry_E_str = henry_E_str + formatted_msg
-				point_Line_List.append((henry_N_list[N_cnt-1], henry_N_list[N_cnt-6]))
-				E_cnt = E_cnt + 1
-			else:
-				formatted_msg = 'E%d N%d N%d rho=%s  H=%f W=%f \n' % (E_cnt, N_cnt-1, N_cnt-8, RHO_STR, self.parameters.T, self.parameters.W)
-				henry_E_str = henry_E_str + formatted_msg
-				point_Line_List.append((henry_N_list[N_cnt-1], henry_N_list[N_cnt-8]))
-				E_cnt = E_cnt + 1
+			netlist.addSegment(node_R_start, node_R_close, self.parameters.T, self.parameters.W)
 
 
 			# Terminate Tap
 			if num_N == self.parameters.N and num_N % 2 == 0:
 				# Non Bottom
-				formatted_msg = 'N%d x=%f y=%f z=%f \n' % (N_cnt, points_L_start[0], points_L_start[1] - self.parameters.GuardRing_S/2.0, points_L_start[2])
-				henry_N_str = henry_N_str + formatted_msg
-				henry_N_list.append(formatted_msg)
-				N_cnt = N_cnt + 1
-				formatted_msg = 'E%d N%d N%d rho=%s  H=%f W=%f \n' % (E_cnt, N_cnt-6, N_cnt-1, RHO_STR, self.parameters.T, self.parameters.W)
-				henry_E_str = henry_E_str + formatted_msg
-				point_Line_List.append((henry_N_list[N_cnt-6], henry_N_list[N_cnt-1]))
-				E_cnt = E_cnt + 1
-
-				formatted_msg = 'N%d x=%f y=%f z=%f \n' % (N_cnt, points_R_end[0], points_R_end[1] - self.parameters.GuardRing_S/2.0, points_R_end[2])
-				henry_N_str = henry_N_str + formatted_msg
-				henry_N_list.append(formatted_msg)
-				N_cnt = N_cnt + 1
-				formatted_msg = 'E%d N%d N%d rho=%s  H=%f W=%f \n' % (E_cnt, N_cnt-8, N_cnt-1, RHO_STR, self.parameters.T, self.parameters.W)
-				henry_E_str = henry_E_str + formatted_msg
-				point_Line_List.append((henry_N_list[N_cnt-8], henry_N_list[N_cnt-1]))
-				E_cnt = E_cnt + 1
-
-				henry_Tap_str = "N" + str(N_cnt - 2) + " N" + str(N_cnt - 1)
+				node_Tap_L = netlist.addNode(points_L_start[0], points_L_start[1] - self.parameters.GuardRing_S/2.0, points_L_start[2])
+				netlist.addSegment(node_L_start, node_Tap_L, self.parameters.T, self.parameters.W)
+
+				node_Tap_R = netlist.addNode(points_R_end[0], points_R_end[1] - self.parameters.GuardRing_S/2.0, points_R_end[2])
+				netlist.addSegment(node_R_close, node_Tap_R, self.parameters.T, self.parameters.W)
+
+				henry_Tap_str = netlist.getNodeName(node_Tap_L) + " " + netlist.getNodeName(node_Tap_R)
+				netlist.addExternal(node_Tap_L)
+				netlist.addExternal(node_Tap_R)
 
 
 			elif num_N == self.parameters.N and num_N % 2 == 1:
 				# Non Upper
-				formatted_msg = 'N%d x=%f y=%f z=%f \n' % (N_cnt, points_L_end[0], points_L_end[1] + self.parameters.GuardRing_S/2.0, points_L_end[2])
-				henry_N_str = henry_N_str + formatted_msg
-				henry_N_list.append(formatted_msg)
-				N_cnt = N_cnt + 1
-				formatted_msg = 'E%d N%d N%d rho=%s  H=%f W=%f \n' % (E_cnt, N_cnt-3, N_cnt-1, RHO_STR, self.parameters.T, self.parameters.W)
-				henry_E_str = henry_E_str + formatted_msg
-				point_Line_List.append((henry_N_list[N_cnt-3], henry_N_list[N_cnt-1]))
-				E_cnt = E_cnt + 1
-
-				formatted_msg = 'N%d x=%f y=%f z=%f \n' % (N_cnt, points_R_start[0], points_R_start[1] + self.parameters.GuardRing_S/2.0, points_R_start[2])
-				henry_N_str = henry_N_str + formatted_msg
-				henry_N_list.append(formatted_msg)
-				N_cnt = N_cnt + 1
-				formatted_msg = 'E%d N%d N%d rho=%s  H=%f W=%f \n' % (E_cnt, N_cnt-8, N_cnt-1, RHO_STR, self.parameters.T, self.parameters.W)
-				henry_E_str = henry_E_str + formatted_msg
-				point_Line_List.append((henry_N_list[N_cnt-8], henry_N_list[N_cnt-1]))
-				E_cnt = E_cnt + 1
-
-				henry_Tap_str = "N" + str(N_cnt - 2) + " N" + str(N_cnt - 1)
-
-
-		formatted_msg = 'N%d x=%f y=%f z=%f \n' % (N_cnt, 0, 0, self.parameters.GuardRing_T / 2.0)
-		henry_N_str = henry_N_str + formatted_msg
-		henry_N_list.append(formatted_msg)
-		N_cnt = N_cnt + 1
-		formatted_msg = 'N%d x=%f y=%f z=%f \n' % (N_cnt, self.parameters.GuardRing_L, 0, self.parameters.GuardRing_T / 2.0)
-		henry_N_str = henry_N_str + formatted_msg
-		henry_N_list.append(formatted_msg)
-		N_cnt = N_cnt + 1
-		formatted_msg = 'E%d N%d N%d rho=%s  H=%f W=%f \n' % (E_cnt, N_cnt-1, N_cnt-2, RHO_STR, self.parameters.T, self.parameters.W)
-		henry_E_str = henry_E_str + formatted_msg
-		point_Line_List.append((henry_N_list[N_cnt-1], henry_N_list[N_cnt-2]))
-		E_cnt = E_cnt + 1
-
-		formatted_msg = 'N%d x=%f y=%f z=%f \n' % (N_cnt, self.parameters.GuardRing_L, self.parameters.GuardRing_L, self.parameters.GuardRing_T / 2.0)
-		henry_N_str = henry_N_str + formatted_msg
-		henry_N_list.append(formatted_msg)
-		N_cnt = N_cnt + 1
-		formatted_msg = 'E%d N%d N%d rho=%s  H=%f W=%f \n' % (E_cnt, N_cnt-1, N_cnt-2, RHO_STR, self.parameters.T, self.parameters.W)
-		henry_E_str = henry_E_str + formatted_msg
-		point_Line_List.append((henry_N_list[N_cnt-1], henry_N_list[N_cnt-2]))
-		E_cnt = E_cnt + 1
-
-		formatted_msg = 'N%d x=%f y=%f z=%f \n' % (N_cnt, 0, self.parameters.GuardRing_L, self.parameters.GuardRing_T / 2.0)
-		henry_N_str = henry_N_str + formatted_msg
-		henry_N_list.append(formatted_msg)
-		N_cnt = N_cnt + 1
-		formatted_msg = 'E%d N%d N%d rho=%s  H=%f W=%f \n' % (E_cnt, N_cnt-1, N_cnt-2, RHO_STR, self.parameters.T, self.parameters.W)
-		henry_E_str = henry_E_str + formatted_msg
-		point_Line_List.append((henry_N_list[N_cnt-1], henry_N_list[N_cnt-2]))
-		E_cnt = E_cnt + 1
-
-		formatted_msg = 'E%d N%d N%d rho=%s  H=%f W=%f \n' % (E_cnt, N_cnt-1, N_cnt-4, RHO_STR, self.parameters.T, self.parameters.W)
-		henry_E_str = henry_E_str + formatted_msg
-		point_Line_List.append((henry_N_list[N_cnt-1], henry_N_list[N_cnt-4]))
-		E_cnt = E_cnt + 1
-
-		print (henry_N_str)
-		print (henry_E_str)
-		print (henry_Tap_str)
-		return ((henry_N_str + "\n" + henry_E_str), henry_Tap_str, point_Line_List)
+				node_Tap_L = netlist.addNode(points_L_end[0], points_L_end[1] + self.parameters.GuardRing_S/2.0, points_L_end[2])
+				netlist.addSegment(node_T_start, node_Tap_L, self.parameters.T, self.parameters.W)
 
+				node_Tap_R = netlist.addNode(points_R_start[0], points_R_start[1] + self.parameters.GuardRing_S/2.0, points_R_start[2])
+				netlist.addSegment(node_R_close, node_Tap_R, self.parameters.T, self.parameters.W)
 
+				henry_Tap_str = netlist.getNodeName(node_Tap_L) + " " + netlist.getNodeName(node_Tap_R)
+				netlist.addExternal(node_Tap_L)
+				netlist.addExternal(node_Tap_R)
 
+			if node_B_VIA is not None:
+				node_B_VIA_prev = node_B_VIA
+			if node_T_VIA is not None:
+				node_T_VIA_prev = node_T_VIA
 
 
-if __name__ == '__main__':
+		self.generateGuardRing4henry_wire(netlist)
 
-	R = 20.0		# InnerR
-	S = 2.0			# Wire2Wire Space
-	W = 2.0			# Wire Width
-	N = 4			# Number of rolls
-	T = METAL_THICKNESS	# um Thickness
+		self.henry_netlist = netlist
+		if logger.isEnabledFor(logging.DEBUG):
+			logger.debug("%s\n%s\n%s", netlist.renderNodes(), netlist.renderSegments(), henry_Tap_str)
+		return (netlist, henry_Tap_str)
 
-	GuardRing_S = 20.0	# Guard Ring to Inductor Space 
-	GuardRing_W = 2.0	# Guard Ring Wire Width
 
-#	generator = InductorGenerator(InductorShapeType.symmetry, R, S, W, N, T, GuardRing_S, GuardRing_W)
-	generator = InductorGenerator(InductorShapeType.spiral, R, S, W, N, T, GuardRing_S, GuardRing_W)
-	generator.generateInductor4henry()
-	generator.generateInductor4gds()
+	def generateInductorPolygon4henry_wire(self):
+		# Every corner of every roll in one pass : the open bottom side of a roll steps out to the next roll
+		polygon_Array = self.parameters.createPolygonInductorPositonArray()
+		netlist = HenryNetlist(self.getHenryRho())
+		via_L = self.parameters.T * 2.0
+
+		node_roll = netlist.addNodes(polygon_Array.reshape(-1, 3))
+		netlist.addSegments(node_roll[:-1], node_roll[1:], self.parameters.T, self.parameters.W)
+
+		points_start = polygon_Array[0][0]
+		points_end = polygon_Array[-1][-1]
+		Tap_y = points_end[1] - self.parameters.GuardRing_S/2.0
+
+		# VIA
+		node_VIA = netlist.addNode(points_start[0], points_start[1], points_start[2] - via_L, via=True)
+		netlist.addSegment(node_VIA, node_roll[0], via_L, self.parameters.T)
+		node_Tap_start = netlist.addNode(points_start[0], Tap_y, points_start[2] - via_L)
+		netlist.addSegment(node_VIA, node_Tap_start, self.parameters.T, self.parameters.W)
+		netlist.addExternal(node_Tap_start)
+
+		# Terminate Tap
+		node_Tap_end = netlist.addNode(points_end[0], Tap_y, points_end[2])
+		netlist.addSegment(node_roll[-1], node_Tap_end, self.parameters.T, self.parameters.W)
+		netlist.addExternal(node_Tap_end)
+		henry_Tap_str = netlist.getNodeName(node_Tap_start) + " " + netlist.getNodeName(node_Tap_end)
+
+		self.generateGuardRing4henry_wire(netlist)
+
+		self.henry_netlist = netlist
+		if logger.isEnabledFor(logging.DEBUG):
+			logger.debug("%s\n%s\n%s", netlist.renderNodes(), netlist.renderSegments(), henry_Tap_str)
+		return (netlist, henry_Tap_str)
+
+
+	def generateInductorPolygonSymmetry4henry_wire(self):
+		# Left / Right half rolls from the bottom gap to the top gap, Cross between neighbour rolls on alternate gaps
+		polygon_Array = self.parameters.createPolygonInductorPositonArray()
+		netlist = HenryNetlist(self.getHenryRho())
+		N = self.parameters.N
+		half = self.parameters.sides // 2
+		cross_L_half = (self.parameters.W + self.parameters.S) / 2.0
+		via_L = self.parameters.T * 2.0
+		center_x, center_y, center_z = self.parameters.center_xyz
+		apothem = center_y - polygon_Array[:, 0, 1]
+
+		if polygon_Array[0, 0, 0] - center_x <= cross_L_half:
+			raise ValueError("R too small for the Cross of " + self.shapeType.name)
+
+		# (N, half+2, 3) : roll, bottom gap end, corners, top gap end
+		left_Array = np.empty((N, half + 2, 3))
+		right_Array = np.empty((N, half + 2, 3))
+		left_Array[:, 1:-1] = polygon_Array[:, :half-1:-1]
+		right_Array[:, 1:-1] = polygon_Array[:, :half]
+		for half_Array, sign in ((left_Array, -1.0), (right_Array, 1.0)):
+			half_Array[:, (0, -1), 0] = center_x + sign * cross_L_half
+			half_Array[:, 0, 1] = center_y - apothem
+			half_Array[:, -1, 1] = center_y + apothem
+			half_Array[:, (0, -1), 2] = center_z
+
+		node_left = netlist.addNodes(left_Array.reshape(-1, 3)).reshape(N, half + 2)
+		node_right = netlist.addNodes(right_Array.reshape(-1, 3)).reshape(N, half + 2)
+		for node_half in (node_left, node_right):
+			netlist.addSegments(node_half[:, :-1].ravel(), node_half[:, 1:].ravel(), self.parameters.T, self.parameters.W)
+
+		# Cross : the outer roll crosses at the top, the Taps take its bottom gap
+		for num_N in range(N - 1):
+			gap = -1 if (N - 2 - num_N) % 2 == 0 else 0
+			netlist.addSegment(node_left[num_N, gap], node_right[num_N+1, gap], self.parameters.T, self.parameters.W)
+			# VIA
+			points_VIA_L = left_Array[num_N+1, gap]
+			points_VIA_R = right_Array[num_N, gap]
+			node_VIA_L = netlist.addNode(points_VIA_L[0], points_VIA_L[1], points_VIA_L[2] - via_L, via=True)
+			netlist.addSegment(node_VIA_L, node_left[num_N+1, gap], via_L, self.parameters.T)
+			node_VIA_R = netlist.addNode(points_VIA_R[0], points_VIA_R[1], points_VIA_R[2] - via_L, via=True)
+			netlist.addSegment(node_VIA_R, node_right[num_N, gap], via_L, self.parameters.T)
+			netlist.addSegment(node_VIA_L, node_VIA_R, self.parameters.T, self.parameters.W)
+
+		# Inner Connection : the gap of the inner roll its Cross does not use
+		gap = 0 if N > 1 and N % 2 == 0 else -1
+		netlist.addSegment(node_left[0, gap], node_right[0, gap], self.parameters.T, self.parameters.W)
 
+		# Terminate Tap
+		node_Tap_List = []
+		for half_Array, node_half in ((left_Array, node_left), (right_Array, node_right)):
+			points_Tap = half_Array[-1, 0]
+			node_Tap = netlist.addNode(points_Tap[0], points_Tap[1] - self.parameters.GuardRing_S/2.0, points_Tap[2])
+			netlist.addSegment(node_half[-1, 0], node_Tap, self.parameters.T, self.parameters.W)
+			netlist.addExternal(node_Tap)
+			node_Tap_List.append(netlist.getNodeName(node_Tap))
+		henry_Tap_str = " ".join(node_Tap_List)
+
+		self.generateGuardRing4henry_wire(netlist)
+
+		self.henry_netlist = netlist
+		if logger.isEnabledFor(logging.DEBUG):
+			logger.debug("%s\n%s\n%s", netlist.renderNodes(), netlist.renderSegments(), henry_Tap_str)
+		return (netlist, henry_Tap_str)
+
+
+
+
+
+def generateInductorArray4gds(generator_List, gds_file_name, columns=8, pitch=None):
+	# Test array : one cell per design placed on a grid in TOP, streamed design by design
+	if pitch is None:
+		pitch = max([generator.parameters.GuardRing_L for generator in generator_List]) + 2.0 * generator_List[0].parameters.Tap_L
+	def writeArray(file_name):
+		from gds_stream import GdsStreamWriter
+		with open(file_name, 'wb') as f:
+			with GdsStreamWriter(f) as writer:
+				cell_name_List = []		# one per placement, repeated designs included
+				written_Set = set()		# cells already in the stream
+				for generator in generator_List:
+					cell_name = CELL_NAME + "_" + generator.calDesignKey()[:16]
+					if cell_name not in written_Set:
+						writer.beginCell(cell_name)
+						generator.generateInductorCell4gds(writer)
+						writer.endCell()
+						written_Set.add(cell_name)
+					cell_name_List.append(cell_name)
+				writer.beginCell("TOP")
+				for index, cell_name in enumerate(cell_name_List):
+					writer.addCellReference(cell_name, ((index % columns) * pitch, (index // columns) * pitch))
+				writer.endCell()
+		return file_name
+	return generator_List[0].writeFileAtomic(gds_file_name, writeArray)
+
+
+
+
+if __name__ == '__main__':
+	# Same as "inductor_cli.py generate", e.g. --shape symmetry -R 20 -S 2 -W 2 -N 4
+	import sys
+	from inductor_cli import main
+	sys.exit(main(["generate"] + sys.argv[1:]))
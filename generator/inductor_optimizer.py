@@ -0,0 +1,266 @@
+#!/bin/python3
+# Target Driven Synthesis of Inductor Generator.
+# 1. Analytical surrogate (inductor_estimator) over the whole R, S, W, N grid inside the area budget
+# 2. Top candidates refined by the extractor (partial_inductance or fasthenry), cached and in parallel
+# 3. GDS & FastHenry of the winner
+
+import argparse
+import concurrent.futures
+import glob
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from inductor_generator import InductorShapeType, METAL_THICKNESS, RHO_STR, createParamsRecords, getParamsRow
+from inductor_cache import InductorCache, CACHE_MAX_BYTES
+from inductor_estimator import estimateInductor, calSkinFactor, ESTIMATOR_FREQ, ESTIMATOR_MODELS
+from inductor_results import InductorResultStore, createResultRow
+from inductor_sweep import SWEEP_PARAM_DEFAULTS, createGenerator, getWorkerCache, normalizeSweepParams
+from partial_inductance import extractInductorGenerator
+from fasthenry_runner import FastHenryRunner
+
+
+OPTIMIZER_GRID = {
+	"R": np.arange(10.0, 102.0, 2.0),
+	"S": np.array([1.0, 2.0, 3.0, 4.0]),
+	"W": np.array([1.0, 2.0, 3.0, 4.0, 5.0, 6.0, 8.0, 10.0]),
+	"N": np.arange(2, 9),			# N=1 has no complete port path
+}
+OPTIMIZER_TOP_K = 16
+OPTIMIZER_TOLERANCE = 0.1
+OPTIMIZER_ROUNDS = 2			# surrogate -> extractor rounds, the surrogate is rescaled by the extracted L each round
+OPTIMIZER_EXTRACTORS = ("partial", "fasthenry")
+LEF_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "lef")
+
+
+def readLefSize(lef_file):
+	# SIZE w BY h ; of the macro (um)
+	with open(lef_file) as f:
+		for line in f:
+			tokens = line.split()
+			if len(tokens) >= 4 and tokens[0] == "SIZE" and tokens[2] == "BY":
+				return (float(tokens[1]), float(tokens[3]))
+	raise ValueError("No SIZE in " + lef_file)
+
+def getAreaBudget(area=None):
+	# "WxH" (um) or the tile size of the project LEF (1x2 tiles)
+	if area is not None:
+		w, h = area.lower().split("x")
+		return (float(w), float(h))
+	lef_files = sorted(glob.glob(os.path.join(LEF_DIR, "*.lef")))
+	if len(lef_files) == 0:
+		raise ValueError("No LEF in " + LEF_DIR + ", give the area budget")
+	return readLefSize(lef_files[0])
+
+def createSearchGrid(shapeType, T=METAL_THICKNESS, grid=OPTIMIZER_GRID):
+	# Whole R, S, W, N grid as PARAMS_RECORD_DTYPE records, GuardRing_L is the footprint
+	R, S, W, N = np.meshgrid(grid["R"], grid["S"], grid["W"], grid["N"], indexing="ij")
+	return createParamsRecords(shapeType, R.ravel(), S.ravel(), W.ravel(), N.ravel(), T,
+		SWEEP_PARAM_DEFAULTS["GuardRing_S"], SWEEP_PARAM_DEFAULTS["GuardRing_W"])
+
+def rankCandidates(estimate, L_target, tolerance, top_k):
+	# Inside tolerance : best Q first, otherwise : nearest L first
+	error = np.abs(estimate["L"] - L_target) / L_target
+	inside = error <= tolerance
+	order = np.lexsort((error, -np.where(inside, estimate["Q"], 0.0), ~inside))
+	return order[:top_k]
+
+def extractCandidate(generator, freq, extractor):
+	# {"L", "R", "Q"} at freq
+	if extractor == "partial":
+		R_dc, L = extractInductorGenerator(generator)
+		R = R_dc * float(calSkinFactor(generator.parameters.T, float(RHO_STR), freq))
+		return {"L": float(L), "R": R, "Q": 2.0 * np.pi * freq * float(L) / R}
+	# .freq of the target alone : the default MIN_FREQ / MAX_FREQ range would clamp freq to its near DC end
+	runner = FastHenryRunner(workers=1)
+	out_dir = generator.out_dir
+	with tempfile.TemporaryDirectory(prefix="inductor_opt_") as work_dir:
+		generator.out_dir = work_dir
+		try:
+			results = generator.generateInductor4henry(runner=runner, freq=(freq, freq))
+		finally:
+			generator.out_dir = out_dir
+			runner.close()
+	if len(results["freq"]) == 0 or not (results["freq"].min() * (1.0 - 1e-6) <= freq <= results["freq"].max() * (1.0 + 1e-6)):
+		raise ValueError("FastHenry results do not cover %g Hz : %s" % (freq, results["freq"]))
+	L = float(np.interp(freq, results["freq"], results["L"]))
+	R = float(np.interp(freq, results["freq"], results["R"]))
+	return {"L": L, "R": R, "Q": 2.0 * np.pi * freq * L / R}
+
+def evaluateCandidate(params, freq, extractor, cache_config=None):
+	# Worker of InductorOptimizer : (params, {"L", "R", "Q"}, sec, cached)
+	start = time.perf_counter()
+	cache = getWorkerCache(cache_config)
+	generator = createGenerator(params)
+	result_name = "%s@%g" % (extractor, freq)
+	key = generator.calDesignKey()
+	if cache is not None:
+		entry = cache.get(key, ("results",))
+		if entry is not None and result_name in entry["results"]:
+			return (params, entry["results"][result_name], time.perf_counter() - start, True)
+	result = extractCandidate(generator, freq, extractor)
+	if cache is not None:
+		cache.putResults(key, {result_name: result})
+	return (params, result, time.perf_counter() - start, False)
+
+
+
+class InductorOptimizer():
+	def __init__(self, L_target, freq=ESTIMATOR_FREQ, area=None, shapeType=InductorShapeType.symmetry, T=METAL_THICKNESS,
+			grid=OPTIMIZER_GRID, model="monomial", tolerance=OPTIMIZER_TOLERANCE, top_k=OPTIMIZER_TOP_K,
+			extractor="partial", workers=1, cache=None, rounds=OPTIMIZER_ROUNDS, store=None):
+		self.L_target = L_target
+		self.freq = freq
+		self.area = area if area is not None else getAreaBudget()
+		self.shapeType = shapeType
+		self.T = T
+		self.grid = grid
+		self.model = model
+		self.tolerance = tolerance
+		self.top_k = top_k
+		self.extractor = extractor
+		self.workers = workers or os.cpu_count() or 1
+		self.cache = cache
+		self.rounds = rounds
+		self.store = store		# InductorResultStore of every refined candidate
+
+		self.calibration = 1.0		# extracted L / surrogate L
+		self.surrogate_cnt = 0
+		self.surrogate_elapsed = 0.0
+		self.refine_List = []		# (params, result, sec, cached)
+		self.refine_elapsed = 0.0
+
+	def searchSurrogate(self):
+		# Candidate parameter sets, best first
+		start = time.perf_counter()
+		records = createSearchGrid(self.shapeType, self.T, self.grid)
+		records = records[records["GuardRing_L"] <= min(self.area)]
+		estimate = estimateInductor(records["R"], records["S"], records["W"], records["N"], self.T, self.freq, self.shapeType, self.model)
+		estimate["L"] = estimate["L"] * self.calibration
+		estimate["Q"] = estimate["Q"] * self.calibration
+		evaluated = set((params["R"], params["S"], params["W"], params["N"]) for params, result, sec, cached in self.refine_List)
+		if len(evaluated) > 0:
+			fresh = np.array([(R, S, W, N) not in evaluated for R, S, W, N in zip(records["R"].tolist(), records["S"].tolist(),
+				records["W"].tolist(), records["N"].tolist())], dtype=bool)
+			records = records[fresh]
+			estimate = {key: value[fresh] for key, value in estimate.items()}
+		order = rankCandidates(estimate, self.L_target, self.tolerance, self.top_k)
+		candidates = [normalizeSweepParams(getParamsRow(record)) for record in records[order]]
+		self.surrogate_cnt = self.surrogate_cnt + len(records)
+		self.surrogate_elapsed = self.surrogate_elapsed + (time.perf_counter() - start)
+		return (candidates, estimate["L"][order] / self.calibration)
+
+	def refine(self, candidates):
+		start = time.perf_counter()
+		cache_config = None
+		if self.cache is not None:
+			cache_config = (self.cache.root, self.cache.max_bytes)
+		if self.workers == 1:
+			refine_List = [evaluateCandidate(params, self.freq, self.extractor, cache_config) for params in candidates]
+		else:
+			with concurrent.futures.ProcessPoolExecutor(max_workers=self.workers) as pool:
+				futures = [pool.submit(evaluateCandidate, params, self.freq, self.extractor, cache_config) for params in candidates]
+				refine_List = [future.result() for future in futures]
+		self.refine_List.extend(refine_List)
+		self.refine_elapsed = self.refine_elapsed + (time.perf_counter() - start)
+		if self.cache is not None:
+			self.cache.scanEntries()
+			hits = sum(1 for params, result, sec, cached in refine_List if cached)
+			self.cache.hits = self.cache.hits + hits
+			self.cache.misses = self.cache.misses + len(refine_List) - hits
+		if self.store is not None:
+			self.store.putRows([createResultRow(createGenerator(params), result=result, extractor=self.extractor, freq=self.freq,
+				ext_sec=None if cached else sec) for params, result, sec, cached in refine_List])
+		return refine_List
+
+	def selectBest(self):
+		# Same rule as the surrogate ranking, on the extracted values
+		extracted = {
+			"L": np.array([result["L"] for params, result, sec, cached in self.refine_List]),
+			"Q": np.array([result["Q"] for params, result, sec, cached in self.refine_List]),
+		}
+		index = rankCandidates(extracted, self.L_target, self.tolerance, 1)[0]
+		return self.refine_List[index]
+
+	def run(self, out_dir=None, file_name=None):
+		# -> (params, result, {"henry": .inp, "gds": .gds})
+		for round_cnt in range(self.rounds):
+			candidates, L_estimate = self.searchSurrogate()
+			if len(candidates) == 0:
+				break
+			refine_List = self.refine(candidates)
+			L_extracted = np.array([result["L"] for params, result, sec, cached in refine_List])
+			self.calibration = float(np.median(L_extracted / L_estimate))
+			params, result, sec, cached = self.selectBest()
+			if abs(result["L"] - self.L_target) <= self.tolerance * self.L_target:
+				break
+		if len(self.refine_List) == 0:
+			raise ValueError("No inductor fits in %.2f x %.2f um" % tuple(self.area))
+		params, result, sec, cached = self.selectBest()
+		generator = createGenerator(params, out_dir)
+		output_files = {}
+		output_files["henry"] = generator.generateInductor4henry(file_name)
+		output_files["gds"] = generator.generateInductor4gds(file_name)
+		return (params, result, output_files)
+
+	def getReport(self):
+		lines = []
+		lines.append("surrogate: %d designs in %.3f sec (%.3f us/design)" % (self.surrogate_cnt, self.surrogate_elapsed,
+			self.surrogate_elapsed / max(self.surrogate_cnt, 1) * 1e6))
+		extracted = [sec for params, result, sec, cached in self.refine_List if not cached]
+		lines.append("%s: %d designs in %.3f sec (%.3f ms/design extracted, %d cached), surrogate x %.3f" % (self.extractor, len(self.refine_List),
+			self.refine_elapsed, (sum(extracted) / len(extracted) * 1e3) if extracted else 0.0, len(self.refine_List) - len(extracted), self.calibration))
+		for params, result, sec, cached in self.refine_List:
+			lines.append("  R=%g S=%g W=%g N=%d : L=%.4g H R=%.4g ohm Q=%.3g (%.3f ms%s)" % (params["R"], params["S"], params["W"], params["N"],
+				result["L"], result["R"], result["Q"], sec * 1e3, ", cached" if cached else ""))
+		return "\n".join(lines)
+
+
+
+
+def main(argv=None):
+	parser = argparse.ArgumentParser(description="Target driven synthesis of Inductor Generator")
+	parser.add_argument("L", type=float, help="H, target inductance")
+	parser.add_argument("--freq", type=float, default=ESTIMATOR_FREQ, help="Hz, target frequency")
+	parser.add_argument("--area", default=None, help="WxH um area budget (default : SIZE of the project LEF)")
+	parser.add_argument("--shape", default="symmetry", choices=[shapeType.name for shapeType in InductorShapeType], help="inductor shape")
+	parser.add_argument("--model", default="monomial", choices=ESTIMATOR_MODELS, help="analytical surrogate model")
+	parser.add_argument("--tolerance", type=float, default=OPTIMIZER_TOLERANCE, help="relative inductance tolerance")
+	parser.add_argument("--top-k", type=int, default=OPTIMIZER_TOP_K, help="candidates refined by the extractor")
+	parser.add_argument("--extractor", default="partial", choices=OPTIMIZER_EXTRACTORS, help="refinement extractor")
+	parser.add_argument("--workers", type=int, default=1, help="worker processes (0 : every core)")
+	parser.add_argument("--cache", default=None, help="result cache directory")
+	parser.add_argument("--cache-bytes", type=int, default=CACHE_MAX_BYTES, help="result cache size limit")
+	parser.add_argument("--db", default=None, help="SQLite result store of the refined candidates (inductor_results)")
+	parser.add_argument("--out-dir", default=None, help="output directory")
+	parser.add_argument("--file-name", default=None, help="output file name (default : design hash)")
+	args = parser.parse_args(argv)
+	if args.extractor == "fasthenry" and not FastHenryRunner().isAvailable():
+		parser.error("fasthenry binary not found, use --extractor partial")
+
+	cache = None
+	if args.cache is not None:
+		cache = InductorCache(args.cache, args.cache_bytes)
+	store = None
+	if args.db is not None:
+		store = InductorResultStore(args.db)
+	optimizer = InductorOptimizer(args.L, args.freq, getAreaBudget(args.area), InductorShapeType[args.shape],
+		model=args.model, tolerance=args.tolerance, top_k=args.top_k, extractor=args.extractor, workers=args.workers, cache=cache, store=store)
+	params, result, output_files = optimizer.run(args.out_dir, args.file_name)
+	print("R=%g S=%g W=%g N=%d : L=%.4g H R=%.4g ohm Q=%.3g" % (params["R"], params["S"], params["W"], params["N"], result["L"], result["R"], result["Q"]))
+	print(" ".join(output_files.values()))
+	print(optimizer.getReport(), file=sys.stderr)
+	if cache is not None:
+		print(cache.getReport(), file=sys.stderr)
+	if store is not None:
+		print(store.getReport(), file=sys.stderr)
+		store.close()
+	return 0
+
+
+
+if __name__ == '__main__':
+	sys.exit(main())
@@ -0,0 +1,240 @@
+#!/bin/python3
+# Pareto Front Explorer of Inductor Generator.
+# 1. R, S, W, N grid of every shape walked in chunks : bounded memory for millions of designs
+# 2. Analytical estimate (inductor_estimator) of every chunk : L, Q at freq and the GuardRing_L footprint
+# 3. Non-dominated archive (max L, max Q, min GuardRing_L) merged chunk by chunk
+# 4. Front as CSV, GDS & FastHenry of designs spread along L
+
+import argparse
+import bisect
+import csv
+import sys
+import time
+
+import numpy as np
+
+from inductor_generator import InductorShapeType, METAL_THICKNESS, PARAMS_RECORD_DTYPE, createParamsRecords, getParamsRow
+from inductor_estimator import estimateInductor, ESTIMATOR_FREQ, ESTIMATOR_MODELS
+from inductor_results import InductorResultStore
+from inductor_sweep import SWEEP_OUTPUTS, SWEEP_PARAM_DEFAULTS, generateSweepPoint, normalizeSweepParams
+from inductor_optimizer import getAreaBudget
+
+
+PARETO_GRID = {
+	"R": "10:200:0.5",
+	"S": "1:6:0.5",
+	"W": "1:16:0.5",
+	"N": "2:16",			# N=1 has no complete port path
+}
+PARETO_SHAPES = ("spiral", "symmetry")
+PARETO_CHUNK_SIZE = 1 << 16
+PARETO_LAYOUTS = 16
+# (column, +1 : maximize / -1 : minimize)
+PARETO_OBJECTIVES = (("est_L", 1.0), ("est_Q", 1.0), ("GuardRing_L", -1.0))
+PARETO_DTYPE = np.dtype(PARAMS_RECORD_DTYPE.descr + [("est_L", "f8"), ("est_R", "f8"), ("est_Q", "f8")])
+PARETO_CSV_COLUMNS = ("shape", "R", "S", "W", "N", "T", "GuardRing_S", "GuardRing_W", "GuardRing_L", "est_L", "est_R", "est_Q")
+
+
+def parseGridValues(values, dtype=float):
+	# "start:stop[:step]" (stop included) or "v1,v2,..."
+	if ":" in values:
+		tokens = [float(token) for token in values.split(":")]
+		start, stop = tokens[:2]
+		step = tokens[2] if len(tokens) > 2 else 1.0
+		return np.arange(start, stop + step / 2.0, step).astype(dtype)
+	return np.array([float(token) for token in values.split(",")]).astype(dtype)
+
+def createGridChunks(shape_List, grid, chunk_size=PARETO_CHUNK_SIZE):
+	# (shape value, R, S, W, N) arrays of at most chunk_size designs, the whole grid is never held
+	axes = (np.array([InductorShapeType[shape].value for shape in shape_List], dtype=np.uint8), grid["R"], grid["S"], grid["W"], grid["N"])
+	shape = tuple(len(axis) for axis in axes)
+	total = int(np.prod(shape))
+	for start in range(0, total, chunk_size):
+		index = np.unravel_index(np.arange(start, min(start + chunk_size, total)), shape)
+		yield tuple(axis[i] for axis, i in zip(axes, index))
+
+def findNonDominated(values):
+	# values (n, 3), every column maximized -> sorted indexes of the non-dominated rows, first of equal rows kept
+	# Sorted by column 0, a row is dominated when an earlier row is >= in columns 1 and 2 :
+	# staircase of the kept rows, column 1 ascending / column 2 descending, answers that with one bisect
+	order = np.lexsort((-values[:, 2], -values[:, 1], -values[:, 0]))
+	keys = []		# column 1, ascending
+	vals = []		# column 2, descending
+	kept_List = []
+	for index, a, b in zip(order.tolist(), values[order, 1].tolist(), values[order, 2].tolist()):
+		j = bisect.bisect_left(keys, a)
+		if j < len(keys) and vals[j] >= b:
+			continue
+		kept_List.append(index)
+		# Drop the steps now dominated : key <= a and val <= b
+		end = bisect.bisect_right(keys, a)
+		start = end
+		while start > 0 and vals[start - 1] <= b:
+			start = start - 1
+		keys[start:end] = [a]
+		vals[start:end] = [b]
+	kept_List.sort()
+	return np.array(kept_List, dtype=np.int64)
+
+
+
+class ParetoArchive():
+	def __init__(self, objectives=PARETO_OBJECTIVES):
+		self.objectives = objectives
+		self.front = np.empty(0, dtype=PARETO_DTYPE)
+
+		self.design_cnt = 0
+		self.feasible_cnt = 0
+		self.update_cnt = 0
+
+	def getValues(self, front):
+		return np.stack([front[name] * sign for name, sign in self.objectives], axis=1)
+
+	def update(self, front):
+		# Merge PARETO_DTYPE rows, the archive rows win ties (first kept)
+		merged = np.concatenate((self.front, front))
+		self.front = merged[findNonDominated(self.getValues(merged))]
+		self.update_cnt = self.update_cnt + 1
+		return len(self.front)
+
+	def getSpread(self, count):
+		# count front rows spread evenly along the first objective
+		if count <= 0 or len(self.front) == 0:
+			return self.front[:0]
+		front = self.front[np.argsort(self.front[self.objectives[0][0]], kind="stable")]
+		index = np.unique(np.round(np.linspace(0, len(front) - 1, min(count, len(front)))).astype(np.int64))
+		return front[index]
+
+
+
+class InductorParetoExplorer():
+	def __init__(self, shape_List=PARETO_SHAPES, grid=None, freq=ESTIMATOR_FREQ, model="monomial", T=METAL_THICKNESS,
+			side_max=None, L_min=None, L_max=None, chunk_size=PARETO_CHUNK_SIZE):
+		self.shape_List = list(shape_List)
+		self.grid = grid if grid is not None else dict((key, parseGridValues(values, int if key == "N" else float)) for key, values in PARETO_GRID.items())
+		self.freq = freq
+		self.model = model
+		self.T = T
+		self.side_max = side_max
+		self.L_min = L_min
+		self.L_max = L_max
+		self.chunk_size = chunk_size
+
+		self.archive = ParetoArchive()
+		self.estimate_elapsed = 0.0
+		self.archive_elapsed = 0.0
+
+	def estimateChunk(self, shapeValue, R, S, W, N):
+		# PARETO_DTYPE rows of the feasible designs of one chunk
+		records = createParamsRecords(shapeValue, R, S, W, N, self.T, SWEEP_PARAM_DEFAULTS["GuardRing_S"], SWEEP_PARAM_DEFAULTS["GuardRing_W"])
+		front = np.empty(len(records), dtype=PARETO_DTYPE)
+		for name in PARAMS_RECORD_DTYPE.names:
+			front[name] = records[name]
+		for value in np.unique(records["shape"]):
+			mask = records["shape"] == value
+			estimate = estimateInductor(records["R"][mask], records["S"][mask], records["W"][mask], records["N"][mask], self.T, self.freq,
+				InductorShapeType(int(value)), self.model)
+			front["est_L"][mask] = estimate["L"]
+			front["est_R"][mask] = estimate["R"]
+			front["est_Q"][mask] = estimate["Q"]
+		feasible = np.isfinite(front["est_L"]) & np.isfinite(front["est_Q"]) & (front["est_L"] > 0.0)
+		if self.side_max is not None:
+			feasible = feasible & (front["GuardRing_L"] <= self.side_max)
+		if self.L_min is not None:
+			feasible = feasible & (front["est_L"] >= self.L_min)
+		if self.L_max is not None:
+			feasible = feasible & (front["est_L"] <= self.L_max)
+		return front[feasible]
+
+	def run(self):
+		for shapeValue, R, S, W, N in createGridChunks(self.shape_List, self.grid, self.chunk_size):
+			start = time.perf_counter()
+			front = self.estimateChunk(shapeValue, R, S, W, N)
+			self.estimate_elapsed = self.estimate_elapsed + (time.perf_counter() - start)
+
+			start = time.perf_counter()
+			self.archive.update(front)
+			self.archive_elapsed = self.archive_elapsed + (time.perf_counter() - start)
+			self.archive.design_cnt = self.archive.design_cnt + len(R)
+			self.archive.feasible_cnt = self.archive.feasible_cnt + len(front)
+		return self.archive.front
+
+	def writeFront(self, file_name):
+		with open(file_name, 'w', newline='') as f:
+			writer = csv.writer(f)
+			writer.writerow(PARETO_CSV_COLUMNS)
+			for row in self.archive.front[np.argsort(self.archive.front["est_L"], kind="stable")]:
+				writer.writerow([InductorShapeType(int(row["shape"])).name if name == "shape" else row[name].item() for name in PARETO_CSV_COLUMNS])
+		return file_name
+
+	def generateLayouts(self, count=PARETO_LAYOUTS, outputs=SWEEP_OUTPUTS, out_dir=None, store=None):
+		# GDS & FastHenry of count front designs spread along L -> [(row, output_files)], designs without a layout are skipped
+		layout_List = []
+		row_List = [] if store is not None else None
+		for row in self.archive.getSpread(count):
+			params = normalizeSweepParams(getParamsRow(row))
+			try:
+				output_files = generateSweepPoint(params, None, outputs, out_dir, False, None, row_List)
+			except ValueError:
+				continue
+			layout_List.append((row, output_files))
+		if store is not None:
+			store.putRows(row_List)
+		return layout_List
+
+	def getReport(self):
+		design_cnt = self.archive.design_cnt
+		lines = []
+		lines.append("estimate: %d designs in %.3f sec (%.3f us/design), %d feasible" % (design_cnt, self.estimate_elapsed,
+			self.estimate_elapsed / max(design_cnt, 1) * 1e6, self.archive.feasible_cnt))
+		lines.append("archive: %d non-dominated after %d chunks in %.3f sec (%.3f us/design)" % (len(self.archive.front), self.archive.update_cnt,
+			self.archive_elapsed, self.archive_elapsed / max(design_cnt, 1) * 1e6))
+		return "\n".join(lines)
+
+
+
+
+def main(argv=None):
+	parser = argparse.ArgumentParser(description="Pareto front of Inductor Generator over inductance, Q and footprint")
+	parser.add_argument("--shape", default=",".join(PARETO_SHAPES), help=",".join(shapeType.name for shapeType in InductorShapeType))
+	for key, values in PARETO_GRID.items():
+		parser.add_argument("--" + key, default=values, help="start:stop[:step] or v1,v2,...")
+	parser.add_argument("--freq", type=float, default=ESTIMATOR_FREQ, help="Hz, frequency of Q")
+	parser.add_argument("--model", default="monomial", choices=ESTIMATOR_MODELS, help="analytical inductance model")
+	parser.add_argument("-T", type=float, default=METAL_THICKNESS, help="um, metal thickness")
+	parser.add_argument("--area", default=None, help="WxH um area budget (default : SIZE of the project LEF)")
+	parser.add_argument("--L-min", type=float, default=None, help="H, smallest estimated inductance")
+	parser.add_argument("--L-max", type=float, default=None, help="H, largest estimated inductance")
+	parser.add_argument("--chunk-size", type=int, default=PARETO_CHUNK_SIZE, help="designs estimated per chunk")
+	parser.add_argument("--output", default=None, help="write the front as CSV")
+	parser.add_argument("--layouts", type=int, default=PARETO_LAYOUTS, help="GDS & FastHenry of this many front designs spread along L")
+	parser.add_argument("--outputs", default=",".join(SWEEP_OUTPUTS), help="henry,gds")
+	parser.add_argument("--out-dir", default=None, help="output directory of the layouts")
+	parser.add_argument("--db", default=None, help="SQLite result store of the layouts (inductor_results)")
+	args = parser.parse_args(argv)
+
+	for shape in args.shape.split(","):
+		InductorShapeType[shape]		# raise KeyError for unknown shape
+	grid = dict((key, parseGridValues(getattr(args, key), int if key == "N" else float)) for key in PARETO_GRID)
+	explorer = InductorParetoExplorer(args.shape.split(","), grid, args.freq, args.model, args.T, min(getAreaBudget(args.area)),
+		args.L_min, args.L_max, args.chunk_size)
+	explorer.run()
+	if args.output is not None:
+		explorer.writeFront(args.output)
+
+	store = None
+	if args.db is not None:
+		store = InductorResultStore(args.db)
+	for row, output_files in explorer.generateLayouts(args.layouts, args.outputs.split(","), args.out_dir, store):
+		print("%s R=%g S=%g W=%g N=%d GuardRing_L=%g : L=%.4g H R=%.4g ohm Q=%.3g %s" % (InductorShapeType(int(row["shape"])).name, row["R"], row["S"],
+			row["W"], row["N"], row["GuardRing_L"], row["est_L"], row["est_R"], row["est_Q"], " ".join(output_files.values())))
+	print(explorer.getReport(), file=sys.stderr)
+	if store is not None:
+		print(store.getReport(), file=sys.stderr)
+		store.close()
+	return 0
+
+
+
+if __name__ == '__main__':
+	sys.exit(main())
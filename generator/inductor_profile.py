@@ -0,0 +1,113 @@
+#!/bin/python3
+# Stage profiler of Inductor Generator.
+# Wall time, allocations (tracemalloc) and counts of every stage : params, netlist, GDS build, file writes, solver
+
+import contextlib
+import json
+import time
+import tracemalloc
+
+
+PROFILE_VERSION = 1
+
+
+class NullProfiler():
+	# Default of InductorGenerator : stages cost one empty context
+	enabled = False
+
+	def stage(self, name, **counts):
+		return contextlib.nullcontext({})
+
+
+
+class StageProfiler():
+	enabled = True
+
+	def __init__(self, memory=True):
+		self.memory = memory
+		self.tracing = False			# tracemalloc started by this profiler
+		self.stage_List = []			# stage records in start order
+		self.open_List = []			# [record, peak so far] of the running stages
+		if memory and not tracemalloc.is_tracing():
+			tracemalloc.start()
+			self.tracing = True
+
+	def close(self):
+		if self.tracing:
+			tracemalloc.stop()
+			self.tracing = False
+		return
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, exc_type, exc_value, traceback):
+		self.close()
+		return False
+
+
+	def foldPeak(self):
+		# Peak since the last reset belongs to every running stage
+		current, peak = tracemalloc.get_traced_memory()
+		for opened in self.open_List:
+			opened[1] = max(opened[1], peak)
+		tracemalloc.reset_peak()
+		return current
+
+	@contextlib.contextmanager
+	def stage(self, name, **counts):
+		# counts : segment / byte counts known up front, the stage adds more to the yielded record
+		record = {"stage": name, "depth": len(self.open_List)}
+		record.update(counts)
+		self.stage_List.append(record)
+		memory = self.memory and tracemalloc.is_tracing()
+		if memory:
+			start_current = self.foldPeak()
+		opened = [record, 0]
+		self.open_List.append(opened)
+		start = time.perf_counter()
+		try:
+			yield record
+		finally:
+			record["wall"] = time.perf_counter() - start
+			if memory:
+				end_current = self.foldPeak()
+				record["alloc"] = end_current - start_current
+				record["peak"] = opened[1] - start_current
+			self.open_List.pop()
+
+
+	def getTotals(self):
+		# stage name : {"calls", "wall", "peak"} of every call, nested stages included (a parent wall also holds its children)
+		totals = {}
+		for record in self.stage_List:
+			total = totals.setdefault(record["stage"], {"calls": 0, "wall": 0.0, "peak": 0})
+			total["calls"] = total["calls"] + 1
+			total["wall"] = total["wall"] + record.get("wall", 0.0)
+			total["peak"] = max(total["peak"], record.get("peak", 0))
+		return totals
+
+	def toDict(self):
+		return {
+			"version": PROFILE_VERSION,
+			"memory": self.memory,
+			"stages": self.stage_List,
+			"totals": self.getTotals(),
+		}
+
+	def writeReport(self, file_name):
+		with open(file_name, 'w') as f:
+			json.dump(self.toDict(), f, indent=1)
+		return file_name
+
+	def getReport(self):
+		lines = ["%-24s %9s %11s %11s  %s" % ("stage", "wall ms", "alloc KiB", "peak KiB", "counts")]
+		for record in self.stage_List:
+			counts = " ".join("%s=%s" % (key, value) for key, value in record.items() if key not in ("stage", "depth", "wall", "alloc", "peak"))
+			lines.append("%-24s %9.3f %11.1f %11.1f  %s" % ("  " * record["depth"] + record["stage"], record.get("wall", 0.0) * 1e3,
+				record.get("alloc", 0) / 1024.0, record.get("peak", 0) / 1024.0, counts))
+		return "\n".join(lines)
+
+
+
+NULL_PROFILER = NullProfiler()
@@ -0,0 +1,222 @@
+#!/bin/python3
+# SQLite result store of Inductor Generator.
+# One row per design (InductorGenerator.calDesignKey) : parameters, footprint, extracted L / R / Q, timings and output files
+# WAL journal : parallel sweep workers write every chunk in one transaction while queries keep reading
+
+import argparse
+import json
+import sqlite3
+import sys
+import time
+
+
+RESULTS_VERSION = 1
+RESULTS_TABLE = "designs"
+RESULTS_TIMEOUT = 60.0				# sec, wait of a writer for the lock held by another worker
+RESULTS_BATCH = 64				# rows per transaction of a sequential sweep
+RESULTS_COLUMNS = (
+	("key", "TEXT PRIMARY KEY"),		# InductorGenerator.calDesignKey()
+	("ID", "TEXT"),				# InductorParams.ID
+	("shape", "TEXT NOT NULL"),
+	("R", "REAL"),
+	("S", "REAL"),
+	("W", "REAL"),
+	("N", "INTEGER"),
+	("T", "REAL"),
+	("GuardRing_S", "REAL"),
+	("GuardRing_W", "REAL"),
+	("L", "REAL"),				# um, Area Length of InductorParams
+	("A", "REAL"),				# um^2
+	("GuardRing_L", "REAL"),		# um, side of the whole cell
+	("extractor", "TEXT"),
+	("ext_freq", "REAL"),			# Hz
+	("ext_L", "REAL"),			# H
+	("ext_R", "REAL"),			# ohm
+	("ext_Q", "REAL"),
+	("gen_sec", "REAL"),			# GDS / FastHenry generation
+	("ext_sec", "REAL"),			# extraction
+	("files", "TEXT"),			# JSON {"henry": .inp, "gds": .gds}
+	("updated", "REAL"),			# unix time of the last write
+)
+RESULTS_INDEXES = (
+	("R",), ("S",), ("W",), ("N",), ("L",), ("A",), ("GuardRing_L",),
+	("ext_L",), ("ext_R",), ("ext_Q",), ("gen_sec",), ("ext_sec",),
+	("shape", "ext_L"),
+)
+RESULTS_QUERY_COLUMNS = ("shape", "R", "S", "W", "N", "GuardRing_L", "ext_L", "ext_R", "ext_Q", "gen_sec", "ext_sec")
+
+worker_store_Dict = {}		# path : InductorResultStore of this worker process
+
+
+def createResultRow(generator, output_files=None, gen_sec=None, result=None, extractor=None, freq=None, ext_sec=None):
+	# One row of RESULTS_COLUMNS, None columns keep the value already stored
+	parameters = generator.parameters
+	row = {
+		"key": generator.calDesignKey(),
+		"ID": str(parameters.ID),
+		"shape": generator.shapeType.name,
+		"R": float(parameters.R),
+		"S": float(parameters.S),
+		"W": float(parameters.W),
+		"N": int(parameters.N),
+		"T": float(parameters.T),
+		"GuardRing_S": float(parameters.GuardRing_S),
+		"GuardRing_W": float(parameters.GuardRing_W),
+		"L": float(parameters.L),
+		"A": float(parameters.A),
+		"GuardRing_L": float(parameters.GuardRing_L),
+		"gen_sec": gen_sec,
+		"files": json.dumps(output_files, sort_keys=True) if output_files else None,
+		"updated": time.time(),
+	}
+	if result is not None:
+		row["extractor"] = extractor
+		row["ext_freq"] = freq
+		row["ext_L"] = float(result["L"])
+		row["ext_R"] = float(result["R"])
+		row["ext_Q"] = float(result["Q"])
+		row["ext_sec"] = ext_sec
+	return row
+
+def getWorkerStore(store_path):
+	if store_path is None:
+		return None
+	if store_path not in worker_store_Dict:
+		worker_store_Dict[store_path] = InductorResultStore(store_path)
+	return worker_store_Dict[store_path]
+
+
+
+class InductorResultStore():
+	def __init__(self, path, timeout=RESULTS_TIMEOUT):
+		self.path = path
+		# Autocommit : every batch is one explicit BEGIN IMMEDIATE ... COMMIT
+		self.connection = sqlite3.connect(path, timeout=timeout, isolation_level=None)
+		self.connection.row_factory = sqlite3.Row
+		self.connection.execute("PRAGMA journal_mode=WAL")
+		self.connection.execute("PRAGMA synchronous=NORMAL")
+		self.createSchema()
+
+		self.write_cnt = 0
+		self.write_elapsed = 0.0
+
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, exc_type, exc_value, traceback):
+		self.close()
+		return False
+
+	def close(self):
+		if self.connection is not None:
+			self.connection.close()
+			self.connection = None
+		return
+
+	def createSchema(self):
+		column_str = ", ".join("%s %s" % column for column in RESULTS_COLUMNS)
+		self.connection.execute("BEGIN IMMEDIATE")
+		try:
+			self.connection.execute("CREATE TABLE IF NOT EXISTS %s (%s)" % (RESULTS_TABLE, column_str))
+			for columns in RESULTS_INDEXES:
+				self.connection.execute("CREATE INDEX IF NOT EXISTS %s_%s ON %s (%s)" % (RESULTS_TABLE, "_".join(columns), RESULTS_TABLE, ", ".join(columns)))
+			self.connection.execute("PRAGMA user_version=%d" % RESULTS_VERSION)
+			self.connection.execute("COMMIT")
+		except BaseException:
+			self.connection.execute("ROLLBACK")
+			raise
+		return
+
+
+	def putRows(self, row_List):
+		# One transaction : a design seen again is updated, columns without a value keep the stored one
+		if len(row_List) == 0:
+			return 0
+		start = time.perf_counter()
+		names = [name for name, declaration in RESULTS_COLUMNS]
+		update_str = ", ".join("%s=COALESCE(excluded.%s, %s.%s)" % (name, name, RESULTS_TABLE, name) for name in names[1:])
+		sql = "INSERT INTO %s (%s) VALUES (%s) ON CONFLICT(key) DO UPDATE SET %s" % (RESULTS_TABLE, ", ".join(names),
+			", ".join("?" * len(names)), update_str)
+		self.connection.execute("BEGIN IMMEDIATE")
+		try:
+			self.connection.executemany(sql, [tuple(row.get(name) for name in names) for row in row_List])
+			self.connection.execute("COMMIT")
+		except BaseException:
+			self.connection.execute("ROLLBACK")
+			raise
+		self.write_cnt = self.write_cnt + len(row_List)
+		self.write_elapsed = self.write_elapsed + (time.perf_counter() - start)
+		return len(row_List)
+
+	def query(self, where="", args=(), order_by="ext_L", limit=None):
+		# [dict] of the rows matching where (SQL on RESULTS_COLUMNS with ? args)
+		sql = "SELECT * FROM %s" % RESULTS_TABLE
+		if where:
+			sql = sql + " WHERE " + where
+		if order_by:
+			sql = sql + " ORDER BY " + order_by
+		if limit is not None:
+			sql = sql + " LIMIT %d" % int(limit)
+		return [dict(row) for row in self.connection.execute(sql, tuple(args))]
+
+	def findDesigns(self, L_min=None, L_max=None, side_max=None, shape=None, Q_min=None, order_by="ext_L", limit=None):
+		# e.g. findDesigns(450e-12, 550e-12, 100.0) : coils between 450 and 550 pH whose cell side is under 100 um
+		condition_List = []
+		args = []
+		for condition, value in (("ext_L >= ?", L_min), ("ext_L <= ?", L_max), ("GuardRing_L <= ?", side_max), ("shape = ?", shape), ("ext_Q >= ?", Q_min)):
+			if value is not None:
+				condition_List.append(condition)
+				args.append(value)
+		return self.query(" AND ".join(condition_List), args, order_by, limit)
+
+	def getQueryPlan(self, where="", args=()):
+		sql = "EXPLAIN QUERY PLAN SELECT * FROM %s" % RESULTS_TABLE + (" WHERE " + where if where else "")
+		return [row["detail"] for row in self.connection.execute(sql, tuple(args))]
+
+	def count(self):
+		return self.connection.execute("SELECT COUNT(*) FROM %s" % RESULTS_TABLE).fetchone()[0]
+
+	def getReport(self):
+		report = "results: %d designs in %s" % (self.count(), self.path)
+		if self.write_cnt > 0:
+			report = report + ", %d rows written in %.3f sec (%.1f rows/sec)" % (self.write_cnt, self.write_elapsed, self.write_cnt / max(self.write_elapsed, 1e-9))
+		return report
+
+
+
+
+def main(argv=None):
+	parser = argparse.ArgumentParser(description="Query the SQLite result store of Inductor Generator")
+	parser.add_argument("db", help="result store (inductor_sweep / inductor_optimizer --db)")
+	parser.add_argument("--L", default=None, help="H, min,max of the extracted inductance")
+	parser.add_argument("--side-max", type=float, default=None, help="um, largest GuardRing_L (cell side)")
+	parser.add_argument("--shape", default=None, help="inductor shape")
+	parser.add_argument("--Q-min", type=float, default=None, help="smallest extracted Q")
+	parser.add_argument("--order-by", default="ext_L", choices=[name for name, declaration in RESULTS_COLUMNS], help="sort column")
+	parser.add_argument("--descending", action="store_true", help="largest --order-by first")
+	parser.add_argument("--limit", type=int, default=None, help="rows to print")
+	parser.add_argument("--json", action="store_true", help="full rows as JSON lines")
+	args = parser.parse_args(argv)
+
+	L_min, L_max = (None, None)
+	if args.L is not None:
+		L_min, L_max = [float(value) if value else None for value in args.L.split(",")]
+	start = time.perf_counter()
+	with InductorResultStore(args.db) as store:
+		row_List = store.findDesigns(L_min, L_max, args.side_max, args.shape, args.Q_min, args.order_by + (" DESC" if args.descending else ""), args.limit)
+		total = store.count()
+	elapsed = time.perf_counter() - start
+
+	for row in row_List:
+		if args.json:
+			print(json.dumps(row, sort_keys=True))
+		else:
+			print(" ".join("%s=%s" % (name, "%g" % row[name] if isinstance(row[name], float) else row[name]) for name in RESULTS_QUERY_COLUMNS))
+	print("%d / %d designs in %.3f ms" % (len(row_List), total, elapsed * 1e3), file=sys.stderr)
+	return 0
+
+
+
+if __name__ == '__main__':
+	sys.exit(main())
@@ -0,0 +1,341 @@
+#!/bin/python3
+# Batch Sweep of Inductor Generator for FastHenry & GDS.
+# Parameter sets : CSV rows, JSON/YAML list of rows or JSON/YAML grid
+
+import argparse
+import concurrent.futures
+import csv
+import itertools
+import json
+import logging
+import os
+import sys
+import time
+
+from inductor_generator import InductorGenerator, InductorShapeType, INDUCTOR_OUTPUTS, METAL_THICKNESS, logger as generator_logger
+from inductor_cache import InductorCache, CACHE_MAX_BYTES
+from inductor_estimator import screenInductorParams, ESTIMATOR_FREQ, ESTIMATOR_MODELS
+from inductor_results import InductorResultStore, RESULTS_BATCH, createResultRow, getWorkerStore
+
+
+SWEEP_PARAM_KEYS = ("shape", "R", "S", "W", "N", "T", "GuardRing_S", "GuardRing_W")
+SWEEP_PARAM_DEFAULTS = {
+	"shape": "spiral",
+	"T": METAL_THICKNESS,
+	"GuardRing_S": 20.0,
+	"GuardRing_W": 2.0,
+}
+SWEEP_OUTPUTS = ("henry", "gds")
+SWEEP_CHUNK_SIZE = 8
+
+worker_cache_Dict = {}		# (root, max_bytes) : InductorCache of this worker process
+
+
+def expandSweepGrid(grid):
+	keys = list(grid.keys())
+	values_List = []
+	for key in keys:
+		values = grid[key]
+		if not isinstance(values, (list, tuple)):
+			values = [values]
+		values_List.append(values)
+	return [dict(zip(keys, values)) for values in itertools.product(*values_List)]
+
+def normalizeSweepParams(row):
+	params = dict(SWEEP_PARAM_DEFAULTS)
+	for key, value in row.items():
+		if value is None or value == "":
+			continue
+		if key not in SWEEP_PARAM_KEYS:
+			raise ValueError("Unknown sweep parameter: " + str(key))
+		params[key] = value
+
+	for key in ("R", "S", "W", "N"):
+		if key not in params:
+			raise ValueError("Missing sweep parameter: " + key)
+
+	if isinstance(params["shape"], InductorShapeType):
+		params["shape"] = params["shape"].name
+	InductorShapeType[params["shape"]]		# raise KeyError for unknown shape
+	for key in ("R", "S", "W", "T", "GuardRing_S", "GuardRing_W"):
+		params[key] = float(params[key])
+	params["N"] = int(params["N"])
+	return params
+
+def loadSweepParams(path):
+	ext = os.path.splitext(path)[1].lower()
+	if ext == ".csv":
+		with open(path, newline='') as f:
+			rows = list(csv.DictReader(f))
+	elif ext == ".json":
+		with open(path) as f:
+			rows = json.load(f)
+	elif ext in (".yaml", ".yml"):
+		import yaml
+		with open(path) as f:
+			rows = yaml.safe_load(f)
+	else:
+		raise ValueError("Unknown sweep file type: " + path)
+
+	if isinstance(rows, dict):
+		rows = expandSweepGrid(rows.get("grid", rows))
+	return [normalizeSweepParams(row) for row in rows]
+
+def createGenerator(params, out_dir=None):
+	return InductorGenerator(InductorShapeType[params["shape"]],
+		params["R"], params["S"], params["W"], params["N"], params["T"],
+		params["GuardRing_S"], params["GuardRing_W"], out_dir)
+
+def getSweepFileName(file_name, index):
+	# None : content addressed name of InductorGenerator
+	if file_name is None:
+		return None
+	return file_name % index
+
+def getWorkerCache(cache_config):
+	if cache_config is None:
+		return None
+	if cache_config not in worker_cache_Dict:
+		worker_cache_Dict[cache_config] = InductorCache(*cache_config)
+	return worker_cache_Dict[cache_config]
+
+def setSweepLogLevel(quiet):
+	# Not quiet : the netlist of every design (DEBUG of inductor_generator), also in the worker processes
+	generator_logger.setLevel(logging.WARNING if quiet else logging.DEBUG)
+
+def extractSweepPoint(generator, freq):
+	# ({"L", "R", "Q"}, sec) of the partial inductance solver, (None, None) without a port path (N=1)
+	from inductor_optimizer import extractCandidate
+	start = time.perf_counter()
+	try:
+		result = extractCandidate(generator, freq, "partial")
+	except ValueError:
+		return (None, None)
+	return (result, time.perf_counter() - start)
+
+def generateSweepPoint(params, file_name=None, outputs=SWEEP_OUTPUTS, out_dir=None, skip_existing=False, cache=None, row_List=None, extract_freq=None):
+	# row_List : appended with the result store row of the design (extracted at extract_freq if given)
+	start = time.perf_counter()
+	generator = createGenerator(params, out_dir)
+	output_files = {}
+	if cache is not None:
+		entry = cache.generate(generator, outputs)
+		for output in outputs:
+			output_files[output] = entry[output]
+	else:
+		output_files = generator.generateInductor(outputs, file_name, skip_existing)
+	if row_List is not None:
+		gen_sec = time.perf_counter() - start
+		result, ext_sec = (None, None)
+		if extract_freq is not None:
+			result, ext_sec = extractSweepPoint(generator, extract_freq)
+		row_List.append(createResultRow(generator, output_files, gen_sec, result, "partial", extract_freq, ext_sec))
+	return output_files
+
+def generateSweepChunk(chunk, outputs, file_name, quiet, out_dir, skip_existing, cache_config=None, store_path=None, extract_freq=None):
+	# Worker of InductorParallelSweep : (pid, [(index, params, output_files)], busy sec, cache hits, cache misses)
+	# The rows of the chunk go to the result store in one transaction
+	start = time.perf_counter()
+	setSweepLogLevel(quiet)
+	cache = getWorkerCache(cache_config)
+	store = getWorkerStore(store_path)
+	hits = cache.hits if cache is not None else 0
+	misses = cache.misses if cache is not None else 0
+	results = []
+	row_List = [] if store is not None else None
+	for index, params in chunk:
+		output_files = generateSweepPoint(params, getSweepFileName(file_name, index), outputs, out_dir, skip_existing, cache, row_List, extract_freq)
+		results.append((index, params, output_files))
+	if store is not None:
+		store.putRows(row_List)
+	if cache is not None:
+		hits = cache.hits - hits
+		misses = cache.misses - misses
+	return (os.getpid(), results, time.perf_counter() - start, hits, misses)
+
+
+
+class InductorSweep():
+	def __init__(self, param_List, outputs=SWEEP_OUTPUTS, file_name=None, quiet=True, out_dir=None, skip_existing=False, cache=None,
+			store=None, extract_freq=None):
+		self.param_List = [normalizeSweepParams(params) for params in param_List]
+		self.outputs = tuple(outputs)
+		self.file_name = file_name
+		self.quiet = quiet
+		self.out_dir = out_dir
+		self.skip_existing = skip_existing
+		self.cache = cache
+		self.store = store			# InductorResultStore
+		self.extract_freq = extract_freq	# Hz, partial inductance L / R / Q of every design in the store
+
+		self.design_cnt = 0
+		self.elapsed = 0.0
+
+	def run(self):
+		row_List = [] if self.store is not None else None
+		setSweepLogLevel(self.quiet)
+		for index, params in enumerate(self.param_List):
+			start = time.perf_counter()
+			output_files = generateSweepPoint(params, getSweepFileName(self.file_name, index), self.outputs, self.out_dir, self.skip_existing, self.cache,
+				row_List, self.extract_freq)
+			if row_List is not None and len(row_List) >= RESULTS_BATCH:
+				self.store.putRows(row_List)
+				row_List = []
+			self.elapsed = self.elapsed + (time.perf_counter() - start)
+			self.design_cnt = self.design_cnt + 1
+			yield (index, params, output_files)
+		if row_List is not None:
+			self.store.putRows(row_List)
+
+	def getThroughput(self):
+		if self.elapsed == 0.0:
+			return 0.0
+		return self.design_cnt / self.elapsed
+
+	def getReport(self):
+		return "%d designs in %.3f sec (%.1f designs/sec)" % (self.design_cnt, self.elapsed, self.getThroughput())
+
+
+class InductorParallelSweep(InductorSweep):
+	def __init__(self, param_List, outputs=SWEEP_OUTPUTS, file_name=None, quiet=True, out_dir=None, skip_existing=False, cache=None,
+			workers=None, chunk_size=SWEEP_CHUNK_SIZE, max_inflight=None, store=None, extract_freq=None):
+		InductorSweep.__init__(self, param_List, outputs, file_name, quiet, out_dir, skip_existing, cache, store, extract_freq)
+		self.workers = workers or os.cpu_count() or 1
+		self.chunk_size = max(1, int(chunk_size))
+		self.max_inflight = max(1, int(max_inflight or self.workers * 2))	# chunks running or waiting for order
+
+		self.worker_stats = {}		# pid : {"chunks", "designs", "busy"}
+
+	def createChunks(self):
+		indexed_List = list(enumerate(self.param_List))
+		for start in range(0, len(indexed_List), self.chunk_size):
+			yield indexed_List[start:start + self.chunk_size]
+
+	def updateWorkerStats(self, pid, designs, busy):
+		stats = self.worker_stats.setdefault(pid, {"chunks": 0, "designs": 0, "busy": 0.0})
+		stats["chunks"] = stats["chunks"] + 1
+		stats["designs"] = stats["designs"] + designs
+		stats["busy"] = stats["busy"] + busy
+		return
+
+	def run(self):
+		start = time.perf_counter()
+		chunks = self.createChunks()
+		chunk_cnt = 0
+		next_chunk = 0
+		pending = {}		# future : chunk number
+		done_chunks = {}	# chunk number : results waiting for the earlier chunks
+		cache_config = None
+		if self.cache is not None:
+			cache_config = (self.cache.root, self.cache.max_bytes)
+		store_path = self.store.path if self.store is not None else None
+
+		with concurrent.futures.ProcessPoolExecutor(max_workers=self.workers) as pool:
+			while True:
+				# Bounded in-flight work : running + finished out of order
+				while len(pending) + len(done_chunks) < self.max_inflight:
+					chunk = next(chunks, None)
+					if chunk is None:
+						break
+					future = pool.submit(generateSweepChunk, chunk, self.outputs, self.file_name, self.quiet, self.out_dir, self.skip_existing, cache_config,
+						store_path, self.extract_freq)
+					pending[future] = chunk_cnt
+					chunk_cnt = chunk_cnt + 1
+
+				if len(pending) == 0 and len(done_chunks) == 0:
+					break
+
+				if next_chunk not in done_chunks:
+					finished, _ = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+					for future in finished:
+						pid, results, busy, hits, misses = future.result()
+						self.updateWorkerStats(pid, len(results), busy)
+						if self.cache is not None:
+							self.cache.hits = self.cache.hits + hits
+							self.cache.misses = self.cache.misses + misses
+						done_chunks[pending.pop(future)] = results
+
+				# Ordered result collection
+				while next_chunk in done_chunks:
+					for result in done_chunks.pop(next_chunk):
+						self.design_cnt = self.design_cnt + 1
+						self.elapsed = time.perf_counter() - start
+						yield result
+					next_chunk = next_chunk + 1
+
+		self.elapsed = time.perf_counter() - start
+		if self.cache is not None:
+			self.cache.scanEntries()		# entries written by the workers
+
+	def getWorkerReport(self):
+		lines = []
+		for pid in sorted(self.worker_stats):
+			stats = self.worker_stats[pid]
+			lines.append("worker %d: %d chunks, %d designs, %.3f sec busy" % (pid, stats["chunks"], stats["designs"], stats["busy"]))
+		return "\n".join(lines)
+
+
+
+
+def main(argv=None):
+	parser = argparse.ArgumentParser(description="Batch sweep of Inductor Generator")
+	parser.add_argument("params", help="parameter sets (.csv / .json / .yaml)")
+	parser.add_argument("--outputs", default=",".join(SWEEP_OUTPUTS), help="comma separated of " + ",".join(INDUCTOR_OUTPUTS))
+	parser.add_argument("--file-name", default=None, help="output file name with %%d for the index (default : design hash)")
+	parser.add_argument("--out-dir", default=None, help="output directory")
+	parser.add_argument("--skip-existing", action="store_true", help="skip designs whose output files already exist")
+	parser.add_argument("--cache", default=None, help="result cache directory")
+	parser.add_argument("--cache-bytes", type=int, default=CACHE_MAX_BYTES, help="result cache size limit")
+	parser.add_argument("--db", default=None, help="SQLite result store of the designs (inductor_results)")
+	parser.add_argument("--extract", action="store_true", help="partial inductance L / R / Q of every design into --db")
+	parser.add_argument("--extract-freq", type=float, default=ESTIMATOR_FREQ, help="Hz, frequency of --extract")
+	parser.add_argument("--verbose", action="store_true", help="log the netlist of every design")
+	parser.add_argument("--workers", type=int, default=1, help="worker processes (0 : every core)")
+	parser.add_argument("--chunk-size", type=int, default=SWEEP_CHUNK_SIZE, help="designs per worker task")
+	parser.add_argument("--max-inflight", type=int, default=None, help="chunks in flight (default : 2 x workers)")
+	parser.add_argument("--screen-L", type=float, default=None, help="H, only designs whose analytical estimate is near this inductance")
+	parser.add_argument("--screen-tol", type=float, default=0.2, help="relative tolerance of --screen-L")
+	parser.add_argument("--screen-freq", type=float, default=ESTIMATOR_FREQ, help="Hz, frequency of the analytical estimate")
+	parser.add_argument("--screen-model", default="monomial", choices=ESTIMATOR_MODELS, help="analytical inductance model")
+	args = parser.parse_args(argv)
+	if args.extract and args.db is None:
+		parser.error("--extract needs --db")
+	outputs = args.outputs.split(",")
+	unknown_List = [output for output in outputs if output not in INDUCTOR_OUTPUTS]
+	if unknown_List:
+		parser.error("unknown --outputs %s, choose from %s" % (",".join(unknown_List), ",".join(INDUCTOR_OUTPUTS)))
+	logging.basicConfig(format="%(message)s")		# level : quiet of the sweep (setSweepLogLevel)
+
+	param_List = loadSweepParams(args.params)
+	if args.screen_L is not None:
+		design_cnt = len(param_List)
+		param_List = screenInductorParams(param_List, args.screen_L, args.screen_tol, args.screen_freq, args.screen_model)
+		print("screen: %d / %d designs within %.0f%% of %g H" % (len(param_List), design_cnt, args.screen_tol * 100.0, args.screen_L), file=sys.stderr)
+	cache = None
+	if args.cache is not None:
+		cache = InductorCache(args.cache, args.cache_bytes)
+	store = None
+	if args.db is not None:
+		store = InductorResultStore(args.db)
+	extract_freq = args.extract_freq if args.extract else None
+	if args.workers == 1:
+		sweep = InductorSweep(param_List, outputs, args.file_name, not args.verbose, args.out_dir, args.skip_existing, cache, store, extract_freq)
+	else:
+		sweep = InductorParallelSweep(param_List, outputs, args.file_name, not args.verbose, args.out_dir, args.skip_existing, cache,
+			args.workers or None, args.chunk_size, args.max_inflight, store, extract_freq)
+	for index, params, output_files in sweep.run():
+		print(index, " ".join(output_files.values()))
+	print(sweep.getReport(), file=sys.stderr)
+	if args.workers != 1:
+		print(sweep.getWorkerReport(), file=sys.stderr)
+	if cache is not None:
+		print(cache.getReport(), file=sys.stderr)
+	if store is not None:
+		print(store.getReport(), file=sys.stderr)
+		store.close()
+	return 0
+
+
+
+if __name__ == '__main__':
+	sys.exit(main())
@@ -0,0 +1,145 @@
+#!/bin/python3
+# Partial Inductance Solver for Inductor Generator.
+# Grover / Greenwood self and mutual partial inductances of the FastHenry segments,
+# summed along the port path : L = sum_i sum_j s_i s_j Lp_ij
+# Parallel pairs use a broadcast O(n^2) kernel, orthogonal pairs have no mutual inductance.
+# Slanted segments (hexagon / octagon sides) pair with every segment through a Neumann quadrature.
+
+import os
+
+import numpy as np
+
+from inductor_generator import MU_0
+from fasthenry_runner import FASTHENRY_ZC_MAT, readHenryInp, getFrequencyList, findPortPath, writeZcMat
+
+
+GMD_RATIO = 0.2235				# Geometric mean distance of a rectangle / (W + H)
+NEUMANN_POINTS = 8				# Gauss-Legendre points along each slanted segment
+
+
+def calBarInductance(length, W, H):
+	# Grover : self inductance of straight rectangular bars (m -> H)
+	length = np.asarray(length, dtype=np.float64)
+	with np.errstate(divide="ignore", invalid="ignore"):
+		L = MU_0 / (2.0 * np.pi) * length * (np.log(2.0 * length / (W + H)) + 0.5 + GMD_RATIO * (W + H) / length)
+	return np.where(length > 0.0, L, 0.0)
+
+def calFilamentF(x, d):
+	return x * np.arcsinh(x / d) - np.sqrt(x * x + d * d)
+
+def calParallelMutual(start_1, length_1, start_2, length_2, d):
+	# Greenwood : mutual inductance of parallel filaments [start, start + length] on the same axis, d apart (m -> H)
+	s = start_2 - start_1
+	return MU_0 / (4.0 * np.pi) * (calFilamentF(s + length_2, d) - calFilamentF(s + length_2 - length_1, d)
+		- calFilamentF(s, d) + calFilamentF(s - length_1, d))
+
+def calNeumannMutual(point_1a, point_2a, point_1b, point_2b, gmd):
+	# Neumann : mutual inductance of straight filaments in any direction, [na, 3], [nb, 3] m -> M[na, nb] (H)
+	# gmd[na, nb] : closest distance of the quadrature points (overlapping / touching bars)
+	t_List, w_List = np.polynomial.legendre.leggauss(NEUMANN_POINTS)
+	t_List = (t_List + 1.0) / 2.0
+	w_List = w_List / 2.0
+	vector_a = point_2a - point_1a
+	vector_b = point_2b - point_1b
+	M = np.zeros((len(vector_a), len(vector_b)))
+	for t_a, w_a in zip(t_List, w_List):
+		p_a = point_1a + t_a * vector_a
+		for t_b, w_b in zip(t_List, w_List):
+			p_b = point_1b + t_b * vector_b
+			r = np.sqrt(((p_a[:, None, :] - p_b[None, :, :])**2).sum(axis=2))
+			M += w_a * w_b / np.maximum(r, gmd)
+	return MU_0 / (4.0 * np.pi) * (vector_a @ vector_b.T) * M
+
+
+def calPartialInductanceMatrix(point_1, point_2, W, H):
+	# point_1, point_2 : [n, 3] m, W, H : [n] m -> Lp[n, n] for currents flowing point_1 -> point_2
+	point_1 = np.asarray(point_1, dtype=np.float64)
+	point_2 = np.asarray(point_2, dtype=np.float64)
+	W = np.asarray(W, dtype=np.float64)
+	H = np.asarray(H, dtype=np.float64)
+	vector = point_2 - point_1
+	length = np.abs(vector).max(axis=1)
+	axis = np.abs(vector).argmax(axis=1)
+	orientation = np.sign(vector[np.arange(len(axis)), axis])
+	slanted = (np.abs(vector) > 0.0).sum(axis=1) > 1
+
+	Lp = np.zeros((len(length), len(length)))
+	for k in range(3):
+		index = np.nonzero((axis == k) & (length > 0.0) & ~slanted)[0]
+		if len(index) == 0:
+			continue
+		start = np.minimum(point_1[index, k], point_2[index, k])
+		perp = np.delete(point_1[index], k, axis=1)
+		d = np.sqrt(((perp[:, None, :] - perp[None, :, :])**2).sum(axis=2))
+		gmd = GMD_RATIO * ((W[index] + H[index])[:, None] + (W[index] + H[index])[None, :]) / 2.0
+		d = np.maximum(d, gmd)		# Overlapping / collinear bars
+		M = calParallelMutual(start[:, None], length[index][:, None], start[None, :], length[index][None, :], d)
+		M = M * orientation[index][:, None] * orientation[index][None, :]
+		M[np.diag_indices(len(index))] = calBarInductance(length[index], W[index], H[index])
+		Lp[np.ix_(index, index)] = M
+
+	index = np.nonzero(slanted)[0]
+	if len(index) > 0:
+		gmd = GMD_RATIO * ((W[index] + H[index])[:, None] + (W + H)[None, :]) / 2.0
+		M = calNeumannMutual(point_1[index], point_2[index], point_1, point_2, gmd)
+		Lp[index, :] = M
+		Lp[:, index] = M.T
+		Lp[index, index] = calBarInductance(np.linalg.norm(vector[index], axis=1), W[index], H[index])
+	return Lp
+
+def calPortImpedance(point_1, point_2, W, H, rho, path):
+	# path : [(segment index, +1 / -1)] from the + to the - terminal -> (R ohm, L H), lengths in m, rho in ohm*m
+	index = np.array([i for i, direction in path], dtype=np.int64)
+	direction = np.array([direction for i, direction in path])
+	point_1 = np.asarray(point_1, dtype=np.float64)[index]
+	point_2 = np.asarray(point_2, dtype=np.float64)[index]
+	W = np.asarray(W, dtype=np.float64)[index]
+	H = np.asarray(H, dtype=np.float64)[index]
+	length = np.linalg.norm(point_2 - point_1, axis=1)
+	R = (np.asarray(rho, dtype=np.float64)[index] * length / (H * W)).sum()
+	Lp = calPartialInductanceMatrix(point_1, point_2, W, H)
+	L = direction @ Lp @ direction
+	return (R, L)
+
+
+
+def extractHenryNetlist(netlist, unit=1e-6):
+	# HenryNetlist of InductorGenerator (um) -> (R ohm, L H) between the Taps
+	if len(netlist.external_nodes) < 2:
+		raise ValueError("Incomplete .external in the netlist")
+	node_name = [netlist.getNodeName(i) for i in range(len(netlist.node_ids))]
+	seg_nodes = netlist.getSegmentArray()
+	segments = [(node_name[n1], node_name[n2], H, W, rho) for (n1, n2), H, W, rho in zip(seg_nodes, netlist.seg_H, netlist.seg_W, netlist.seg_rho)]
+	path = findPortPath(segments, node_name[netlist.external_nodes[0]], node_name[netlist.external_nodes[1]])
+	xyz = netlist.getNodeArray() * unit
+	W = np.array(netlist.seg_W) * unit
+	H = np.array(netlist.seg_H) * unit
+	rho = np.array(netlist.seg_rho) * unit
+	return calPortImpedance(xyz[seg_nodes[:, 0]], xyz[seg_nodes[:, 1]], W, H, rho, path)
+
+def extractInductorGenerator(generator):
+	# InductorGenerator -> (R ohm, L H) without writing the .inp
+	if not generator.getHenryBody():
+		raise ValueError("Not implementation : " + generator.shapeType.name)
+	return extractHenryNetlist(generator.henry_netlist)
+
+
+
+class PartialInductanceSolver():
+	# Solver of FastHenryRunner : frequency independent R and L of every .external port
+	def __call__(self, inp_file, work_dir):
+		nodes, segments, externals, freq, unit = readHenryInp(inp_file)
+		freq_List = getFrequencyList(*freq) if freq is not None else np.array([1.0])
+		point_1 = np.array([nodes[n1] for n1, n2, H, W, rho in segments]) * unit
+		point_2 = np.array([nodes[n2] for n1, n2, H, W, rho in segments]) * unit
+		W = np.array([W for n1, n2, H, W, rho in segments]) * unit
+		H = np.array([H for n1, n2, H, W, rho in segments]) * unit
+		rho = np.array([rho for n1, n2, H, W, rho in segments]) * unit
+		Z = np.zeros((len(freq_List), len(externals), len(externals)), dtype=complex)
+		for port, (node_start, node_end) in enumerate(externals):
+			R, L = calPortImpedance(point_1, point_2, W, H, rho, findPortPath(segments, node_start, node_end))
+			Z[:, port, port] = R + 2j * np.pi * freq_List * L
+		zc_file = os.path.join(work_dir, FASTHENRY_ZC_MAT)
+		with open(zc_file, 'w') as f:
+			writeZcMat(f, freq_List, Z)
+		return zc_file